@@ -0,0 +1,68 @@
+"""
+Deterministic synthetic datasets for the benchmarks. The same (shape, rows,
+seed) always produces the same frame, so runs on different commits compare
+like for like.
+"""
+import numpy as np
+import pandas as pd
+
+REGIONS = ["North", "South", "East", "West"]
+
+
+def make_sales(rows, seed=0):
+    """Tall, typical upload: dates, a few low-cardinality labels, numeric measures."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "order_date": pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 730, rows), unit="D"),
+        "region": rng.choice(REGIONS, rows),
+        "product": rng.choice([f"P{i:03d}" for i in range(200)], rows),
+        "customer_id": rng.integers(0, rows // 20 + 1, rows),
+        "revenue": rng.gamma(2.0, 50.0, rows),
+        "discount": np.where(rng.random(rows) < 0.3, rng.random(rows) * 0.2, 0.0),
+    })
+
+
+def make_wide(rows, columns=200, seed=0):
+    """Many numeric columns plus a handful of labels (sensor / survey exports)."""
+    rng = np.random.default_rng(seed)
+    data = {f"m{i:03d}": rng.normal(i, 1 + i % 7, rows) for i in range(columns)}
+    for i in range(5):
+        data[f"label{i}"] = rng.choice([f"L{j}" for j in range(10)], rows)
+    return pd.DataFrame(data)
+
+
+def make_high_cardinality(rows, seed=0):
+    """Text columns that are mostly unique (ids, emails, free text)."""
+    rng = np.random.default_rng(seed)
+    ids = rng.permutation(rows)
+    return pd.DataFrame({
+        "user_id": [f"U{i:09d}" for i in ids],
+        "email": [f"user{i}@example{i % 97}.com" for i in ids],
+        "city": rng.choice([f"City{i}" for i in range(max(rows // 10, 1))], rows),
+        "score": rng.random(rows) * 100,
+        "visits": rng.poisson(3, rows),
+    })
+
+
+def make_missing_heavy(rows, null_ratio=0.4, seed=0):
+    """Every column about `null_ratio` missing, with outliers in the numerics."""
+    rng = np.random.default_rng(seed)
+    df = make_sales(rows, seed=seed)
+    df["revenue"] = np.where(rng.random(rows) < 0.01, df["revenue"] * 50, df["revenue"])
+    for col in df.columns:
+        df[col] = df[col].mask(rng.random(rows) < null_ratio)
+    return df
+
+
+SHAPES = {
+    "tall": make_sales,
+    "wide": make_wide,
+    "high_cardinality": make_high_cardinality,
+    "missing_heavy": make_missing_heavy,
+}
+
+
+def make_dataset(shape, rows, seed=0):
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown shape {shape!r}. Available: {', '.join(SHAPES)}")
+    return SHAPES[shape](rows, seed=seed)
@@ -0,0 +1,100 @@
+"""
+Import-time budget for the Streamlit pages. Each page's top-level imports
+run in a fresh interpreter under `python -X importtime`, the way a cold
+container pays for them on the first visit.
+
+    python benchmarks/import_budget.py
+    python benchmarks/import_budget.py --budget 2.0 --repeats 5
+
+Exits with status 1 if a page takes longer than the budget to import, or
+if it pulls in one of the LAZY_MODULES at load time (those are only ever
+imported inside the function that needs them).
+"""
+import os
+import re
+import ast
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["home.py", "pages/Upload.py", "pages/Dashboard.py", "pages/Auto_Viz.py", "pages/chat.py", "pages/About.py"]
+# Heavy or optional packages that must stay out of every page's import path
+LAZY_MODULES = ("sklearn", "seaborn", "matplotlib", "google.genai", "groq", "nltk")
+# Seconds per page on a cold interpreter; streamlit and pandas alone are about half of it
+DEFAULT_BUDGET = 2.5
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$")
+
+
+def page_imports(path):
+    """Source of the module-level import statements of a page (imports inside functions are lazy)."""
+    with open(os.path.join(ROOT, path), "r", encoding="utf-8") as fh:
+        tree = ast.parse(fh.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def measure(code):
+    """(seconds, {module: cumulative seconds} of top-level imports, every module loaded) of one cold run."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    top, loaded = {}, set()
+    for line in proc.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        loaded.add(match.group(4))
+        if len(match.group(3)) == 1:
+            top[match.group(4)] = int(match.group(2)) / 1e6
+    return sum(top.values()), top, loaded
+
+
+def check_page(path, budget, repeats):
+    """Result dict for one page: best time over `repeats` runs, heaviest imports, lazy-module leaks."""
+    code = page_imports(path)
+    best = None
+    for _ in range(repeats):
+        seconds, top, loaded = measure(code)
+        if best is None or seconds < best[0]:
+            best = (seconds, top, loaded)
+    seconds, top, loaded = best
+    leaks = sorted(m for m in loaded if any(m == lazy or m.startswith(lazy + ".") for lazy in LAZY_MODULES))
+    heaviest = sorted(top.items(), key=lambda item: item[1], reverse=True)[:3]
+    return {
+        "page": path, "seconds": round(seconds, 4), "heaviest": heaviest,
+        "leaks": leaks, "ok": seconds <= budget and not leaks,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="Allowed seconds per page")
+    parser.add_argument("--repeats", type=int, default=3, help="Cold runs per page; the fastest counts")
+    parser.add_argument("--pages", nargs="+", default=PAGES)
+    args = parser.parse_args()
+
+    failed = 0
+    for path in args.pages:
+        try:
+            result = check_page(path, args.budget, args.repeats)
+        except RuntimeError as e:
+            print(f"{path:22s} import failed: {e}")
+            failed += 1
+            continue
+        heaviest = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in result["heaviest"])
+        status = "ok" if result["ok"] else "OVER BUDGET" if not result["leaks"] else "LAZY IMPORT LEAKED"
+        print(f"{path:22s} {result['seconds']:7.3f}s  {status:18s} ({heaviest})")
+        if result["leaks"]:
+            print(f"{'':22s} loaded at import time: {', '.join(result['leaks'])}")
+        failed += not result["ok"]
+
+    if failed:
+        print(f"\n{failed} page(s) failed the import budget of {args.budget:.2f}s.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Peak-memory check for CSV ingestion. Writes a synthetic CSV, then parses it
+in a fresh interpreter per reader and reports how far the resident set grew
+above the interpreter's own footprint:
+
+    python benchmarks/peak_rss.py --rows 2000000
+    python benchmarks/peak_rss.py --rows 2000000 --max-ratio 1.75
+
+`pandas` is a plain pd.read_csv of the whole file (what the pages did
+before); `streaming` is src.ingest.read_csv_streaming. Exits with status 1
+if the streaming peak exceeds `--max-ratio` times the CSV size on disk, or
+the plain read's peak.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.datasets import SHAPES, make_dataset
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Streaming peak allowed per byte of CSV on disk
+DEFAULT_MAX_RATIO = 1.75
+
+# Linux only: ru_maxrss survives exec (it would report the parent's peak), so the
+# child resets its high-water mark through clear_refs and reads VmHWM instead
+_CHILD = """
+import sys, json
+import pandas as pd
+from src.ingest import read_csv_streaming, INGEST_PIPELINE
+
+def status(field):
+    with open("/proc/self/status") as fh:
+        return next(int(line.split()[1]) for line in fh if line.startswith(field + ":"))
+
+reader, path = sys.argv[1], sys.argv[2]
+with open("/proc/self/clear_refs", "w") as fh:
+    fh.write("5")
+base = status("VmRSS")
+if reader == "pandas":
+    df = pd.read_csv(path)
+else:
+    df, _ = read_csv_streaming(path, clean=INGEST_PIPELINE)
+peak = status("VmHWM")
+print(json.dumps({"peak_mb": (peak - base) / 1024, "frame_mb": df.memory_usage(deep=True).sum() / 1024 ** 2}))
+"""
+
+
+def measure(reader, path):
+    """Peak RSS growth (MB) and resulting frame size of one parse."""
+    proc = subprocess.run([sys.executable, "-c", _CHILD, reader, path], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--shape", choices=list(SHAPES), default="tall")
+    parser.add_argument("--max-ratio", type=float, default=DEFAULT_MAX_RATIO,
+                        help="Allowed streaming peak as a multiple of the CSV size")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"{args.shape}.csv")
+        make_dataset(args.shape, args.rows).to_csv(path, index=False)
+        csv_mb = os.path.getsize(path) / 1024 ** 2
+        results = {reader: measure(reader, path) for reader in ("pandas", "streaming")}
+
+    print(f"CSV on disk: {csv_mb:.1f} MB ({args.rows:,} rows, {args.shape})")
+    for reader, result in results.items():
+        print(f"{reader:10s} peak +{result['peak_mb']:8.1f} MB  frame {result['frame_mb']:8.1f} MB  "
+              f"({result['peak_mb'] / csv_mb:.2f}x CSV)")
+
+    streaming = results["streaming"]["peak_mb"]
+    failures = []
+    if streaming > args.max_ratio * csv_mb:
+        failures.append(f"streaming peak is over {args.max_ratio:.2f}x the CSV size")
+    if streaming > results["pandas"]["peak_mb"]:
+        failures.append("streaming peak is above a plain pd.read_csv")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Prompt size and end-to-end latency of the profiled dataset context against
+the bare column lists the prompt used before (`Table: 'name' | Columns: [...]`):
+
+    python benchmarks/prompt_tokens.py --rows 100000
+    python benchmarks/prompt_tokens.py --shapes wide --wide-columns 1000 --prefill-ms 50
+
+Each recorded chat turn is asked through ask_ai (no response cache) with a
+local provider that answers from benchmarks/recorded_turns.json after
+`--prefill-ms` per 1,000 prompt tokens, a stand-in for the provider reading
+the prompt. Reported per shape: prompt tokens, the cold profile, and the
+median turn time. Exits with status 1 if a profiled prompt goes over
+`--max-tokens`, the token budget plus the fixed instructions.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.datasets import SHAPES, make_dataset, make_wide
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RECORDED_TURNS = os.path.join(HERE, "recorded_turns.json")
+# The wide shape has ~200 columns; scale its rows so every shape has a similar cell count
+ROW_SCALE = {"wide": 0.05}
+# Instructions around the dataset context come to roughly this many tokens
+PROMPT_OVERHEAD_TOKENS = 450
+
+
+def _column_list(name, profile, **kwargs):
+    """The dataset context as it was before profiles: the table name and its column names."""
+    return f"\n- Table: '{name}' | Columns: {list(profile['columns'])}"
+
+
+def _columns_only(df):
+    return {"columns": dict.fromkeys(df.columns)}
+
+
+def _engine(prefill_ms):
+    from src.llm_providers import ProviderEngine, ReplayProvider
+    from src.profiler import estimate_tokens
+
+    class PrefillReplay(ReplayProvider):
+        async def complete(self, prompt):
+            await asyncio.sleep(prefill_ms / 1000 * estimate_tokens(prompt) / 1000)
+            return await super().complete(prompt)
+
+    replay = ReplayProvider.from_file(RECORDED_TURNS, latency=0)
+    provider = PrefillReplay(replay.responses, latency=0)
+    return ProviderEngine([provider])
+
+
+def measure(df, queries, prefill_ms, repeats):
+    """Prompt tokens and median turn seconds for the profiled and the column-list prompt."""
+    from src import llm_handler, profiler
+    from src.data_lake import DEFAULT_TABLE
+
+    lake = {DEFAULT_TABLE: df}
+    llm_handler._provider_engine = _engine(prefill_ms)
+    results = {}
+    for variant in ("columns", "profile"):
+        patches = [] if variant == "profile" else [
+            mock.patch.object(llm_handler, "render_profile", _column_list),
+            mock.patch.object(llm_handler, "get_profile", _columns_only),
+        ]
+        for patch in patches:
+            patch.start()
+        try:
+            profiler._profiles.clear()
+            start = time.perf_counter()
+            tokens = [profiler.estimate_tokens(llm_handler.build_prompt(q, lake)) for q in queries]
+            cold = time.perf_counter() - start
+            turns = []
+            for _ in range(repeats):
+                for query in queries:
+                    start = time.perf_counter()
+                    llm_handler.ask_ai(query, lake, use_cache=False)
+                    turns.append(time.perf_counter() - start)
+        finally:
+            for patch in patches:
+                patch.stop()
+        results[variant] = {"tokens": max(tokens), "cold": cold, "turn": statistics.median(turns)}
+    return results
+
+
+def main():
+    from src.profiler import DEFAULT_TOKEN_BUDGET
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--shapes", nargs="+", choices=list(SHAPES), default=list(SHAPES))
+    parser.add_argument("--prefill-ms", type=float, default=50.0,
+                        help="Simulated provider time per 1,000 prompt tokens")
+    parser.add_argument("--wide-columns", type=int, default=200, help="Columns of the wide shape")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_TOKEN_BUDGET + PROMPT_OVERHEAD_TOKENS)
+    args = parser.parse_args()
+
+    with open(RECORDED_TURNS, "r", encoding="utf-8") as fh:
+        queries = [turn["query"] for turn in json.load(fh)]
+
+    failed = 0
+    print(f"{'shape':15s} {'columns':>8s} {'tokens':>15s} {'cold build':>17s} {'turn (median)':>21s}")
+    for shape in args.shapes:
+        rows = max(1, int(args.rows * ROW_SCALE.get(shape, 1)))
+        df = make_wide(rows, columns=args.wide_columns) if shape == "wide" else make_dataset(shape, rows)
+        result = measure(df, queries, args.prefill_ms, args.repeats)
+        before, after = result["columns"], result["profile"]
+        print(f"{shape:15s} {df.shape[1]:8d} {before['tokens']:6d} -> {after['tokens']:6d} "
+              f"{before['cold']:7.3f}s -> {after['cold']:6.3f}s "
+              f"{before['turn'] * 1000:8.1f}ms -> {after['turn'] * 1000:7.1f}ms")
+        if after["tokens"] > args.max_tokens:
+            print(f"FAIL: {shape} prompt is {after['tokens']} tokens, over {args.max_tokens}")
+            failed += 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""
+Benchmark suite for the DataTalk hot paths: ingest, cleaning, prompt
+building, response parsing, code execution, figure serialization and whole
+chat turns replayed offline against recorded LLM answers.
+
+    python benchmarks/run.py --rows 1000000 --out baseline.json
+    python benchmarks/run.py --rows 1000000 --out current.json --baseline baseline.json --threshold 0.2
+
+Every (case, shape) pair reports the best, mean and first (cold) time over
+`--repeats` runs. With --baseline the run is compared case by case and the
+script exits with status 1 if any case got slower than the threshold allows.
+"""
+import io
+import os
+import gc
+import sys
+import json
+import time
+import logging
+import platform
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.datasets import SHAPES, make_dataset
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RECORDED_TURNS = os.path.join(HERE, "recorded_turns.json")
+
+# The wide shape has ~200 columns; scale its rows so every shape has a similar cell count
+ROW_SCALE = {"wide": 0.05}
+# Lists of dicts are converted row by row; keep that case to a realistic API payload size
+MAX_RECORDS = 100_000
+# Differences below this are noise, whatever the ratio
+MIN_DELTA_SECONDS = 0.01
+
+# Shapes whose columns match the recorded chat turns
+TURN_SHAPES = ("tall", "missing_heavy")
+
+# name -> (setup(df) -> zero-argument callable to time, shapes it runs on)
+CASES = {}
+
+
+def case(name, shapes=tuple(SHAPES)):
+    def register(setup):
+        CASES[name] = (setup, shapes)
+        return setup
+    return register
+
+
+def _lake(df):
+    from src.data_lake import DEFAULT_TABLE
+    return {DEFAULT_TABLE: df}
+
+
+def _recorded_turns():
+    with open(RECORDED_TURNS, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+# -------------------------------------------------
+# Cases
+# -------------------------------------------------
+@case("ingest.read_csv")
+def bench_read_csv(df):
+    from src.ingest import read_csv_streaming
+
+    payload = df.to_csv(index=False).encode()
+    return lambda: read_csv_streaming(io.BytesIO(payload))
+
+
+@case("clean.auto_clean_data")
+def bench_clean(df):
+    from src.processor import auto_clean_data
+
+    # The result is dropped right away, so the pipeline memo never serves a repeat
+    return lambda: auto_clean_data(df)
+
+
+@case("llm.normalize_to_dataframe")
+def bench_normalize(df):
+    from src.llm_handler import normalize_to_dataframe
+
+    records = df.head(MAX_RECORDS).to_dict("records")
+    return lambda: normalize_to_dataframe(records)
+
+
+@case("profile.cold")
+def bench_profile(df):
+    from src import profiler
+
+    def run():
+        profiler._profiles.clear()
+        return profiler.get_profile(df)
+    return run
+
+
+@case("llm.build_prompt")
+def bench_build_prompt(df):
+    from src.llm_handler import build_prompt
+
+    lake = _lake(df)
+    build_prompt("What is the total revenue by region?", lake)  # profile cached, as after an upload
+    return lambda: build_prompt("What is the total revenue by region?", lake)
+
+
+@case("llm.extract_code_and_suggestions", shapes=("tall",))
+def bench_extract(df):
+    from src.llm_handler import extract_code_and_suggestions
+
+    responses = [turn["response"] for turn in _recorded_turns()] * 250
+    return lambda: [extract_code_and_suggestions(text) for text in responses]
+
+
+@case("execute.recorded_code", shapes=TURN_SHAPES)
+def bench_execute(df):
+    from src.llm_handler import extract_code_and_suggestions
+    from src.executor import execute_and_capture
+
+    lake = _lake(df)
+    codes = [extract_code_and_suggestions(turn["response"])[0] for turn in _recorded_turns()]
+    return lambda: [execute_and_capture(code, lake, sandbox=False) for code in codes]
+
+
+@case("figure.px_histogram")
+def bench_px_figure(df):
+    import plotly.express as px
+    from src.artifacts import encode_value
+
+    column = df.select_dtypes("number").columns[0]
+    return lambda: encode_value(px.histogram(df, x=column, nbins=30))
+
+
+@case("figure.binned_histogram")
+def bench_binned_figure(df):
+    from src import binning
+    from src.artifacts import encode_value
+
+    column = df.select_dtypes("number").columns[0]
+
+    def run():
+        binning._cache.clear()
+        return encode_value(binning.histogram_figure(binning.get_binning_index(df), column))
+    return run
+
+
+@case("chat.turn", shapes=TURN_SHAPES)
+def bench_chat_turn(df):
+    from src import llm_handler
+    from src.llm_providers import ProviderEngine, ReplayProvider
+    from src.executor import execute_and_capture
+
+    llm_handler._provider_engine = ProviderEngine([ReplayProvider.from_file(RECORDED_TURNS, latency=0)])
+    lake = _lake(df)
+    queries = [turn["query"] for turn in _recorded_turns()]
+
+    def run():
+        for query in queries:
+            code, _, _ = llm_handler.ask_ai(query, lake, use_cache=False)
+            if code:
+                execute_and_capture(code, lake, sandbox=False)
+    return run
+
+
+# -------------------------------------------------
+# Runner
+# -------------------------------------------------
+def time_case(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "seconds": round(min(timings), 6),
+        "mean": round(sum(timings) / len(timings), 6),
+        "first": round(timings[0], 6),
+    }
+
+
+class _BareModeFilter(logging.Filter):
+    """Generated code calls st.* outside a Streamlit server; drop the per-call warning."""
+
+    def filter(self, record):
+        return "missing ScriptRunContext" not in record.getMessage()
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(rows, repeats, shapes=None, only=None, seed=0):
+    import pandas as pd
+
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(_BareModeFilter())
+    results = {
+        "meta": {
+            "rows": rows, "repeats": repeats, "seed": seed, "commit": _git_commit(),
+            "python": platform.python_version(), "pandas": pd.__version__,
+            "platform": platform.platform(), "cpus": os.cpu_count(), "timestamp": time.time(),
+        },
+        "results": {},
+    }
+    for shape in shapes or SHAPES:
+        shape_rows = max(int(rows * ROW_SCALE.get(shape, 1)), 1)
+        df = make_dataset(shape, shape_rows, seed=seed)
+        for name, (setup, case_shapes) in CASES.items():
+            if shape not in case_shapes or (only and not any(name.startswith(o) for o in only)):
+                continue
+            result = time_case(setup(df), repeats)
+            result["rows"] = shape_rows
+            results["results"][f"{name}[{shape}]"] = result
+            print(f"{name + '[' + shape + ']':55s} {result['seconds']:9.4f}s  (first {result['first']:.4f}s)")
+        del df
+    return results
+
+
+def compare(current, baseline, threshold, min_delta=MIN_DELTA_SECONDS):
+    """Rows of (case, baseline s, current s, ratio, status) for cases present in both runs."""
+    rows = []
+    for key, result in current["results"].items():
+        before = baseline["results"].get(key)
+        if before is None:
+            continue
+        base, now = before["seconds"], result["seconds"]
+        ratio = now / base if base else float("inf")
+        if now > base * (1 + threshold) and now - base > min_delta:
+            status = "REGRESSED"
+        elif now < base * (1 - threshold) and base - now > min_delta:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((key, base, now, ratio, status))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--shapes", nargs="+", choices=list(SHAPES), help="Dataset shapes to run (default: all)")
+    parser.add_argument("--only", nargs="+", help="Run only cases whose name starts with one of these")
+    parser.add_argument("--out", help="Write the JSON results to this file")
+    parser.add_argument("--baseline", help="Compare against a previous JSON results file")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown vs. the baseline as a fraction (default 0.2 = 20%%)")
+    parser.add_argument("--min-delta", type=float, default=MIN_DELTA_SECONDS,
+                        help="Ignore differences smaller than this many seconds")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeats, args.shapes, args.only)
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, "r") as fh:
+        baseline = json.load(fh)
+    if baseline["meta"].get("rows") != args.rows:
+        print(f"Warning: baseline was run with {baseline['meta'].get('rows')} rows, this run with {args.rows}.")
+    rows = compare(results, baseline, args.threshold, args.min_delta)
+    print(f"\n{'case':55s} {'baseline':>10s} {'current':>10s} {'ratio':>7s}")
+    for key, base, now, ratio, status in rows:
+        print(f"{key:55s} {base:9.4f}s {now:9.4f}s {ratio:6.2f}x  {status}")
+    regressions = [row for row in rows if row[4] == "REGRESSED"]
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:.0%}.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Query time and peak memory of the pandas path vs. SQL mode (DuckDB) on the
+same questions over a synthetic sales table.
+
+    python benchmarks/sql_vs_pandas.py --rows 2000000 --repeats 3 --out sql_vs_pandas.json
+
+Each (question, engine) pair runs in a fresh process so peak RSS is not
+polluted by earlier runs; memory is reported as peak RSS above the RSS
+right after the table was built.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing as mp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.datasets import make_sales
+
+# question -> (pandas snippet, SQL query); both leave a small `result` frame
+QUESTIONS = {
+    "total revenue by region": (
+        "result = df.groupby('region', as_index=False)['revenue'].sum()",
+        "SELECT region, SUM(revenue) AS revenue FROM Uploaded_Data GROUP BY region",
+    ),
+    "average order value per month": (
+        "result = df.groupby(df['order_date'].dt.to_period('M'))['revenue'].mean().reset_index()",
+        "SELECT date_trunc('month', order_date) AS month, AVG(revenue) AS revenue "
+        "FROM Uploaded_Data GROUP BY month ORDER BY month",
+    ),
+    "top 10 customers by revenue": (
+        "result = df.groupby('customer_id')['revenue'].sum().nlargest(10).reset_index()",
+        "SELECT customer_id, SUM(revenue) AS revenue FROM Uploaded_Data "
+        "GROUP BY customer_id ORDER BY revenue DESC LIMIT 10",
+    ),
+    "share of orders with discount per product": (
+        "result = df.groupby('product').apply(lambda g: (g['discount'] > 0).mean()).reset_index(name='share')",
+        "SELECT product, AVG(CASE WHEN discount > 0 THEN 1.0 ELSE 0.0 END) AS share "
+        "FROM Uploaded_Data GROUP BY product",
+    ),
+}
+
+
+def _reset_peak_rss():
+    """Reset the kernel's peak-RSS counter (Linux); elsewhere the peak includes setup."""
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+    except OSError:
+        pass
+
+
+def _rss_bytes(field):
+    """VmRSS / VmHWM (peak) of this process from /proc, or ru_maxrss as a fallback."""
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _run_case(conn, engine, question, rows, repeats):
+    import pandas as pd
+    from src.sql_engine import run_sql
+
+    df = make_sales(rows)
+    lake = {"Uploaded_Data": df}
+    pandas_code, sql_query = QUESTIONS[question]
+    if engine == "sql":
+        run_sql("SELECT 1", {})  # load DuckDB before measuring
+
+    baseline = _rss_bytes("VmRSS")
+    _reset_peak_rss()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        if engine == "pandas":
+            context = {"pd": pd, "df": df, "data_lake": lake}
+            exec(pandas_code, context)
+            result = context["result"]
+        else:
+            result = run_sql(sql_query, lake)
+        timings.append(time.perf_counter() - start)
+
+    conn.send({
+        "seconds": min(timings),
+        "peak_mb": round((_rss_bytes("VmHWM") - baseline) / 1024 ** 2, 1),
+        "result_rows": len(result),
+    })
+    conn.close()
+
+
+def run(rows, repeats):
+    from src.sql_engine import sql_available
+
+    engines = ["pandas"] + (["sql"] if sql_available() else [])
+    ctx = mp.get_context("spawn")
+    results = {"rows": rows, "repeats": repeats, "questions": {}}
+    for question in QUESTIONS:
+        results["questions"][question] = {}
+        for engine in engines:
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(target=_run_case, args=(child_conn, engine, question, rows, repeats))
+            process.start()
+            results["questions"][question][engine] = parent_conn.recv()
+            process.join()
+    if "sql" not in engines:
+        results["note"] = "DuckDB is not installed; SQL mode was skipped."
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--out", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeats)
+    for question, engines in results["questions"].items():
+        line = " | ".join(f"{name}: {r['seconds']:.3f}s, +{r['peak_mb']} MB" for name, r in engines.items())
+        print(f"{question:45s} {line}")
+    if "note" in results:
+        print(results["note"])
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
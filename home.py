@@ -1,9 +1,17 @@
 import streamlit as st
-import pandas as pd
-from src.processor import auto_clean_data
+from src.ingest import read_uploaded_file, format_memory_report
+from src.dataset_registry import register_dataset, clean_dataset
+from src.profiler import get_profile
+from src.binning import get_binning_index
+from src.sampling import sample_dataset, needs_sampling
+from src.data_lake import table_name
+from src.llm_handler import warm_llm_clients
 
 st.set_page_config(page_title="DataTalk AI", layout="wide")
 
+# Load the LLM SDKs while the user picks a file, not on their first question
+warm_llm_clients()
+
 # Section: Introduction [cite: 288]
 st.title("🏠 DataTalk: Conversational Analytics")
 st.markdown("Transform your datasets into insights through intelligent automation.")
@@ -13,14 +21,29 @@ uploaded_file = st.file_uploader("Upload your CSV or XLSX file", type=['csv', 'x
 
 if uploaded_file:
     # Load and Preview [cite: 203, 204]
-    df = pd.read_csv(uploaded_file) if uploaded_file.name.endswith('.csv') else pd.read_excel(uploaded_file)
-    
-    st.session_state['raw_df'] = df
+    # Parse once per uploaded file; the session only keeps a handle to the shared frame
+    if st.session_state.get('raw_file_id') != uploaded_file.file_id:
+        raw_df, st.session_state['memory_report'] = read_uploaded_file(uploaded_file)
+        st.session_state['raw_handle'] = register_dataset(raw_df, uploaded_file.name)
+        st.session_state['raw_file_id'] = uploaded_file.file_id
+        del raw_df
+    df = st.session_state['raw_handle'].frame()
     st.write("### Data Preview", df.head())
+    # Numerics downcast and repeated text stored as categoricals at ingest
+    st.caption(format_memory_report(st.session_state['memory_report']))
     
     if st.button("Clean Data & Proceed"):
-        cleaned_df = auto_clean_data(df)
-        st.session_state['df'] = cleaned_df
+        # Cleaned once per dataset, shared with every session that loads it
+        st.session_state['df_handle'] = clean_dataset(st.session_state['raw_handle'])
+        cleaned_df = st.session_state['df_handle'].frame()
+        # Also register it as a named table so chat questions can join it with other datasets
+        st.session_state.setdefault('lake_handles', {})[table_name(st.session_state['raw_handle'].name)] = st.session_state['df_handle']
+        # Profile and bin once now so chat prompts and charts reuse them
+        get_profile(cleaned_df)
+        get_binning_index(cleaned_df)
+        # Large datasets: draw the stratified sample chat previews run on, once
+        if needs_sampling(st.session_state['df_handle']):
+            sample_dataset(st.session_state['df_handle'])
         st.success("Data cleaned! Navigate to the Dashboard or Chat.")
 # import google.generativeai as genai
 # import streamlit as st
@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from src.processor import auto_clean_data
+from src.viz_prep import build_chart
+from src.binning import get_binning_index, histogram_figure
 
 st.set_page_config(page_title="Auto Visualizations", layout="wide")
 
@@ -9,8 +9,8 @@ st.title("📈 Auto-Visualization Engine")
 st.markdown("Select your variables to generate instant, high-quality visualizations.")
 
 # Ensure data is available in session state
-if 'df' in st.session_state:
-    df = st.session_state['df']
+if 'df_handle' in st.session_state:
+    df = st.session_state['df_handle'].frame()
     
     # Sidebar for Chart Controls
     st.sidebar.header("Chart Configuration")
@@ -35,32 +35,21 @@ if 'df' in st.session_state:
     st.subheader(f"{chart_type}: {x_axis} vs {y_axis}")
     
     try:
-        if chart_type == "Bar Chart":
-            # Best for Comparisons [cite: 59, 105]
-            fig = px.bar(df, x=x_axis, y=y_axis, color=x_axis, template="plotly_white")
-            
-        elif chart_type == "Line Chart":
-            # Best for Trends & Time Analysis [cite: 59, 105]
-            fig = px.line(df, x=x_axis, y=y_axis, markers=True, template="plotly_white")
-            
-        elif chart_type == "Scatter Plot":
-            # Best for Statistical Insights/Correlations [cite: 53, 59]
-            fig = px.scatter(df, x=x_axis, y=y_axis, color=x_axis, trendline="ols", template="plotly_white")
-            
-        elif chart_type == "Box Plot":
-            # Best for Outlier Detection [cite: 59, 105]
-            fig = px.box(df, x=x_axis, y=y_axis, color=x_axis, template="plotly_white")
-            
-        elif chart_type == "Histogram":
+        chart_note = None
+        if chart_type == "Histogram":
             # Best for Distribution Analysis [cite: 53, 59]
-            fig = px.histogram(df, x=x_axis, marginal="box", template="plotly_white")
-            
-        elif chart_type == "Pie Chart":
-            # Best for Composition/Cardinality [cite: 59, 60]
-            fig = px.pie(df, names=x_axis, values=y_axis, hole=0.3, template="plotly_white")
+            # Bin counts and box quartiles come from the cached binning index
+            fig = histogram_figure(get_binning_index(df), x_axis, template="plotly_white")
+        else:
+            # Bar/Pie are pre-grouped, Line is downsampled, Scatter/Box use
+            # binned density and precomputed quartiles on large frames
+            # [cite: 53, 59, 60, 105]
+            fig, chart_note = build_chart(df, chart_type, x_axis, y_axis)
 
         # Render the interactive chart
         st.plotly_chart(fig, use_container_width=True)
+        if chart_note:
+            st.caption(chart_note)
         
         # Deliverable: Downloadable charts [cite: 113]
         st.success("Visualization generated successfully. You can interact with or download this chart using the icons above.")
@@ -1,22 +1,30 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import seaborn as sns
-import matplotlib.pyplot as plt
+from src.eda_stats import get_eda_stats, get_sampled_correlation, APPROX_ROW_THRESHOLD, DEFAULT_SAMPLE_ROWS
+from src.binning import get_binning_index, histogram_figure
 
 st.set_page_config(page_title="EDA Dashboard", layout="wide")
 
-if 'df' in st.session_state:
-    df = st.session_state['df']
+if 'df_handle' in st.session_state:
+    df = st.session_state['df_handle'].frame()
     st.title("📊 Automated EDA Dashboard")
 
+    # Large frames can use a sampled correlation instead of the exact O(n·k²) pass
+    approximate = False
+    if len(df) > APPROX_ROW_THRESHOLD:
+        approximate = st.toggle("Fast approximate correlation (sampled)", value=True)
+
+    # Computed once per dataset and cached across reruns and sessions
+    eda = get_eda_stats(df, with_corr=not approximate)
+
     # Summary Statistics [cite: 44, 69]
     st.subheader("Descriptive Statistics")
-    st.dataframe(df.describe(), use_container_width=True)
+    st.dataframe(eda["describe"], use_container_width=True)
 
     # Data Quality: Missing Values [cite: 44, 71]
     st.subheader("Missing Values Report")
-    missing_data = df.isnull().sum()
+    missing_data = eda["null_counts"]
     st.write(missing_data[missing_data > 0] if not missing_data.empty else "No missing values detected.")
 
     # Visualizations [cite: 45, 46]
@@ -24,9 +32,13 @@ if 'df' in st.session_state:
 
     with col1:
         st.subheader("Correlation Heatmap")
-        numeric_df = df.select_dtypes(include=['number'])
-        if not numeric_df.empty:
-            fig_corr = px.imshow(numeric_df.corr(), text_auto=True, aspect="auto", color_continuous_scale='RdBu_r')
+        if eda["has_numeric"]:
+            if approximate:
+                corr, corr_error = get_sampled_correlation(df)
+                st.caption(f"Sampled {DEFAULT_SAMPLE_ROWS:,} rows; max 95% error bound ±{corr_error.max().max():.3f}")
+            else:
+                corr = eda["corr"]
+            fig_corr = px.imshow(corr, text_auto=True, aspect="auto", color_continuous_scale='RdBu_r')
             st.plotly_chart(fig_corr, use_container_width=True)
         else:
             st.info("No numerical data available for correlation.")
@@ -34,7 +46,8 @@ if 'df' in st.session_state:
     with col2:
         st.subheader("Column Distribution")
         target_col = st.selectbox("Select column to view distribution", df.columns)
-        fig_dist = px.histogram(df, x=target_col, marginal="box", nbins=30)
+        # Drawn from the per-dataset binning index, so switching columns is a lookup
+        fig_dist = histogram_figure(get_binning_index(df), target_col)
         st.plotly_chart(fig_dist, use_container_width=True)
 
 else:
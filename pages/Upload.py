@@ -1,29 +1,68 @@
 import streamlit as st
 import pandas as pd
 import os
-from src.processor import auto_clean_data
-from sklearn import datasets
+from src.ingest import read_uploaded_file, format_memory_report
+from src.profiler import get_profile
+from src.binning import get_binning_index
+from src.sampling import sample_dataset, needs_sampling
+from src.data_lake import table_name
+from src.data_fetcher import (
+    TITANIC_URL, download_from_sklearn, download_from_url, save_dataset, load_saved_dataset
+)
+from src.dataset_store import list_datasets, dataset_info
+from src.dataset_registry import register_dataset, clean_dataset, get_registry
+from src.processor import clean_data, pipeline_timings
 
 st.set_page_config(page_title="Data Source - DataTalk", layout="wide")
 
+# UI choices -> pipeline stages (see src/processor.py)
+IMPUTATION_CHOICES = {
+    "Median / 'Unknown'": [{"stage": "impute", "numeric": "median", "other": "Unknown"}],
+    "Mode": [{"stage": "impute", "numeric": "mode", "other": "mode"}],
+    "Leave missing": [],
+}
+OUTLIER_CHOICES = {
+    "IQR": [{"stage": "iqr_outliers"}],
+    "Z-score (|z| > 3)": [{"stage": "zscore_outliers", "threshold": 3.0}],
+    "MAD (modified z > 3.5)": [{"stage": "mad_outliers", "threshold": 3.5}],
+    "Keep outliers": [],
+}
+
 st.title("📂 Data Acquisition & Preparation")
 st.markdown("Choose between uploading your own business data or fetching industry-standard datasets.")
 
-# Create Two Paths: Manual and Automated
-tab1, tab2 = st.tabs(["📤 Manual Upload", "📥 Automated Downloader"])
+with st.sidebar.expander("🧠 Dataset Memory"):
+    registry_stats = get_registry().stats()
+    if registry_stats:
+        st.dataframe(pd.DataFrame(registry_stats), use_container_width=True, hide_index=True)
+    else:
+        st.caption("No datasets loaded yet.")
+
+# Create Three Paths: Manual, Automated and Saved
+tab1, tab2, tab3 = st.tabs(["📤 Manual Upload", "📥 Automated Downloader", "🗂️ Saved Datasets"])
 
 with tab1:
     st.subheader("Upload Local Dataset")
     uploaded_file = st.file_uploader("Drag and drop your CSV or XLSX file", type=['csv', 'xlsx'])
     
     if uploaded_file:
-        if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file)
-        else:
-            df = pd.read_excel(uploaded_file)
-        # We store in raw_df to show the preview before cleaning
-        st.session_state['raw_df'] = df
+        # Stream the file in bounded chunks, only once per uploaded file
+        if st.session_state.get('raw_file_id') != uploaded_file.file_id:
+            # We store a raw_handle to show the preview before cleaning;
+            # the frame itself lives once in the shared registry
+            raw_df, st.session_state['memory_report'] = read_uploaded_file(uploaded_file)
+            st.session_state['raw_handle'] = register_dataset(raw_df, uploaded_file.name)
+            st.session_state['raw_file_id'] = uploaded_file.file_id
+            del raw_df
+            # Keep a columnar copy so the dataset can be reopened without re-uploading
+            save_dataset(st.session_state['raw_handle'].frame(), os.path.splitext(uploaded_file.name)[0])
         st.success(f"File '{uploaded_file.name}' uploaded successfully!")
+        # Before/after memory of the dtype optimization applied while parsing
+        report = st.session_state['memory_report']
+        st.caption(format_memory_report(report))
+        if report["changes"]:
+            with st.expander("Dtype changes"):
+                st.json(report["changes"])
 
 with tab2:
     st.subheader("Fetch Standard Datasets")
@@ -36,22 +75,40 @@ with tab2:
     if st.button("Fetch and Load"):
         with st.spinner("Fetching data..."):
             if ds_choice == "Iris (Classification)":
-                data = datasets.load_iris()
-                df = pd.DataFrame(data.data, columns=data.feature_names)
-                df['target'] = data.target
+                df = download_from_sklearn("iris")
             else:
-                url = "https://raw.githubusercontent.com/datasciencedojo/datasets/master/titanic.csv"
-                df = pd.read_csv(url)
+                # Cached locally; only revalidated against GitHub on later clicks
+                df = download_from_url(TITANIC_URL)
             
-            # Update session state
-            st.session_state['raw_df'] = df
-            st.success(f"Successfully loaded {ds_choice}!")
-            # Rerun to show the preview and cleaning button immediately
-            st.rerun()
+            if df is None:
+                st.error(f"Could not fetch {ds_choice}. Check your connection and try again.")
+            else:
+                # Update session state
+                st.session_state['raw_handle'] = register_dataset(df, ds_choice)
+                st.success(f"Successfully loaded {ds_choice}!")
+                # Rerun to show the preview and cleaning button immediately
+                st.rerun()
 
-# Processing Section (Only shows if raw_df is in session state)
-if 'raw_df' in st.session_state:
-    raw_data = st.session_state['raw_df']
+with tab3:
+    st.subheader("Reopen a Previously Ingested Dataset")
+    saved = list_datasets()
+    if saved:
+        saved_choice = st.selectbox("Select a saved dataset", saved)
+        info = dataset_info(saved_choice)
+        st.caption(f"{info['rows']} rows | {len(info['columns'])} columns")
+        if st.button("Open Dataset"):
+            df = load_saved_dataset(saved_choice)
+            if df is not None:
+                st.session_state['raw_handle'] = register_dataset(df, saved_choice)
+                st.rerun()
+            else:
+                st.error(f"Could not open '{saved_choice}'.")
+    else:
+        st.info("No saved datasets yet. Upload or fetch one first.")
+
+# Processing Section (Only shows if raw_handle is in session state)
+if 'raw_handle' in st.session_state:
+    raw_data = st.session_state['raw_handle'].frame()
     st.markdown("---")
     
     # Display Metadata & Preview
@@ -68,15 +125,41 @@ if 'raw_df' in st.session_state:
 
     # Trigger Data Preparation Module
     st.markdown("### 🛠️ Data Engineering")
+    # Compose the cleaning pipeline; the defaults reproduce the standard engine
+    with st.expander("Cleaning pipeline", expanded=False):
+        pipe_a, pipe_b, pipe_c = st.columns(3)
+        dedup = pipe_a.checkbox("Drop duplicates", value=True)
+        coerce = pipe_a.checkbox("Coerce numeric/date text", value=False)
+        imputation = pipe_b.selectbox("Missing values", list(IMPUTATION_CHOICES))
+        outliers = pipe_c.selectbox("Outliers", list(OUTLIER_CHOICES))
+    pipeline = ([{"stage": "drop_duplicates"}] if dedup else []) + \
+        ([{"stage": "coerce_types"}] if coerce else []) + \
+        IMPUTATION_CHOICES[imputation] + OUTLIER_CHOICES[outliers]
+
     if st.button("Run Automated Cleaning"):
         with st.spinner("Executing architecture-level cleaning (Imputation & IQR)..."):
-            # 1. Clean the data using your src/processor.py logic
-            cleaned_df = auto_clean_data(raw_data)
+            # 1. Clean the data using your src/processor.py logic (once per dataset and pipeline, shared)
+            st.session_state['df_handle'] = clean_dataset(
+                st.session_state['raw_handle'], clean_fn=clean_data, config={"pipeline": pipeline}
+            )
             
-            # 2. CRITICAL: Store in 'df'. This is the variable used by Dashboard and Viz pages.
-            st.session_state['df'] = cleaned_df
+            # 2. CRITICAL: Store in 'df_handle'. This is the handle used by Dashboard and Viz pages.
+            cleaned_df = st.session_state['df_handle'].frame()
+            # Also register it as a named table so chat questions can join it with other datasets
+            st.session_state.setdefault('lake_handles', {})[table_name(st.session_state['raw_handle'].name)] = st.session_state['df_handle']
+            # 3. Profile and bin once now so chat prompts and charts reuse the cached summaries
+            get_profile(cleaned_df)
+            get_binning_index(cleaned_df)
+            # Large datasets: draw the stratified sample chat previews run on, once
+            if needs_sampling(st.session_state['df_handle']):
+                sample_dataset(st.session_state['df_handle'])
             
             st.success("Cleaning complete! Data is now active across all modules.")
+            timings = pipeline_timings(raw_data, pipeline)
+            if timings:
+                st.dataframe(pd.DataFrame(timings), use_container_width=True, hide_index=True)
+            else:
+                st.caption("Reused the cleaned dataset from an earlier run.")
             st.balloons()
             
             # Show a button to jump to the next step
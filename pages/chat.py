@@ -1,9 +1,22 @@
+import os
+import uuid
 import streamlit as st
 import pandas as pd
-from src.llm_handler import ask_ai 
-from src.executor import execute_llm_code
+from src.llm_handler import ask_ai_stream, get_response_cache, get_provider_engine, streaming_stats, warm_llm_clients
+from src.executor import execute_and_capture, execute_progressive, render_artifacts, code_fingerprint
+from src.sampling import sample_dataset, needs_sampling
+from src.data_lake import LazyDataLake, DEFAULT_TABLE
+from src.sql_engine import sql_available
+from src.chat_store import get_chat_store, trim_window, RECENT_WINDOW, PAGE_SIZE
+from src.tracing import get_tracer, span
+from src.speculation import Speculation, speculation_enabled
+
+# Turns shown in the developer panel, and the top-level stages charted for each
+TRACE_TURNS = 10
+TURN_STAGES = ["llm.select_tables", "llm.build_prompt", "llm.stream", "llm.parse", "execute", "render"]
 
 st.set_page_config(page_title="DataTalk Intelligence", layout="wide")
+warm_llm_clients()
 
 # --- 1. INITIALIZE SESSION STATE ---
 if "messages" not in st.session_state:
@@ -12,29 +25,222 @@ if 'last_suggestions' not in st.session_state:
     st.session_state.last_suggestions = []
 if 'active_prompt' not in st.session_state:
     st.session_state.active_prompt = None
+if 'history_pages' not in st.session_state:
+    st.session_state.history_pages = 0
+if 'speculation' not in st.session_state:
+    st.session_state.speculation = Speculation()
+speculation = st.session_state.speculation
+
+# Conversations live in SQLite; session_state only holds the recent window.
+# The id rides in the URL so a reconnect or restart picks the chat back up.
+chat_store = get_chat_store()
+
+
+def conversation_owner():
+    """
+    Whose conversations this session may list and resume: the signed-in
+    user when authentication is configured, otherwise a random key kept in
+    the URL (so a reload keeps it, and only someone handed the link shares it).
+    """
+    if st.user.get("is_logged_in") and st.user.get("email"):
+        return f"user:{st.user.get('email')}"
+    if "owner_key" not in st.session_state:
+        st.session_state.owner_key = st.query_params.get("owner") or uuid.uuid4().hex
+    st.query_params["owner"] = st.session_state.owner_key
+    return f"session:{st.session_state.owner_key}"
+
+
+owner = conversation_owner()
+
+
+def resume_conversation(conversation_id):
+    """Reload a stored conversation's recent turns; nothing is sent to the LLM."""
+    st.session_state.conversation_id = conversation_id
+    st.session_state.messages = chat_store.recent(conversation_id, RECENT_WINDOW)
+    st.session_state.history_pages = 0
+    last_answer = next((m for m in reversed(st.session_state.messages) if m["role"] == "assistant"), None)
+    st.session_state.last_suggestions = (last_answer or {}).get("suggestions") or []
+    st.query_params["conversation"] = conversation_id
+
+
+if "conversation_id" not in st.session_state:
+    st.session_state.conversation_id = None
+    requested = st.query_params.get("conversation")
+    if requested and chat_store.exists(requested, owner):
+        resume_conversation(requested)
 
 # --- 2. GLOBAL DATA SYNC ---
-active_df = st.session_state.get('df')
+# The session holds handles; frames are shared across sessions and only
+# loaded when a prompt or generated code refers to their table
+active_handle = st.session_state.get('df_handle')
+lake_tables = {}
+if active_handle is not None:
+    lake_tables[DEFAULT_TABLE] = active_handle
+for table, handle in st.session_state.get('lake_handles', {}).items():
+    if active_handle is None or handle.key != active_handle.key:
+        lake_tables[table] = handle
+data_lake = LazyDataLake(lake_tables)
+active_fingerprint = data_lake.fingerprint() if lake_tables else None
+active_dataset = active_handle.key if active_handle is not None else None
+
+# Large tables also have a stratified sample, drawn once per dataset and shared;
+# answers preview on it while the full data is still being scanned
+sample_tables = {table: sample_dataset(handle) for table, handle in lake_tables.items() if needs_sampling(handle)}
+st.session_state['sample_handles'] = sample_tables
+sample_lake = LazyDataLake({table: sample_tables.get(table, handle) for table, handle in lake_tables.items()})
+sample_sizes = {table: (sample.rows(), lake_tables[table].rows()) for table, sample in sample_tables.items()}
 
 # --- 3. UI HEADER ---
 st.title("💬 DataTalk: Autonomous Insights")
 
+with st.sidebar.expander("⚡ Response Cache"):
+    cache_stats = get_response_cache().stats()
+    st.write(f"**Hit rate:** {cache_stats['hit_rate']:.0%}")
+    st.write(f"Memory hits: {cache_stats['memory_hits']} | Disk hits: {cache_stats['disk_hits']}")
+    st.write(f"Misses: {cache_stats['misses']} | Coalesced: {cache_stats['coalesced']}")
+
+with st.sidebar.expander("🛰️ LLM Providers"):
+    engine_stats = get_provider_engine().stats()
+    for provider_name, row in engine_stats["providers"].items():
+        p95 = f"{row['p95']:.2f}s" if row["p95"] is not None else "n/a"
+        st.write(f"**{provider_name}** — p95 {p95} | wins {row['wins']} | errors {row['errors']} | {row['breaker']}")
+    st.write(f"Hedged requests: {engine_stats['hedges_fired']}")
+    ttft = streaming_stats()
+    if ttft["samples"]:
+        st.write(f"Time to first token: p50 {ttft['ttft_p50']:.2f}s | p95 {ttft['ttft_p95']:.2f}s")
+
+with st.sidebar.expander("🗄️ Data Lake"):
+    if lake_tables:
+        for table, handle in lake_tables.items():
+            st.write(f"`{table}` — {handle.name} ({len(handle.columns())} columns)")
+        st.caption("Mention a table or its columns to include it in the question.")
+    else:
+        st.caption("No tables yet. Clean a dataset on the Upload page.")
+
+# SQL mode: the model writes a DuckDB query and only its small result reaches pandas/px
+sql_mode = st.sidebar.toggle(
+    "SQL mode (DuckDB)", value=False, disabled=not sql_available(),
+    help="Answer with SQL over the tables instead of pandas code." if sql_available() else "Install duckdb to enable."
+)
+query_mode = "sql" if sql_mode else "pandas"
+
+progressive = st.sidebar.toggle(
+    "Progressive answers", value=bool(sample_tables), disabled=not sample_tables,
+    help="Show an estimate from a sample first, then the exact result." if sample_tables
+    else "Used for tables with many rows."
+)
+
+# Follow-up suggestions are answered in the background so a click renders at once
+precompute = st.sidebar.toggle(
+    "Precompute follow-ups", value=speculation_enabled(),
+    help="Answer the suggested questions while you read the current answer."
+)
+if not precompute or not lake_tables:
+    speculation.cancel()
+
+with st.sidebar.expander("🗂️ Conversations"):
+    if st.button("New conversation", disabled=st.session_state.conversation_id is None):
+        st.session_state.conversation_id = None
+        st.session_state.messages = []
+        st.session_state.last_suggestions = []
+        st.session_state.history_pages = 0
+        speculation.cancel()
+        st.query_params.pop("conversation", None)
+        st.rerun()
+    past = chat_store.conversations(owner, dataset=active_dataset, limit=10)
+    if not past:
+        st.caption("No saved conversations for this dataset yet.")
+    for convo in past:
+        label = f"{convo['title'] or 'Untitled'} ({convo['messages']} messages)"
+        current = convo["id"] == st.session_state.conversation_id
+        if st.button(label, key=f"resume_{convo['id']}", disabled=current):
+            resume_conversation(convo["id"])
+            st.rerun()
+
+
+# Developer panel: where the last turns spent their time, plus the raw counters
+dev_panel = st.sidebar.toggle("Developer panel", value=os.getenv("DATATALK_DEV_PANEL") == "1")
+if dev_panel:
+    tracer = get_tracer()
+    with st.expander(f"🔬 Latency of the last {TRACE_TURNS} turns", expanded=True):
+        turns = pd.DataFrame(tracer.breakdown(limit=TRACE_TURNS, name="chat.turn"))
+        if turns.empty:
+            st.caption("No traced turns yet. Ask a question.")
+        else:
+            st.dataframe(turns, hide_index=True)
+            stages = [c for c in TURN_STAGES if c in turns.columns]
+            st.bar_chart(turns.set_index("trace")[stages], horizontal=True)
+        other = pd.DataFrame([row for row in tracer.breakdown(limit=TRACE_TURNS) if row["name"] != "chat.turn"])
+        if not other.empty:
+            st.caption("Ingest, cleaning and precomputed follow-ups")
+            st.dataframe(other, hide_index=True)
+        col_json, col_prom = st.columns(2)
+        col_json.download_button("Traces (JSON)", tracer.export_json(), "datatalk_traces.json", "application/json")
+        col_prom.download_button("Metrics (Prometheus)", tracer.export_prometheus(), "datatalk_metrics.prom", "text/plain")
+
+
+def remember(message):
+    """Persist a message and keep it in the in-memory recent window."""
+    if st.session_state.conversation_id is None:
+        st.session_state.conversation_id = chat_store.start_conversation(owner, dataset=active_dataset)
+        st.query_params["conversation"] = st.session_state.conversation_id
+    stored = chat_store.append(st.session_state.conversation_id, message)
+    st.session_state.messages.append(stored)
+    trim_window(st.session_state.messages, RECENT_WINDOW)
+
 # --- 4. CHAT DISPLAY ---
+# Older turns are read from the store page by page and only replayed
+oldest_id = st.session_state.messages[0]["id"] if st.session_state.messages else None
+if oldest_id is not None:
+    older = []
+    for _ in range(st.session_state.history_pages):
+        page = chat_store.page(st.session_state.conversation_id, before_id=oldest_id, limit=PAGE_SIZE)
+        if not page:
+            break
+        older = page + older
+        oldest_id = page[0]["id"]
+    if chat_store.page(st.session_state.conversation_id, before_id=oldest_id, limit=1):
+        if st.button("⬆️ Load older messages"):
+            st.session_state.history_pages += 1
+            st.rerun()
+    for message in older:
+        with st.chat_message(message["role"]):
+            st.write(message["content"])
+            if message.get("artifacts") is not None:
+                render_artifacts(message["artifacts"])
+            elif message.get("code"):
+                st.code(message["code"], language="python")
+
 # This ensures previous answers and graphs stay visible
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.write(message["content"])
         if "code" in message and message["code"]:
-            # Re-run the visual code so the graph stays on screen
-            data_to_analyze = {"Uploaded_Data": active_df}
-            execute_llm_code(message["code"], data_to_analyze)
+            # Only the tables this code reads decide whether its captured output is stale
+            fingerprint = code_fingerprint(message["code"], data_lake) if lake_tables else None
+            if message.get("artifacts") is not None and (message.get("df_fingerprint") == fingerprint
+                                                         or not lake_tables):
+                # Replay the captured output; no pandas or Plotly work on rerun
+                render_artifacts(message["artifacts"])
+            elif lake_tables:
+                # First render (or its tables changed): run the code once and capture it
+                _, _, artifacts = execute_and_capture(message["code"], data_lake)
+                message["artifacts"] = artifacts
+                message["df_fingerprint"] = fingerprint
+                chat_store.update_artifacts(message["id"], artifacts, fingerprint)
+            else:
+                st.code(message["code"], language="python")
 
 # --- 5. PREDICTIVE FOLLOW-UPS ---
 if st.session_state.last_suggestions:
+    if precompute and lake_tables:
+        # A new dataset or mode starts a new round and cancels the old one
+        speculation.start(st.session_state.last_suggestions, data_lake, active_fingerprint, query_mode)
     st.markdown("🔍 **Predictive Follow-ups:**")
     cols = st.columns(len(st.session_state.last_suggestions))
+    turn = st.session_state.messages[-1]["id"] if st.session_state.messages else 0
     for i, sugg in enumerate(st.session_state.last_suggestions):
-        if cols[i].button(sugg, key=f"sugg_{i}_{len(st.session_state.messages)}"):
+        if cols[i].button(sugg, key=f"sugg_{i}_{turn}"):
             st.session_state.active_prompt = sugg
             st.rerun()
 
@@ -42,33 +248,69 @@ if st.session_state.last_suggestions:
 user_text = st.chat_input("Ask about patterns, averages, or trends...")
 
 # --- 7. LOGIC EXECUTION ---
-final_query = st.session_state.get('active_prompt') or user_text
+clicked = st.session_state.get('active_prompt')
+final_query = clicked or user_text
+
+# A clicked suggestion may already be answered; anything else still running is dropped
+speculated = None
+if final_query:
+    if clicked and lake_tables:
+        speculated = speculation.take(clicked)
+    speculation.cancel()
 
 if final_query:
     # Reset active prompt to prevent loops
     st.session_state.active_prompt = None 
     
     # Add user message to history
-    st.session_state.messages.append({"role": "user", "content": final_query})
+    remember({"role": "user", "content": final_query})
     
     # Process Response
-    if active_df is None:
+    if not lake_tables:
         st.warning("Please upload data first!")
     else:
-        data_to_analyze = {"Uploaded_Data": active_df}
-        
-        # Get AI Response
-        with st.spinner("Analyzing..."):
-            code, suggestions, response_text = ask_ai(final_query, data_to_analyze)
-        
+        with st.chat_message("user"):
+            st.write(final_query)
+
+        # Stream the AI Response: text renders token by token and the code
+        # runs as soon as its block closes, while the suggestions still arrive
+        # Traced end to end: prompt building, provider round trip, parsing, execution, rendering
+        # A precomputed follow-up is replayed as is: no LLM call, no code execution
+        with st.chat_message("assistant"), span("chat.turn", mode=query_mode, tables=len(lake_tables),
+                                                speculated=speculated is not None):
+            if speculated is not None:
+                code, suggestions, response_text, artifacts = speculated
+                st.write(response_text)
+                with span("render", artifacts=len(artifacts)):
+                    render_artifacts(artifacts)
+            else:
+                answer_box = st.empty()
+                answer_box.write("Analyzing...")
+                artifacts = None
+                code, suggestions, response_text = None, [], ""
+                for kind, payload in ask_ai_stream(final_query, data_lake, mode=query_mode):
+                    if kind == "answer":
+                        answer_box.write(payload)
+                    elif kind == "notice":
+                        st.warning(payload)
+                    elif kind == "code" and progressive:
+                        _, _, artifacts = execute_progressive(payload, data_lake, sample_lake, sample_sizes)
+                    elif kind == "code":
+                        _, _, artifacts = execute_and_capture(payload, data_lake)
+                    else:
+                        code, suggestions, response_text = payload
+
         # Update suggestions for next turn
         st.session_state.last_suggestions = suggestions
-        
+
         # SAVE AND RENDER IMMEDIATELY
-        # We append to history first, then rerun to trigger the 'Chat Display' section
-        st.session_state.messages.append({
-            "role": "assistant", 
+        # The captured artifacts are replayed by the 'Chat Display' section after the rerun
+        remember({
+            "role": "assistant",
             "content": response_text,
-            "code": code 
+            "code": code,
+            "artifacts": artifacts,
+            "df_fingerprint": code_fingerprint(code, data_lake) if code else None,
+            "suggestions": suggestions
         })
         st.rerun()
\ No newline at end of file
@@ -0,0 +1,71 @@
+import io
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+from src.tracing import span, incr
+
+# Calls whose arguments are worth timing when serialized (figures, tables)
+_HEAVY_CALLS = {"plotly_chart", "dataframe", "table"}
+
+# Streamlit calls we know how to capture and replay without re-running the code
+RECORDED_CALLS = {
+    "write", "markdown", "text", "caption", "code", "header", "subheader", "title",
+    "info", "success", "warning", "error", "metric", "plotly_chart", "dataframe", "table", "json",
+}
+
+
+class NotReplayable(Exception):
+    """Raised when a render call argument cannot be turned into an artifact."""
+
+
+# -------------------------------------------------
+# Utility: (De)serialize render call arguments
+# -------------------------------------------------
+def encode_value(value):
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if hasattr(value, "item") and getattr(value, "ndim", 1) == 0:
+        # numpy scalars
+        return value.item()
+    if isinstance(value, go.Figure):
+        payload = value.to_json()
+        incr("plotly_json_bytes_total", len(payload))
+        return {"__plotly__": payload}
+    if isinstance(value, pd.Series):
+        value = value.to_frame()
+    if isinstance(value, pd.DataFrame):
+        return {"__frame__": value.to_json(orient="split", date_format="iso", default_handler=str)}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(v) for v in value]
+    if isinstance(value, dict):
+        return {"__dict__": {str(k): encode_value(v) for k, v in value.items()}}
+    raise NotReplayable(type(value).__name__)
+
+
+def decode_value(value):
+    if isinstance(value, list):
+        return [decode_value(v) for v in value]
+    if isinstance(value, dict):
+        if "__plotly__" in value:
+            return pio.from_json(value["__plotly__"])
+        if "__frame__" in value:
+            return pd.read_json(io.StringIO(value["__frame__"]), orient="split")
+        if "__dict__" in value:
+            return {k: decode_value(v) for k, v in value["__dict__"].items()}
+    return value
+
+
+def make_artifact(call, args, kwargs):
+    """One captured render call; raises NotReplayable for unsupported arguments."""
+    if call in _HEAVY_CALLS:
+        with span("render.serialize", call=call):
+            return _encode_call(call, args, kwargs)
+    return _encode_call(call, args, kwargs)
+
+
+def _encode_call(call, args, kwargs):
+    return {
+        "call": call,
+        "args": [encode_value(a) for a in args],
+        "kwargs": {k: encode_value(v) for k, v in kwargs.items()},
+    }
@@ -0,0 +1,185 @@
+import warnings
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from src.fingerprint import dataframe_fingerprint
+
+DEFAULT_BINS = 30
+MAX_CATEGORIES = 50
+MAX_CACHED = 16
+# Float block swept per batch of numeric columns; its temporaries are a few times this
+BATCH_BYTES = 32 * 1024 ** 2
+
+# fingerprint -> binning index; shared by every session in the process
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# -------------------------------------------------
+# Index construction
+# -------------------------------------------------
+def _numeric_columns(df):
+    """(column, kind) of the numeric and datetime columns."""
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_numeric_dtype(series):
+            columns.append((col, "numeric"))
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            columns.append((col, "datetime"))
+    return columns
+
+
+def _float_values(series, kind):
+    """A column as float64 (datetimes as ns since epoch), missing values as NaN."""
+    if kind == "numeric":
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+    values = series.to_numpy(dtype="datetime64[ns]").view("int64").astype(np.float64)
+    values[series.isna().to_numpy()] = np.nan
+    return values
+
+
+def _fences(values, q1, q3):
+    """Box whiskers: the most extreme values within 1.5 IQR of the quartiles."""
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return np.nan, np.nan
+    iqr = q3 - q1
+    return values[values >= q1 - 1.5 * iqr].min(), values[values <= q3 + 1.5 * iqr].max()
+
+
+def other_label(labels, hidden):
+    """Label for the bucket of `hidden` remaining values that no real label in `labels` uses."""
+    taken = set(map(str, labels))
+    label = "Other" if "Other" not in taken else f"Other ({hidden:,} more)"
+    while label in taken:
+        label += "*"
+    return label
+
+
+def build_binning_index(df, nbins=DEFAULT_BINS):
+    """
+    Vectorized sweeps over the numeric columns, a batch of columns at a
+    time so the temporaries stay near BATCH_BYTES: fixed-edge histogram
+    counts (one bincount per batch), quartiles and box whiskers.
+    Other columns get capped value counts.
+    """
+    numeric = _numeric_columns(df)
+    index = {"rows": len(df), "nbins": nbins, "columns": {}}
+    batch = max(1, BATCH_BYTES // max(1, 8 * len(df)))
+
+    for first in range(0, len(numeric), batch):
+        part = numeric[first:first + batch]
+        block = np.column_stack([_float_values(df[col], kind) for col, kind in part])
+        # All-null columns produce NaN stats; numpy warns about them, which is expected here
+        with warnings.catch_warnings(), np.errstate(invalid="ignore"):
+            warnings.simplefilter("ignore", RuntimeWarning)
+            lo = np.nanmin(block, axis=0)
+            hi = np.nanmax(block, axis=0)
+            q1, median, q3 = np.nanquantile(block, [0.25, 0.5, 0.75], axis=0)
+            span = np.where(hi > lo, hi - lo, 1.0)
+
+            # Bin ids for the batch at once, offset per column so one bincount covers them
+            present = ~np.isnan(block)
+            nulls = len(df) - present.sum(axis=0)
+            bins = np.clip(np.nan_to_num((block - lo) / span * nbins).astype(np.int64), 0, nbins - 1)
+            bins += np.arange(len(part)) * nbins
+            counts = np.bincount(bins[present], minlength=len(part) * nbins).reshape(len(part), nbins)
+            del bins, present
+
+            for i, (col, kind) in enumerate(part):
+                lower_fence, upper_fence = _fences(block[:, i], q1[i], q3[i])
+                index["columns"][col] = {
+                    "kind": kind,
+                    "edges": np.linspace(lo[i], lo[i] + span[i], nbins + 1),
+                    "counts": counts[i],
+                    "box": {
+                        "q1": q1[i], "median": median[i], "q3": q3[i],
+                        "lowerfence": lower_fence, "upperfence": upper_fence,
+                    },
+                    "nulls": int(nulls[i]),
+                }
+
+    for col in df.columns:
+        if col in index["columns"]:
+            continue
+        counts = df[col].astype("object").value_counts(dropna=True)
+        if len(counts) > MAX_CATEGORIES:
+            other = counts.iloc[MAX_CATEGORIES - 1:].sum()
+            hidden = len(counts) - (MAX_CATEGORIES - 1)
+            counts = counts.iloc[:MAX_CATEGORIES - 1]
+            counts.index = counts.index.astype(str)
+            counts[other_label(counts.index, hidden)] = other
+        index["columns"][col] = {"kind": "categorical", "value_counts": counts}
+    return index
+
+
+def get_binning_index(df, nbins=DEFAULT_BINS):
+    """Binning index for `df`, built once per dataset content and cached process-wide."""
+    key = (dataframe_fingerprint(df), nbins)
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is not None:
+            _cache.move_to_end(key)
+            return index
+    index = build_binning_index(df, nbins)
+    with _cache_lock:
+        _cache[key] = index
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+    return index
+
+
+# -------------------------------------------------
+# Figures drawn from the index (no raw rows are sent)
+# -------------------------------------------------
+def _to_axis(values, kind):
+    if kind == "datetime":
+        return pd.to_datetime(np.asarray(values, dtype=np.float64).astype("int64"))
+    return values
+
+
+def histogram_figure(index, col, marginal_box=True, template=None):
+    """Histogram of `col` (with an optional box marginal) built from the binning index."""
+    entry = index["columns"][col]
+
+    if entry["kind"] == "categorical":
+        counts = entry["value_counts"]
+        fig = go.Figure(go.Bar(x=counts.index.astype(str), y=counts.to_numpy(), name=str(col)))
+        fig.update_layout(xaxis_title=str(col), yaxis_title="count", template=template)
+        return fig
+
+    edges = entry["edges"]
+    if not np.isfinite(edges[0]):
+        # Column is entirely null: nothing to bin
+        fig = go.Figure()
+        fig.update_layout(xaxis_title=str(col), yaxis_title="count", template=template)
+        return fig
+    centers = _to_axis((edges[:-1] + edges[1:]) / 2, entry["kind"])
+    width = (edges[1] - edges[0]) / (1e6 if entry["kind"] == "datetime" else 1)
+    bars = go.Bar(x=centers, y=entry["counts"], width=width, name=str(col), marker={"line": {"width": 0}})
+
+    if not marginal_box:
+        fig = go.Figure(bars)
+    else:
+        box = entry["box"]
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.02)
+        fig.add_trace(go.Box(
+            y=[str(col)], orientation="h", name=str(col), showlegend=False,
+            q1=_to_axis([box["q1"]], entry["kind"]), median=_to_axis([box["median"]], entry["kind"]),
+            q3=_to_axis([box["q3"]], entry["kind"]),
+            lowerfence=_to_axis([box["lowerfence"]], entry["kind"]),
+            upperfence=_to_axis([box["upperfence"]], entry["kind"]),
+        ), row=1, col=1)
+        fig.add_trace(bars, row=2, col=1)
+        fig.update_yaxes(showticklabels=False, row=1, col=1)
+        fig.update_yaxes(title_text="count", row=2, col=1)
+        fig.update_xaxes(title_text=str(col), row=2, col=1)
+
+    fig.update_layout(bargap=0.02, showlegend=False, template=template)
+    return fig
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+CHAT_DB_PATH = os.path.join("data", "chat_history.sqlite")
+# Messages kept in st.session_state; older turns stay on disk and are paged in
+RECENT_WINDOW = 20
+PAGE_SIZE = 20
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS conversations ("
+    "id TEXT PRIMARY KEY, owner TEXT, dataset TEXT, title TEXT, created REAL, updated REAL)",
+    "CREATE TABLE IF NOT EXISTS messages ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, conversation TEXT NOT NULL, role TEXT, content TEXT, "
+    "code TEXT, artifacts TEXT, df_fingerprint TEXT, suggestions TEXT, created REAL)",
+    "CREATE INDEX IF NOT EXISTS messages_by_conversation ON messages (conversation, id)",
+    "CREATE INDEX IF NOT EXISTS conversations_by_owner ON conversations (owner, dataset, updated)",
+)
+
+
+class ChatStore:
+    """
+    SQLite store for conversations: messages, generated code and the
+    captured render artifacts, grouped per conversation and dataset.
+    Conversations belong to an owner key (a user or browser session) and
+    are only listed or resumed for that owner.
+    Replaying a stored conversation needs neither the LLM nor the data.
+
+    Writes are serialized on one lock so threads of this process queue
+    instead of hitting SQLite's busy timeout; reads run unlocked.
+    """
+
+    def __init__(self, path=CHAT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._write() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _write(self):
+        with self._lock, self._connect() as conn:
+            yield conn
+
+    # -------------------------------------------------
+    # Conversations
+    # -------------------------------------------------
+    def start_conversation(self, owner, dataset=None, title=""):
+        conversation_id = uuid.uuid4().hex
+        now = time.time()
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO conversations (id, owner, dataset, title, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                (conversation_id, owner, dataset, title, now, now),
+            )
+        return conversation_id
+
+    def exists(self, conversation_id, owner):
+        """Whether `owner` has a conversation with this id."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT 1 FROM conversations WHERE id = ? AND owner = ?",
+                               (conversation_id, owner)).fetchone()
+        return row is not None
+
+    def conversations(self, owner, dataset=None, limit=20):
+        """An owner's most recently updated conversations (of one dataset if given) with their message counts."""
+        query = ("SELECT c.id, c.dataset, c.title, c.updated, COUNT(m.id) AS messages "
+                 "FROM conversations c LEFT JOIN messages m ON m.conversation = c.id WHERE c.owner = ? ")
+        params = [owner]
+        if dataset is not None:
+            query += "AND c.dataset = ? "
+            params.append(dataset)
+        query += "GROUP BY c.id ORDER BY c.updated DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params)]
+
+    def delete_conversation(self, conversation_id):
+        with self._write() as conn:
+            conn.execute("DELETE FROM messages WHERE conversation = ?", (conversation_id,))
+            conn.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+
+    # -------------------------------------------------
+    # Messages
+    # -------------------------------------------------
+    def append(self, conversation_id, message):
+        """Store a chat message dict; returns it with its row id under 'id'."""
+        now = time.time()
+        with self._write() as conn:
+            cursor = conn.execute(
+                "INSERT INTO messages (conversation, role, content, code, artifacts, df_fingerprint, "
+                "suggestions, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (conversation_id, message["role"], message.get("content"), message.get("code"),
+                 _dump(message.get("artifacts")), message.get("df_fingerprint"),
+                 _dump(message.get("suggestions")), now),
+            )
+            conn.execute("UPDATE conversations SET updated = ? WHERE id = ?", (now, conversation_id))
+            if message["role"] == "user":
+                # The first question names the conversation
+                conn.execute("UPDATE conversations SET title = ? WHERE id = ? AND title = ''",
+                             (str(message.get("content", ""))[:80], conversation_id))
+        return dict(message, id=cursor.lastrowid)
+
+    def update_artifacts(self, message_id, artifacts, df_fingerprint):
+        """Record the output captured when a stored message's code was (re)run."""
+        with self._write() as conn:
+            conn.execute("UPDATE messages SET artifacts = ?, df_fingerprint = ? WHERE id = ?",
+                         (_dump(artifacts), df_fingerprint, message_id))
+
+    def count(self, conversation_id):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM messages WHERE conversation = ?",
+                                (conversation_id,)).fetchone()[0]
+
+    def recent(self, conversation_id, limit=RECENT_WINDOW):
+        """The last `limit` messages, oldest first."""
+        return self.page(conversation_id, before_id=None, limit=limit)
+
+    def page(self, conversation_id, before_id=None, limit=PAGE_SIZE):
+        """Up to `limit` messages older than `before_id` (or the latest ones), oldest first."""
+        query = "SELECT * FROM messages WHERE conversation = ?"
+        params = [conversation_id]
+        if before_id is not None:
+            query += " AND id < ?"
+            params.append(before_id)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [_to_message(row) for row in reversed(rows)]
+
+
+def _dump(value):
+    return None if value is None else json.dumps(value)
+
+
+def _to_message(row):
+    message = {"id": row["id"], "role": row["role"], "content": row["content"]}
+    if row["code"]:
+        message["code"] = row["code"]
+    if row["artifacts"] is not None:
+        message["artifacts"] = json.loads(row["artifacts"])
+    if row["df_fingerprint"]:
+        message["df_fingerprint"] = row["df_fingerprint"]
+    if row["suggestions"] is not None:
+        message["suggestions"] = json.loads(row["suggestions"])
+    return message
+
+
+def trim_window(messages, limit=RECENT_WINDOW):
+    """Drop the oldest in-memory messages beyond the recent window (they stay in the store)."""
+    if len(messages) > limit:
+        del messages[:len(messages) - limit]
+    return messages
+
+
+_store = None
+
+
+def get_chat_store():
+    """Process-wide chat store, created on first use."""
+    global _store
+    if _store is None:
+        _store = ChatStore()
+    return _store
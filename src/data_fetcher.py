@@ -1,55 +1,112 @@
+import io
+import posixpath
+import urllib.parse
 import pandas as pd
-from sklearn import datasets
-import os
+from src import dataset_store
+from src.download_cache import DownloadCache, url_suffix
+from src.ingest import read_csv_streaming, optimize_frame, format_memory_report
 
-def download_from_sklearn(dataset_name="iris"):
-    """Fetch classic datasets from Scikit-Learn."""
+TITANIC_URL = "https://raw.githubusercontent.com/datasciencedojo/datasets/master/titanic.csv"
+
+_download_cache = None
+
+def get_download_cache():
+    """Process-wide download cache, created on first use."""
+    global _download_cache
+    if _download_cache is None:
+        _download_cache = DownloadCache()
+    return _download_cache
+
+def _fetch_openml_frame(name, version):
+    """Fetch an OpenML dataset through the download cache (keyed by dataset id)."""
+    from pyarrow import feather
+
+    def produce():
+        from sklearn.datasets import fetch_openml
+        frame = fetch_openml(name, version=version, as_frame=True).frame
+        buffer = io.BytesIO()
+        feather.write_feather(frame, buffer)
+        return buffer.getvalue()
+
+    path = get_download_cache().fetch_bytes(f"openml:{name}:{version}", produce)
+    return _optimized(feather.read_feather(path))
+
+def dataset_name_for(url):
+    """Store name for a fetched URL: its file name without extensions ('titanic' for .../titanic.csv)."""
+    name = posixpath.basename(urllib.parse.urlparse(url).path)
+    suffix = url_suffix(url)
+    return (name[:-len(suffix)] if suffix else name) or "dataset"
+
+def _optimized(df):
+    """Compact dtypes (downcast numerics, categorical text) and log the memory saved."""
+    df, report = optimize_frame(df)
+    print(format_memory_report(report))
+    return df
+
+def download_from_sklearn(dataset_name="iris", save_as=None):
+    """Fetch classic datasets from Scikit-Learn into the dataset store, under save_as or the dataset name."""
     try:
         if dataset_name == "iris":
+            # sklearn takes a second or more to import; only pay for it when a dataset is fetched
+            from sklearn import datasets
             data = datasets.load_iris()
         elif dataset_name == "titanic":
             # Titanic isn't native to sklearn anymore, usually fetched from OpenML
-            from sklearn.datasets import fetch_openml
-            data = fetch_openml('titanic', version=1, as_frame=True)
-            return data.frame
+            df = _fetch_openml_frame('titanic', 1)
+            save_dataset(df, save_as or dataset_name)
+            return df
         
         # Convert to DataFrame
         df = pd.DataFrame(data.data, columns=data.feature_names)
         if hasattr(data, 'target'):
             df['target'] = data.target
+        df = _optimized(df)
+        save_dataset(df, save_as or dataset_name)
         return df
     except Exception as e:
         print(f"Error fetching from sklearn: {e}")
         return None
 
-def download_from_url(url):
-    """Fetch CSV data from raw GitHub or Web sources."""
+def download_from_url(url, save_as=None, use_cache=True):
+    """Fetch CSV data from raw GitHub or Web sources into the dataset store, under save_as or the file name."""
     try:
-        df = pd.read_csv(url)
+        if use_cache and url.startswith(("http://", "https://")):
+            # Served from the local cache after a conditional revalidation
+            df, report = read_csv_streaming(get_download_cache().fetch(url))
+        else:
+            df, report = read_csv_streaming(url)
+        print(format_memory_report(report))
+        save_dataset(df, save_as or dataset_name_for(url))
         return df
     except Exception as e:
         print(f"Error fetching from URL: {e}")
         return None
 
 def save_dataset(df, filename):
-    """Save the fetched data to the data/ folder."""
+    """Save the fetched data to the columnar dataset store in data/."""
     if df is not None:
-        if not os.path.exists("data"):
-            os.makedirs("data")
-        path = f"data/{filename}.csv"
-        df.to_csv(path, index=False)
+        try:
+            path = dataset_store.save_dataset(df, filename)
+        except Exception as e:
+            print(f"Error saving dataset: {e}")
+            return None
         print(f"✅ Success: Dataset saved to {path}")
         return path
     return None
 
+def load_saved_dataset(name, columns=None):
+    """Reopen a stored dataset (memory-mapped), optionally only some columns."""
+    try:
+        return dataset_store.load_dataset(name, columns=columns)
+    except Exception as e:
+        print(f"Error loading stored dataset: {e}")
+        return None
+
 if __name__ == "__main__":
     print("🚀 DataTalk Downloader Initialized...")
     
     # Example 1: Raw Source (Titanic)
-    titanic_url = "https://raw.githubusercontent.com/datasciencedojo/datasets/master/titanic.csv"
-    df_titanic = download_from_url(titanic_url)
-    save_dataset(df_titanic, "titanic_raw")
+    df_titanic = download_from_url(TITANIC_URL, save_as="titanic_raw")
 
     # Example 2: Sklearn (Iris)
-    df_iris = download_from_sklearn("iris")
-    save_dataset(df_iris, "iris_standard")
\ No newline at end of file
+    df_iris = download_from_sklearn("iris", save_as="iris_standard")
\ No newline at end of file
@@ -0,0 +1,118 @@
+import os
+import re
+import hashlib
+from collections.abc import Mapping
+import pandas as pd
+from src.fingerprint import dataframe_fingerprint
+
+DEFAULT_TABLE = "Uploaded_Data"
+
+
+def table_name(label):
+    """Turn a dataset label ('Titanic (Survival)', 'sales 2024.csv') into a table name."""
+    stem = os.path.splitext(str(label))[0]
+    stem = re.sub(r"\(.*?\)", "", stem)
+    name = re.sub(r"\W+", "_", stem).strip("_").lower()
+    return name or "table"
+
+
+class LazyDataLake(Mapping):
+    """
+    Named tables that are only materialized when first accessed.
+    Sources may be DataFrames, DatasetHandles (anything with `.frame()`)
+    or zero-argument loaders. Iterating or listing names loads nothing;
+    the first table is the default `df` handed to generated code.
+    """
+
+    def __init__(self, tables=None):
+        self._sources = dict(tables or {})
+        self._loaded = {}
+
+    def register(self, name, source):
+        self._sources[name] = source
+        self._loaded.pop(name, None)
+
+    def __getitem__(self, name):
+        if name not in self._loaded:
+            if name not in self._sources:
+                raise KeyError(f"No table named {name!r}. Available tables: {', '.join(self._sources)}")
+            source = self._sources[name]
+            if isinstance(source, pd.DataFrame):
+                frame = source
+            elif hasattr(source, "frame"):
+                frame = source.frame()
+            else:
+                frame = source()
+            self._loaded[name] = frame
+        return self._loaded[name]
+
+    def __iter__(self):
+        return iter(self._sources)
+
+    def __len__(self):
+        return len(self._sources)
+
+    @property
+    def loaded(self):
+        """Names of the tables materialized so far."""
+        return list(self._loaded)
+
+    def columns(self, name):
+        """Column names of a table without loading it (None if unknown until loaded)."""
+        if name in self._loaded:
+            return list(self._loaded[name].columns)
+        source = self._sources[name]
+        if isinstance(source, pd.DataFrame):
+            return list(source.columns)
+        if hasattr(source, "columns"):
+            return source.columns()
+        return None
+
+    def subset(self, names):
+        """A lake over `names` (in that order) that shares already-loaded frames."""
+        lake = LazyDataLake({name: self._sources[name] for name in names})
+        lake._loaded = {name: self._loaded[name] for name in names if name in self._loaded}
+        return lake
+
+    def fingerprint(self, names=None):
+        """Content hash of the lake (or of the tables in `names`); handles contribute their key without loading."""
+        sha = hashlib.sha256()
+        for name, source in self._sources.items():
+            if names is not None and name not in names:
+                continue
+            key = getattr(source, "key", None)
+            if key is None:
+                key = dataframe_fingerprint(self[name])
+            sha.update(f"{name}={key};".encode())
+        return sha.hexdigest()
+
+
+def _known_columns(data_lake, name):
+    if isinstance(data_lake, LazyDataLake):
+        return data_lake.columns(name)
+    value = data_lake[name]
+    return list(value.columns) if isinstance(value, pd.DataFrame) else None
+
+
+def _mentions(lowered, term):
+    return re.search(rf"(?<![a-z0-9_]){re.escape(term)}(?![a-z0-9_])", lowered) is not None
+
+
+def referenced_tables(text, data_lake, by_columns=True):
+    """
+    Tables a question or code snippet refers to, by table name or (with
+    by_columns) by one of its column names. Falls back to the first table.
+    """
+    lowered = str(text).lower()
+    referenced = []
+    for name in data_lake:
+        label = str(name).lower()
+        if _mentions(lowered, label) or _mentions(lowered, label.replace("_", " ")):
+            referenced.append(name)
+            continue
+        columns = (_known_columns(data_lake, name) or []) if by_columns else []
+        if any(_mentions(lowered, str(col).lower()) for col in columns if len(str(col)) >= 3):
+            referenced.append(name)
+    if not referenced and len(data_lake):
+        referenced.append(next(iter(data_lake)))
+    return referenced
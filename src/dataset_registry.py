@@ -0,0 +1,230 @@
+import os
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from src.fingerprint import dataframe_fingerprint
+
+SPILL_DIR = os.path.join("data", ".registry")
+DEFAULT_MAX_BYTES = int(os.getenv("DATATALK_REGISTRY_MAX_BYTES", str(2 * 1024 ** 3)))
+
+
+class DatasetHandle:
+    """
+    What a session keeps instead of a DataFrame: the dataset's content hash
+    and a display name. `frame()` returns the shared, read-only frame
+    (reloaded from disk if it was spilled).
+    """
+
+    __slots__ = ("key", "name", "__weakref__")
+
+    def __init__(self, key, name):
+        self.key = key
+        self.name = name
+
+    def frame(self):
+        return get_registry().get(self.key)
+
+    def columns(self):
+        """Column names, known without loading (or reloading) the frame."""
+        return get_registry().columns(self.key)
+
+    def rows(self):
+        """Row count, known without loading (or reloading) the frame."""
+        return get_registry().rows(self.key)
+
+    def __repr__(self):
+        return f"DatasetHandle({self.name!r}, {self.key[:12]})"
+
+
+class _Entry:
+    __slots__ = ("name", "frame", "rows", "columns", "column_names", "nbytes", "spill_path", "handles")
+
+    def __init__(self, name, frame):
+        self.name = name
+        self.frame = frame
+        self.rows, self.columns = frame.shape
+        self.column_names = list(frame.columns)
+        self.nbytes = int(frame.memory_usage(deep=True).sum())
+        self.spill_path = None
+        self.handles = weakref.WeakSet()
+
+
+class DatasetRegistry:
+    """
+    Process-wide store of DataFrames keyed by content hash, so a dataset
+    loaded by many sessions is held in memory once. Cleaned variants are
+    cached per (dataset, cleaning config). When resident frames exceed
+    `max_bytes`, least recently used frames are spilled to Arrow files and
+    memory-mapped back on the next access; datasets no session refers to
+    any more are dropped first.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, spill_dir=SPILL_DIR):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.spills = 0
+        self.reloads = 0
+        self._entries = OrderedDict()
+        self._variants = {}
+        self._lock = threading.RLock()
+
+    # --- Registration and lookup ---
+    def register(self, df, name=None):
+        """Store `df` (once per content) and return a handle to it."""
+        key = dataframe_fingerprint(df)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Entry(name or key[:12], df)
+                self._entries[key] = entry
+            elif entry.frame is None:
+                # Spilled copy, but the caller has the same content in memory
+                entry.frame = df
+            self._entries.move_to_end(key)
+            handle = DatasetHandle(key, name or entry.name)
+            entry.handles.add(handle)
+            self._enforce_budget(keep=key)
+        return handle
+
+    def get(self, key):
+        """The shared frame for `key`; callers must not modify it in place."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                raise KeyError(f"Dataset {key[:12]} is no longer registered")
+            if entry.frame is None:
+                entry.frame = self._reload(entry)
+            self._entries.move_to_end(key)
+            frame = entry.frame
+            self._enforce_budget(keep=key)
+        return frame
+
+    def columns(self, key):
+        with self._lock:
+            return list(self._entries[key].column_names)
+
+    def rows(self, key):
+        with self._lock:
+            return self._entries[key].rows
+
+    def cleaned(self, handle, clean_fn=None, config=None, name=None):
+        """
+        Handle to `clean_fn(frame, **config)` for the dataset behind `handle`,
+        computed once per (dataset, clean_fn, config) across all sessions.
+        `name` labels the result (default: "<name> (cleaned)").
+        """
+        if clean_fn is None:
+            from src.processor import auto_clean_data
+            clean_fn = auto_clean_data
+        config = config or {}
+        variant = (handle.key, f"{clean_fn.__module__}.{clean_fn.__qualname__}",
+                   json.dumps(config, sort_keys=True, default=str))
+
+        with self._lock:
+            target = self._variants.get(variant)
+            if target in self._entries:
+                return self._new_handle(target)
+
+        result = clean_fn(handle.frame(), **config)
+        cleaned_handle = self.register(result, name=name or f"{handle.name} (cleaned)")
+        with self._lock:
+            self._variants[variant] = cleaned_handle.key
+        return cleaned_handle
+
+    def _new_handle(self, key):
+        entry = self._entries[key]
+        handle = DatasetHandle(key, entry.name)
+        entry.handles.add(handle)
+        return handle
+
+    # --- Memory pressure ---
+    def resident_bytes(self):
+        return sum(e.nbytes for e in self._entries.values() if e.frame is not None)
+
+    def _enforce_budget(self, keep):
+        """Drop unreferenced, then spill referenced frames (LRU first) until under budget."""
+        # Spilled datasets nobody refers to any more can never be reached again
+        for key in [k for k, e in self._entries.items() if e.frame is None and not e.handles]:
+            self._drop(key)
+        if self.resident_bytes() <= self.max_bytes:
+            return
+        for only_unreferenced in (True, False):
+            for key in list(self._entries):
+                if self.resident_bytes() <= self.max_bytes:
+                    return
+                entry = self._entries[key]
+                if key == keep or entry.frame is None:
+                    continue
+                if not entry.handles:
+                    self._drop(key)
+                elif not only_unreferenced:
+                    self._spill(key, entry)
+
+    def _spill(self, key, entry):
+        from pyarrow import feather
+
+        if entry.spill_path is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, f"{key}.arrow")
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            try:
+                feather.write_feather(entry.frame, tmp_path, compression="uncompressed")
+            except Exception as e:
+                # Not representable in Arrow (e.g. mixed object columns): keep it in memory
+                print(f"Could not spill dataset {entry.name}: {e}")
+                return
+            os.replace(tmp_path, path)
+            entry.spill_path = path
+        entry.frame = None
+        self.spills += 1
+
+    def _reload(self, entry):
+        from pyarrow import feather
+
+        self.reloads += 1
+        return feather.read_table(entry.spill_path, memory_map=True).to_pandas(split_blocks=True)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        if entry.spill_path and os.path.exists(entry.spill_path):
+            os.remove(entry.spill_path)
+        self._variants = {v: k for v, k in self._variants.items() if k != key and v[0] != key}
+
+    # --- Reporting ---
+    def stats(self):
+        """One row per registered dataset with its memory footprint and state."""
+        with self._lock:
+            return [
+                {
+                    "name": e.name,
+                    "key": key[:12],
+                    "rows": e.rows,
+                    "columns": e.columns,
+                    "memory_mb": round(e.nbytes / 1024 ** 2, 2),
+                    "state": "in memory" if e.frame is not None else "on disk",
+                    "handles": len(e.handles),
+                }
+                for key, e in self._entries.items()
+            ]
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Process-wide registry shared by every Streamlit session."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = DatasetRegistry()
+    return _registry
+
+
+def register_dataset(df, name=None):
+    return get_registry().register(df, name)
+
+
+def clean_dataset(handle, clean_fn=None, config=None):
+    return get_registry().cleaned(handle, clean_fn, config)
@@ -0,0 +1,162 @@
+import os
+import re
+import json
+import time
+import tempfile
+import threading
+import contextlib
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+STORE_DIR = "data"
+MANIFEST_NAME = "manifest.json"
+
+_lock = threading.Lock()
+
+
+# -------------------------------------------------
+# Utility: Manifest helpers
+# -------------------------------------------------
+def _safe_name(name):
+    return re.sub(r"[^\w.-]", "_", str(name)).strip("._") or "dataset"
+
+
+def _manifest_path(store_dir):
+    return os.path.join(store_dir, MANIFEST_NAME)
+
+
+def read_manifest(store_dir=STORE_DIR):
+    """Return the manifest dict ({name: entry}); empty if the store is new."""
+    path = _manifest_path(store_dir)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+@contextlib.contextmanager
+def _manifest_lock(store_dir):
+    """
+    Serialize manifest updates across threads and, through a lock file,
+    across processes sharing the store (several app instances, CLI imports).
+    """
+    with _lock, open(_manifest_path(store_dir) + ".lock", "a") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _write_manifest(manifest, store_dir):
+    # Write to a temp file first so a crash never leaves a half-written manifest
+    fd, tmp_path = tempfile.mkstemp(dir=store_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, indent=2)
+        os.replace(tmp_path, _manifest_path(store_dir))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _to_jsonable(value):
+    if value is None or pd.isna(value):
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def column_stats(df):
+    """Per-column min/max/null counts, computed in batched passes."""
+    null_counts = df.isna().sum()
+    comparable = df.select_dtypes(include=["number", "datetime", "bool"])
+    mins = comparable.min() if not comparable.empty else pd.Series(dtype=object)
+    maxs = comparable.max() if not comparable.empty else pd.Series(dtype=object)
+
+    stats = {}
+    for col in df.columns:
+        stats[str(col)] = {
+            "dtype": str(df[col].dtype),
+            "null_count": int(null_counts[col]),
+            "min": _to_jsonable(mins.get(col)),
+            "max": _to_jsonable(maxs.get(col)),
+        }
+    return stats
+
+
+# -------------------------------------------------
+# Store API
+# -------------------------------------------------
+def save_dataset(df, name, store_dir=STORE_DIR):
+    """
+    Persist a DataFrame as an uncompressed Arrow (Feather v2) file and record
+    its schema and column statistics in the manifest. Returns the file path.
+    """
+    from pyarrow import feather
+
+    os.makedirs(store_dir, exist_ok=True)
+    key = _safe_name(name)
+    path = os.path.join(store_dir, f"{key}.arrow")
+
+    # Uncompressed so reloads can be memory-mapped without decoding; written
+    # aside and renamed so a concurrent reader never maps a half-written file
+    fd, tmp_path = tempfile.mkstemp(dir=store_dir, suffix=".arrow.part")
+    os.close(fd)
+    try:
+        feather.write_feather(df, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    entry = {
+        "path": path,
+        "rows": int(len(df)),
+        "columns": [str(c) for c in df.columns],
+        "stats": column_stats(df),
+        "saved_at": time.time(),
+    }
+    with _manifest_lock(store_dir):
+        manifest = read_manifest(store_dir)
+        manifest[key] = entry
+        _write_manifest(manifest, store_dir)
+    return path
+
+
+def load_dataset(name, columns=None, store_dir=STORE_DIR, memory_map=True):
+    """
+    Load a stored dataset, optionally only the requested columns.
+    The file is memory-mapped, so untouched columns are never read from disk.
+    """
+    from pyarrow import feather
+
+    entry = read_manifest(store_dir).get(_safe_name(name))
+    if entry is None:
+        raise KeyError(f"Dataset '{name}' is not in the store.")
+
+    table = feather.read_table(entry["path"], columns=columns, memory_map=memory_map)
+    # split_blocks avoids consolidating columns into one big copied block
+    return table.to_pandas(split_blocks=True)
+
+
+def list_datasets(store_dir=STORE_DIR):
+    """Names of stored datasets, most recently saved first."""
+    manifest = read_manifest(store_dir)
+    return sorted(manifest, key=lambda k: manifest[k].get("saved_at", 0), reverse=True)
+
+
+def dataset_info(name, store_dir=STORE_DIR):
+    """Manifest entry (rows, columns, per-column stats) without touching the data."""
+    return read_manifest(store_dir).get(_safe_name(name))
@@ -0,0 +1,203 @@
+import os
+import io
+import re
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import posixpath
+import urllib.error
+import urllib.parse
+import urllib.request
+
+CACHE_DIR = os.path.join("data", ".download_cache")
+INDEX_NAME = "index.json"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_TIMEOUT = 15
+
+_lock = threading.Lock()
+_EXTENSION = re.compile(r"[A-Za-z0-9]{1,8}")
+
+
+def url_suffix(url):
+    """Last one or two file extensions of a URL's path ('.csv.gz', '.zip'), or ''."""
+    name = posixpath.basename(urllib.parse.urlparse(url).path)
+    suffix = ""
+    for part in reversed(name.split(".")[1:][-2:]):
+        if not _EXTENSION.fullmatch(part):
+            break
+        suffix = f".{part}{suffix}"
+    return suffix
+
+
+class DownloadCache:
+    """
+    Content-addressed cache for remote datasets.
+
+    Entries are keyed by URL (or a dataset id such as 'openml:titanic:1') and
+    point at blobs named by the SHA-256 of their content (plus the URL's file
+    extension, so readers can still infer compression), so identical files
+    are stored once. HTTP entries keep their ETag/Last-Modified and are
+    revalidated with a conditional GET; if the network is down the cached
+    copy is served. The total blob size is bounded with LRU eviction.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, timeout=DEFAULT_TIMEOUT):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, "blobs")
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+    # -------------------------------------------------
+    # Index helpers
+    # -------------------------------------------------
+    def _index_path(self):
+        return os.path.join(self.cache_dir, INDEX_NAME)
+
+    def _read_index(self):
+        path = self._index_path()
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            # A corrupt index only costs us a re-download
+            return {}
+
+    def _write_index(self, index):
+        tmp_path = self._index_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(index, fh, indent=2)
+        os.replace(tmp_path, self._index_path())
+
+    def _blob_path(self, blob):
+        return os.path.join(self.blob_dir, blob)
+
+    @staticmethod
+    def _blob(entry):
+        # Entries written before blobs kept an extension are named by digest alone
+        return entry.get("blob", entry["sha256"])
+
+    def _store_stream(self, stream, suffix=""):
+        """Copy a byte stream into the blob dir, hashing as we go. Returns (blob name, digest, size)."""
+        sha = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.blob_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for block in iter(lambda: stream.read(1 << 20), b""):
+                    sha.update(block)
+                    out.write(block)
+                    size += len(block)
+            digest = sha.hexdigest()
+            blob = digest + suffix
+            os.replace(tmp_path, self._blob_path(blob))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return blob, digest, size
+
+    def _evict(self, index, keep=None):
+        """Drop least-recently-used entries (except `keep`) until blobs fit in max_bytes."""
+        sizes = {}
+        for entry in index.values():
+            sizes[self._blob(entry)] = entry["size"]
+        total = sum(sizes.values())
+        for key in sorted(index, key=lambda k: index[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            blob = self._blob(index.pop(key))
+            if all(self._blob(e) != blob for e in index.values()):
+                total -= sizes[blob]
+                if os.path.exists(self._blob_path(blob)):
+                    os.remove(self._blob_path(blob))
+
+    def _record(self, key, blob, digest, size, **meta):
+        with _lock:
+            index = self._read_index()
+            old = index.get(key)
+            index[key] = {"sha256": digest, "blob": blob, "size": size, "last_access": time.time(), **meta}
+            if old and self._blob(old) != blob and all(self._blob(e) != self._blob(old) for e in index.values()):
+                if os.path.exists(self._blob_path(self._blob(old))):
+                    os.remove(self._blob_path(self._blob(old)))
+            self._evict(index, keep=key)
+            self._write_index(index)
+
+    def _touch(self, key):
+        with _lock:
+            index = self._read_index()
+            if key in index:
+                index[key]["last_access"] = time.time()
+                self._write_index(index)
+
+    def _cached_path(self, key):
+        entry = self._read_index().get(key)
+        if entry and os.path.exists(self._blob_path(self._blob(entry))):
+            return entry, self._blob_path(self._blob(entry))
+        return None, None
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+    def fetch(self, url):
+        """
+        Return a local path holding the content of `url`.
+        Revalidates a cached copy with If-None-Match/If-Modified-Since and
+        falls back to it when the source is unreachable.
+        """
+        entry, cached_path = self._cached_path(url)
+
+        request = urllib.request.Request(url)
+        if entry:
+            if entry.get("etag"):
+                request.add_header("If-None-Match", entry["etag"])
+            if entry.get("last_modified"):
+                request.add_header("If-Modified-Since", entry["last_modified"])
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                blob, digest, size = self._store_stream(response, suffix=url_suffix(url))
+                self._record(
+                    url, blob, digest, size,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
+                return self._blob_path(blob)
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and cached_path:
+                self._touch(url)
+                return cached_path
+            if cached_path and e.code >= 500:
+                return cached_path
+            raise
+        except (urllib.error.URLError, OSError):
+            # Offline or timed out: serve the last good copy if we have one
+            if cached_path:
+                self._touch(url)
+                return cached_path
+            raise
+
+    def fetch_bytes(self, key, producer):
+        """
+        Return a local path for an immutable dataset id (e.g. 'openml:titanic:1').
+        `producer()` is only called on a miss and must return bytes.
+        """
+        _, cached_path = self._cached_path(key)
+        if cached_path:
+            self._touch(key)
+            return cached_path
+        blob, digest, size = self._store_stream(io.BytesIO(producer()))
+        self._record(key, blob, digest, size)
+        return self._blob_path(blob)
+
+    def stats(self):
+        """Number of entries and bytes currently held."""
+        index = self._read_index()
+        blobs = {self._blob(e): e["size"] for e in index.values()}
+        return {"entries": len(index), "bytes": sum(blobs.values())}
@@ -0,0 +1,194 @@
+import warnings
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from src.fingerprint import dataframe_fingerprint
+
+MAX_CACHED = 16
+# Above this many rows the Dashboard offers a sampled correlation
+APPROX_ROW_THRESHOLD = 1_000_000
+DEFAULT_SAMPLE_ROWS = 100_000
+
+# fingerprint -> stats dict; shared by every session in the process
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# -------------------------------------------------
+# Utility: Mergeable moments (so appended rows can be folded in)
+# -------------------------------------------------
+def _moments(values):
+    """
+    Pairwise-complete centered moments of a 2-D float block. Entry [i, j] is
+    over the rows where both columns i and j are present:
+    n (count), mean (of column i), m2 (sum of squared deviations of column i)
+    and c (co-moment of i and j). Sums are taken after shifting every column
+    by its mean, so large offsets don't cancel away the variance.
+    """
+    present = ~np.isnan(values)
+    m = present.astype(np.float64)
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns
+        reference = np.nan_to_num(np.nanmean(values, axis=0))
+    y = np.where(present, values - reference, 0.0)
+    n = m.T @ m
+    s1 = y.T @ m                    # sum of shifted x_i over rows where j is present
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shift = np.where(n > 0, s1 / n, 0.0)
+    return {
+        "n": n,
+        "mean": reference[:, None] + shift,
+        "m2": (y * y).T @ m - s1 * shift,
+        "c": y.T @ y - s1 * shift.T,
+        "min": np.nanmin(np.where(present, values, np.inf), axis=0),
+        "max": np.nanmax(np.where(present, values, -np.inf), axis=0),
+    }
+
+
+def _merge_moments(a, b):
+    """Combine the moments of two row batches (Chan et al. parallel update)."""
+    n = a["n"] + b["n"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = np.where(n > 0, a["n"] * b["n"] / n, 0.0)
+        share = np.where(n > 0, b["n"] / n, 0.0)
+    delta = np.where(b["n"] > 0, b["mean"] - a["mean"], 0.0)
+    delta = np.where(a["n"] > 0, delta, 0.0)
+    mean = np.where(a["n"] > 0, a["mean"] + delta * share, b["mean"])
+    return {
+        "n": n,
+        "mean": mean,
+        "m2": a["m2"] + b["m2"] + delta * delta * weight,
+        "c": a["c"] + b["c"] + delta * delta.T * weight,
+        "min": np.minimum(a["min"], b["min"]),
+        "max": np.maximum(a["max"], b["max"]),
+    }
+
+
+def _corr_from_moments(mo, columns):
+    n = mo["n"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = mo["c"] / np.sqrt(mo["m2"] * mo["m2"].T)
+    corr[n < 2] = np.nan
+    np.fill_diagonal(corr, np.where(np.diag(n) >= 2, 1.0, np.nan))
+    return pd.DataFrame(np.clip(corr, -1.0, 1.0), index=columns, columns=columns)
+
+
+def _describe_from_moments(mo, numeric):
+    count = np.diag(mo["n"])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count > 0, np.diag(mo["mean"]), np.nan)
+        var = np.where(count > 1, np.diag(mo["m2"]) / (count - 1), np.nan)
+    quartiles = numeric.quantile([0.25, 0.5, 0.75])
+    lowest = np.where(np.isfinite(mo["min"]), mo["min"], np.nan)
+    highest = np.where(np.isfinite(mo["max"]), mo["max"], np.nan)
+    described = pd.DataFrame(
+        [count, mean, np.sqrt(np.clip(var, 0, None)), lowest,
+         quartiles.iloc[0].to_numpy(), quartiles.iloc[1].to_numpy(), quartiles.iloc[2].to_numpy(), highest],
+        index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"],
+        columns=numeric.columns,
+    )
+    return described
+
+
+def _numeric_block(df):
+    numeric = df.select_dtypes(include=["number"])
+    return numeric, numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+# -------------------------------------------------
+# Public API
+# -------------------------------------------------
+def sampled_correlation(df, sample_rows=DEFAULT_SAMPLE_ROWS, seed=0):
+    """
+    Pearson correlation on a uniform row sample, with a 95% error bound per
+    cell from the normal approximation: 1.96 * (1 - r^2) / sqrt(m - 1).
+    """
+    numeric = df.select_dtypes(include=["number"])
+    sample = numeric.sample(n=min(sample_rows, len(numeric)), random_state=seed)
+    corr = sample.corr()
+    m = sample.notna().astype(np.float64)
+    pair_counts = pd.DataFrame(m.T.to_numpy() @ m.to_numpy(), index=corr.index, columns=corr.columns)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        error = 1.96 * (1 - corr ** 2) / np.sqrt(pair_counts - 1)
+    return corr, error
+
+
+def _find_prefix_entry(df):
+    """A cached entry whose frame is exactly the first rows of `df` (rows were only appended)."""
+    with _cache_lock:
+        candidates = list(reversed(_cache.items()))
+    for fingerprint, entry in candidates:
+        if (entry["columns"] == list(df.columns) and entry["dtypes"] == list(map(str, df.dtypes))
+                and 0 < entry["rows"] < len(df) and entry.get("moments") is not None):
+            if dataframe_fingerprint(df.iloc[:entry["rows"]]) == fingerprint:
+                return entry
+    return None
+
+
+def _store(fingerprint, entry):
+    with _cache_lock:
+        _cache[fingerprint] = entry
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+
+
+def get_eda_stats(df, with_corr=True):
+    """
+    Descriptive stats, null counts and the correlation matrix for `df`.
+    Cached by content fingerprint; when `df` only extends a cached frame with
+    new rows, the moments are updated from the new rows instead of recomputed.
+    With with_corr=False the O(n*k^2) correlation pass is skipped (corr is None).
+    Returned dict keys: describe, null_counts, corr, rows, incremental.
+    """
+    fingerprint = dataframe_fingerprint(df)
+    with _cache_lock:
+        entry = _cache.get(fingerprint)
+        if entry is not None:
+            _cache.move_to_end(fingerprint)
+    if entry is not None:
+        if with_corr and entry["corr"] is None and entry["has_numeric"]:
+            numeric, values = _numeric_block(df)
+            moments = _moments(values)
+            corr = _corr_from_moments(moments, numeric.columns)
+            with _cache_lock:
+                entry["moments"], entry["corr"] = moments, corr
+        return entry
+
+    numeric, values = _numeric_block(df)
+    previous = _find_prefix_entry(df) if not numeric.empty else None
+
+    if previous is not None:
+        appended = values[previous["rows"]:]
+        moments = _merge_moments(previous["moments"], _moments(appended))
+        null_counts = previous["null_counts"] + df.iloc[previous["rows"]:].isnull().sum()
+        describe = _describe_from_moments(moments, numeric)
+        incremental = True
+    else:
+        moments = _moments(values) if with_corr and not numeric.empty else None
+        null_counts = df.isnull().sum()
+        describe = df.describe()
+        incremental = False
+
+    entry = {
+        "rows": len(df),
+        "columns": list(df.columns),
+        "dtypes": list(map(str, df.dtypes)),
+        "has_numeric": not numeric.empty,
+        "moments": moments,
+        "describe": describe,
+        "null_counts": null_counts,
+        "corr": _corr_from_moments(moments, numeric.columns) if moments is not None else None,
+        "sampled_corr": {},
+        "incremental": incremental,
+    }
+    _store(fingerprint, entry)
+    return entry
+
+
+def get_sampled_correlation(df, sample_rows=DEFAULT_SAMPLE_ROWS):
+    """Cached sampled_correlation for `df`; returns (corr, error_bound)."""
+    entry = get_eda_stats(df, with_corr=False)
+    if sample_rows not in entry["sampled_corr"]:
+        entry["sampled_corr"][sample_rows] = sampled_correlation(df, sample_rows)
+    return entry["sampled_corr"][sample_rows]
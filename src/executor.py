@@ -1,18 +1,223 @@
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import plotly.express as px
 import streamlit as st
+from src.artifacts import RECORDED_CALLS, NotReplayable, make_artifact, decode_value
+from src.sandbox import sandbox_enabled, run_sandboxed, run_replicated
+from src.sampling import REPLICATES, annotate_preview
+from src.data_lake import LazyDataLake, referenced_tables
+from src.sql_engine import make_sql_runner
+from src.tracing import span
+
+# Full-data runs of progressive answers, kept so a rerun can pick up one still in flight
+MAX_REFINEMENTS = 16
+
+
+class _RecordingStreamlit:
+    """
+    Stand-in for `st` inside generated code. Known render calls are drawn as
+    usual and also captured as JSON-serializable artifacts; anything else is
+    passed through and marks the output as not replayable.
+    """
+
+    def __init__(self, target=st):
+        self._target = target
+        self.artifacts = []
+        self.replayable = True
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+        if name not in RECORDED_CALLS:
+            self.replayable = False
+            return attr
+
+        def recorder(*args, **kwargs):
+            if self.replayable:
+                try:
+                    self.artifacts.append(make_artifact(name, args, kwargs))
+                except NotReplayable:
+                    self.replayable = False
+            return attr(*args, **kwargs)
+
+        return recorder
+
+
+# -------------------------------------------------
+# Execution
+# -------------------------------------------------
+def _own_view(value):
+    return value.copy(deep=False) if isinstance(value, pd.DataFrame) else value
+
+
+def execute_and_capture(code, data_lake, sandbox=None):
+    """
+    Executes code, renders it to the UI and captures what was drawn.
+    Returns (success, error, artifacts); artifacts is None if the output
+    used calls that cannot be replayed.
+
+    By default the code runs in the sandboxed worker pool (src/sandbox.py)
+    so a runaway snippet cannot freeze or exhaust the Streamlit server.
+    """
+    if sandbox is None:
+        sandbox = sandbox_enabled()
+    # Only the tables the code names (or the default one) are materialized
+    needed = referenced_tables(code, data_lake, by_columns=False) if data_lake else []
+    if sandbox and needed and all(isinstance(data_lake[name], pd.DataFrame) for name in needed):
+        with span("execute", sandbox=True, tables=len(needed)) as attrs:
+            success, error, artifacts = run_sandboxed(code, {name: data_lake[name] for name in needed})
+            attrs["success"] = success
+        if artifacts is None:
+            # Timed out or crashed: remember the error so reruns don't retry it
+            artifacts = [make_artifact("error", [error], {})]
+        with span("render", artifacts=len(artifacts)):
+            render_artifacts(artifacts)
+        return success, error, artifacts
+
+    recorder = _RecordingStreamlit()
+    # Frames come from the shared dataset registry: give the code its own
+    # shallow views so adding or dropping columns can't leak into other sessions.
+    # Tables stay lazy, so the code only loads the ones it actually reads.
+    data_lake = data_lake or {}
+    lake = LazyDataLake({name: (lambda n=name: _own_view(data_lake[n])) for name in data_lake})
+    with span("execute", sandbox=False, tables=len(needed)) as attrs:
+        try:
+            # Pass st and px so the code can actually draw things
+            context = {
+                "pd": pd, "px": px, "st": recorder,
+                "data_lake": lake,
+                "df": lake[needed[0]] if needed else None,
+                "sql": make_sql_runner(lake, recorder)
+            }
+            # Run the AI's code (which includes st.write/st.plotly_chart)
+            exec(code, context)
+            success, error = True, None
+        except Exception as e:
+            success, error = False, str(e)
+        attrs["success"] = success
+    return success, error, (recorder.artifacts if recorder.replayable else None)
+
 
 def execute_llm_code(code, data_lake):
     """Executes code and renders to the UI. Returns nothing so we don't see 'nonsense'."""
-    try:
-        # Pass st and px so the code can actually draw things
-        context = {
-            "pd": pd, "px": px, "st": st, 
-            "data_lake": data_lake,
-            "df": list(data_lake.values())[0] if data_lake else None
-        }
-        # Run the AI's code (which includes st.write/st.plotly_chart)
-        exec(code, context)
-        return True, None
-    except Exception as e:
-        return False, str(e)
\ No newline at end of file
+    success, error, _ = execute_and_capture(code, data_lake)
+    return success, error
+
+
+def render_artifacts(artifacts):
+    """Replay artifacts captured by execute_and_capture without running any code."""
+    for artifact in artifacts:
+        render = getattr(st, artifact["call"])
+        args = [decode_value(a) for a in artifact["args"]]
+        kwargs = {k: decode_value(v) for k, v in artifact["kwargs"].items()}
+        render(*args, **kwargs)
+
+
+# -------------------------------------------------
+# Progressive execution: sample preview first, full data in the background
+# -------------------------------------------------
+_refiner = None
+_refinements = OrderedDict()
+_refine_lock = threading.Lock()
+
+
+def _get_refiner():
+    global _refiner
+    with _refine_lock:
+        if _refiner is None:
+            _refiner = ThreadPoolExecutor(max_workers=2, thread_name_prefix="datatalk-refine")
+    return _refiner
+
+
+def _capture(code, data_lake, sandbox, replicates=0, background=False):
+    """
+    Run `code` without drawing anything, plus `replicates` half-sample re-runs.
+    Returns (success, error, artifacts, replicas).
+    """
+    needed = referenced_tables(code, data_lake, by_columns=False) if data_lake else []
+    if sandbox and needed and all(isinstance(data_lake[name], pd.DataFrame) for name in needed):
+        success, error, artifacts, replicas = run_sandboxed(
+            code, {name: data_lake[name] for name in needed}, replicates=replicates, background=background
+        )
+        if artifacts is None:
+            artifacts = [make_artifact("error", [error], {})]
+        return success, error, artifacts, replicas
+    # Same table order as execute_and_capture: `df` is the first table the code names
+    names = needed + [name for name in (data_lake or {}) if name not in needed]
+    lake = LazyDataLake({name: (lambda n=name: _own_view(data_lake[n])) for name in names})
+    return run_replicated(code, lake, replicates)
+
+
+def code_fingerprint(code, data_lake):
+    """
+    Content hash of the tables `code` runs against (the ones it names, or
+    the default one), so its captured output only goes stale when those change.
+    """
+    if not data_lake or not hasattr(data_lake, "fingerprint"):
+        return None
+    return data_lake.fingerprint(referenced_tables(code, data_lake, by_columns=False))
+
+
+def execute_silently(code, data_lake, sandbox=None, background=False):
+    """
+    Like execute_and_capture but draws nothing; for runs whose output is
+    replayed later. `background` runs yield sandbox workers to foreground ones.
+    """
+    if sandbox is None:
+        sandbox = sandbox_enabled()
+    return _capture(code, data_lake, sandbox, background=background)[:3]
+
+
+def _refine(code, data_lake, sandbox):
+    """Future of the full-data run, shared by reruns asking for the same code and data."""
+    fingerprint = code_fingerprint(code, data_lake)
+    key = (fingerprint, code) if fingerprint else None
+    with _refine_lock:
+        future = _refinements.get(key) if key else None
+        if future is not None and not (future.done() and future.exception()):
+            _refinements.move_to_end(key)
+            return future
+    # Carry the current trace into the worker thread so its spans land in this turn
+    context = contextvars.copy_context()
+    future = _get_refiner().submit(context.run, lambda: _capture(code, data_lake, sandbox)[:3])
+    if key:
+        with _refine_lock:
+            _refinements[key] = future
+            while len(_refinements) > MAX_REFINEMENTS:
+                _refinements.popitem(last=False)
+    return future
+
+
+def execute_progressive(code, data_lake, sample_lake, sizes, sandbox=None):
+    """
+    For tables listed in `sizes` ({name: (sample_rows, full_rows)}): start
+    the full-data run in the background, show a preview computed on
+    `sample_lake` right away (metrics as full-data estimates with 95%
+    confidence intervals), then replace it with the full result.
+    Returns (success, error, artifacts) of the full run, like execute_and_capture.
+    """
+    needed = referenced_tables(code, data_lake, by_columns=False) if data_lake else []
+    if not needed or needed[0] not in sizes:
+        return execute_and_capture(code, data_lake, sandbox)
+    if sandbox is None:
+        sandbox = sandbox_enabled()
+
+    refinement = _refine(code, data_lake, sandbox)
+    placeholder = st.empty()
+    if not refinement.done():
+        with span("execute.preview", rows=sizes[needed[0]][0]):
+            ok, _, preview, replicas = _capture(code, sample_lake, sandbox, replicates=REPLICATES)
+        if ok and not refinement.done():
+            with placeholder.container():
+                render_artifacts(annotate_preview(preview, replicas, *sizes[needed[0]]))
+
+    with span("execute", sandbox=sandbox, progressive=True) as attrs:
+        success, error, artifacts = refinement.result()
+        attrs["success"] = success
+    with placeholder.container(), span("render", artifacts=len(artifacts)):
+        render_artifacts(artifacts)
+    return success, error, artifacts
@@ -0,0 +1,56 @@
+import hashlib
+import weakref
+import pandas as pd
+
+# id(df) -> (weakref to df, stamp, fingerprint); lets reruns reuse a hash without rescanning
+_memo = {}
+# Edits are only detectable when writes copy shared arrays (always on from pandas 3)
+_COPY_ON_WRITE = int(pd.__version__.split(".")[0]) >= 3 or pd.options.mode.copy_on_write is True
+
+
+def _stamp(df):
+    """
+    What a cached fingerprint is checked against: the frame's index, columns
+    and column arrays, plus a shallow copy of it. The copy shares the arrays,
+    so under copy-on-write an in-place edit of the frame copies the array it
+    writes to first, and the array identities no longer match.
+    """
+    return df.index, df.columns, [block.values for block in df._mgr.blocks], df.copy(deep=False)
+
+
+def _unchanged(df, stamp):
+    index, columns, arrays, _ = stamp
+    current = [block.values for block in df._mgr.blocks]
+    return (df.index is index and df.columns is columns and len(current) == len(arrays)
+            and all(a is b for a, b in zip(current, arrays)))
+
+
+def _hash(df):
+    sha = hashlib.sha256()
+    sha.update(repr([(str(c), str(t)) for c, t in zip(df.columns, df.dtypes)]).encode())
+    try:
+        row_hashes = pd.util.hash_pandas_object(df, index=True)
+    except TypeError:
+        # Unhashable cells (lists, dicts): hash their text form instead
+        row_hashes = pd.util.hash_pandas_object(df.astype(str), index=True)
+    sha.update(row_hashes.to_numpy().tobytes())
+    return sha.hexdigest()
+
+
+def dataframe_fingerprint(df):
+    """
+    Content hash of a DataFrame (values, index, column names and dtypes).
+    Computed with a vectorized row hash and reused until the frame is edited.
+    """
+    if df is None:
+        return None
+    key = id(df)
+    cached = _memo.get(key)
+    if cached is not None and cached[0]() is df and _unchanged(df, cached[1]):
+        return cached[2]
+
+    fingerprint = _hash(df)
+    if not _COPY_ON_WRITE:
+        return fingerprint
+    _memo[key] = (weakref.ref(df, lambda _: _memo.pop(key, None)), _stamp(df), fingerprint)
+    return fingerprint
@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+from src.processor import clean_chunk
+from src.tracing import span, incr
+
+# Rows parsed per chunk. Keeps peak memory bounded to roughly one raw chunk
+# plus the compact frame assembled so far.
+DEFAULT_CHUNKSIZE = 200_000
+
+# Text columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+# Integers are never narrowed below this: generated code does arithmetic on the
+# columns, and int8/int16 products silently wrap around (age * 12 > 127)
+MIN_INT_DTYPE = np.int32
+
+# Cleaning that needs no statistics of the whole file, applied to every chunk as it is parsed.
+# Cell values are left as uploaded; trimming (strip_whitespace) is a cleaning choice, not an ingest one.
+INGEST_PIPELINE = [{"stage": "drop_empty_rows"}]
+
+
+def downcast_chunk(chunk):
+    """
+    Shrink 64-bit integer columns to int32 when every value fits.
+    Floats stay float64 so sums and means accumulate at full precision.
+    """
+    limits = np.iinfo(MIN_INT_DTYPE)
+    for col in chunk.columns:
+        series = chunk[col]
+        if series.dtype.kind in "iu" and series.dtype.itemsize > limits.bits // 8:
+            if not len(series) or (series.min() >= limits.min and series.max() <= limits.max):
+                chunk[col] = series.astype(MIN_INT_DTYPE)
+    return chunk
+
+
+def _is_text(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+
+def category_candidates(df, max_ratio=CATEGORY_MAX_RATIO):
+    """Text columns whose distinct values are at most `max_ratio` of the rows."""
+    if not len(df):
+        return []
+    text_cols = [col for col in df.columns if _is_text(df[col])]
+    if not text_cols:
+        return []
+    distinct = df[text_cols].nunique()
+    return [col for col in text_cols if distinct[col] <= max_ratio * len(df)]
+
+
+def to_categories(df, columns):
+    for col in columns:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def optimize_dtypes(df, category_columns=None, max_ratio=CATEGORY_MAX_RATIO):
+    """
+    Downcast numerics and turn low-cardinality text into categoricals.
+    `category_columns` fixes the categorical set (e.g. decided on the first
+    chunk) instead of deciding from `df`.
+    """
+    if category_columns is None:
+        category_columns = category_candidates(df, max_ratio)
+    return to_categories(downcast_chunk(df), category_columns)
+
+
+def memory_report(before_bytes, df, before_dtypes=None):
+    """Before/after memory of an optimized frame and the dtype changes made."""
+    after_bytes = int(df.memory_usage(deep=True).sum())
+    report = {
+        "before_mb": round(before_bytes / 1024 ** 2, 2),
+        "after_mb": round(after_bytes / 1024 ** 2, 2),
+        "saved_pct": round(100 * (1 - after_bytes / before_bytes), 1) if before_bytes else 0.0,
+        "changes": {},
+    }
+    for col, dtype in (before_dtypes or {}).items():
+        if col in df.columns and str(df[col].dtype) != dtype:
+            report["changes"][str(col)] = f"{dtype} -> {df[col].dtype}"
+    return report
+
+
+def iter_csv_chunks(source, chunksize=DEFAULT_CHUNKSIZE, stats=None, clean=None, **read_kwargs):
+    """
+    Yield compact chunks of a CSV file, path or buffer. The categorical
+    columns are chosen on the first chunk so every chunk agrees.
+    Pass a dict as `stats` to collect the raw bytes and dtypes seen and the
+    columns parsed as text in one chunk and as values in another ("mixed"),
+    and chunk-wise cleaning stages as `clean` (see processor.clean_chunk).
+    """
+    category_columns = None
+    text_columns, value_columns = set(), set()
+    with pd.read_csv(source, chunksize=chunksize, **read_kwargs) as reader:
+        for chunk in reader:
+            if stats is not None:
+                stats["before_bytes"] = stats.get("before_bytes", 0) + int(chunk.memory_usage(deep=True).sum())
+                stats.setdefault("dtypes", {c: str(t) for c, t in chunk.dtypes.items()})
+            for col in chunk.columns:
+                if _is_text(chunk[col]):
+                    text_columns.add(col)
+                elif chunk[col].notna().any():
+                    value_columns.add(col)
+                elif col in text_columns:
+                    # A stretch of empty cells parses as float; keep it text like the chunks before
+                    chunk[col] = chunk[col].astype("str")
+            if stats is not None:
+                stats["text"], stats["mixed"] = text_columns, text_columns & value_columns
+            if clean:
+                chunk = clean_chunk(chunk, clean)
+            if category_columns is None:
+                category_columns = category_candidates(chunk)
+            yield optimize_dtypes(chunk, category_columns)
+
+
+def _read_as_text(source, columns, chunksize, clean, read_kwargs):
+    """Parse `columns` of the CSV again as text, cleaned like the chunks, indexed by row number."""
+    if hasattr(source, "seek"):
+        source.seek(0)
+    read_kwargs = {**read_kwargs, "usecols": columns, "dtype": dict.fromkeys(columns, "str")}
+    with pd.read_csv(source, chunksize=chunksize, **read_kwargs) as reader:
+        parts = [clean_chunk(part, clean) if clean else part for part in reader]
+    return pd.concat(parts)
+
+
+def _unify_text_columns(chunks, source, stats, chunksize, clean, read_kwargs):
+    """
+    Give every text column one text dtype across the chunks, as one read of
+    the whole file would. A column that parsed as numbers in some chunks
+    ("X5" after a run of integers, "10008" after a stretch of empty cells)
+    is parsed again as text, so its values keep the file's spelling.
+    """
+    mixed = sorted(stats.get("mixed", ()), key=list(chunks[0].columns).index)
+    text = _read_as_text(source, mixed, chunksize, clean, read_kwargs) if mixed else None
+    for col in stats.get("text", ()):
+        if col in mixed:
+            for chunk in chunks:
+                chunk[col] = text[col].reindex(chunk.index)
+            stats["dtypes"][col] = str(text[col].dtype)
+        else:
+            # Only chunks where the column was empty from the start of the file are left to fix
+            empty = [chunk for chunk in chunks
+                     if not _is_text(chunk[col]) and not isinstance(chunk[col].dtype, pd.CategoricalDtype)]
+            if not empty:
+                continue
+            for chunk in empty:
+                chunk[col] = chunk[col].astype("str")
+        if any(isinstance(chunk[col].dtype, pd.CategoricalDtype) for chunk in chunks) or \
+                category_candidates(chunks[0][[col]]):
+            for chunk in chunks:
+                to_categories(chunk, [col])
+    return chunks
+
+
+def _concat_chunks(chunks):
+    """Concatenate chunks, unifying categorical columns so they stay categorical."""
+    for col in chunks[0].columns:
+        if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+            union = pd.api.types.union_categoricals([chunk[col] for chunk in chunks]).categories
+            for chunk in chunks:
+                chunk[col] = chunk[col].cat.set_categories(union)
+    # Chunks may disagree on numeric dtypes (e.g. int8 vs int16); concat upcasts as needed
+    return pd.concat(chunks, ignore_index=True)
+
+
+def read_csv_streaming(source, chunksize=DEFAULT_CHUNKSIZE, clean=None, **read_kwargs):
+    """
+    Parse a CSV in bounded-size chunks and assemble one compact DataFrame,
+    running the chunk-wise cleaning stages in `clean` on each chunk.
+    Returns (df, memory_report).
+    """
+    stats = {}
+    with span("ingest.read_csv") as attrs:
+        chunks = list(iter_csv_chunks(source, chunksize=chunksize, stats=stats, clean=clean, **read_kwargs))
+        if not chunks:
+            df = pd.DataFrame()
+        elif len(chunks) == 1:
+            df = chunks[0].reset_index(drop=True)
+        else:
+            chunks = _unify_text_columns(chunks, source, stats, chunksize, clean, read_kwargs)
+            df = _concat_chunks(chunks)
+        report = memory_report(stats.get("before_bytes", 0), df, stats.get("dtypes"))
+        attrs.update(rows=len(df), chunks=len(chunks), after_mb=report["after_mb"])
+        incr("ingest_rows_total", len(df))
+        incr("ingest_bytes_total", stats.get("before_bytes", 0))
+    return df, report
+
+
+def optimize_frame(df):
+    """optimize_dtypes for a frame that is already in memory; returns (df, memory_report)."""
+    before_bytes = int(df.memory_usage(deep=True).sum())
+    before_dtypes = {c: str(t) for c, t in df.dtypes.items()}
+    df = optimize_dtypes(df.copy(deep=False))
+    return df, memory_report(before_bytes, df, before_dtypes)
+
+
+def read_uploaded_file(uploaded_file, chunksize=DEFAULT_CHUNKSIZE, clean=INGEST_PIPELINE):
+    """
+    Load a Streamlit upload (CSV or XLSX) into a compact DataFrame, with
+    empty rows dropped by default; returns (df, memory_report).
+    """
+    if uploaded_file.name.endswith('.csv'):
+        return read_csv_streaming(uploaded_file, chunksize=chunksize, clean=clean)
+    # Excel has no chunked reader; clean and optimize once after parsing
+    with span("ingest.read_excel") as attrs:
+        df = pd.read_excel(uploaded_file)
+        if clean:
+            df = clean_chunk(df, clean).reset_index(drop=True)
+        df, report = optimize_frame(df)
+        attrs.update(rows=len(df), after_mb=report["after_mb"])
+        incr("ingest_rows_total", len(df))
+    return df, report
+
+
+def format_memory_report(report):
+    return (f"Memory: {report['before_mb']} MB → {report['after_mb']} MB "
+            f"({report['saved_pct']}% smaller)")
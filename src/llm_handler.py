@@ -1,10 +1,63 @@
 import streamlit as st
 import os
 import re
+import time
 import pandas as pd
-from google import genai
-from groq import Groq
 from collections.abc import Iterable
+from src.response_cache import ResponseCache, make_key
+from src.profiler import get_profile, render_profile, estimate_tokens, DEFAULT_TOKEN_BUDGET
+from src.tracing import span, incr, get_tracer
+from src.data_lake import referenced_tables, DEFAULT_TABLE
+from src.llm_providers import (
+    ProviderEngine, GeminiProvider, GroqProvider, AllProvidersFailed, LatencyTracker
+)
+
+GEMINI_MODEL = "gemini-2.0-flash"
+GROQ_MODEL = "llama-3.3-70b-versatile"
+
+# Failure texts produced below; these answers are never cached
+_ERROR_PREFIXES = ("Connection error:", "No response received.")
+
+_response_cache = None
+_provider_engine = None
+
+# Time-to-first-token of streamed answers (seconds)
+_ttft = LatencyTracker()
+
+
+def get_provider_engine():
+    """Process-wide provider engine; clients are created once and reused across calls."""
+    global _provider_engine
+    if _provider_engine is None:
+        gemini_key = st.secrets.get("GENAI_API_KEY") or os.getenv("GENAI_API_KEY")
+        groq_key = st.secrets.get("groq_API_KEY") or os.getenv("groq_API_KEY")
+        providers = [GeminiProvider(gemini_key, GEMINI_MODEL)]
+        if groq_key:
+            providers.append(GroqProvider(groq_key, GROQ_MODEL))
+        _provider_engine = ProviderEngine(providers)
+    return _provider_engine
+
+
+def warm_llm_clients():
+    """Build the provider clients in the background so the first question skips the SDK imports."""
+    try:
+        get_provider_engine().warm()
+    except FileNotFoundError:
+        # No secrets file; the chat page reports the missing keys when it is opened
+        pass
+
+
+def get_response_cache():
+    """Process-wide LLM response cache, shared by every session."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+
+def _is_cacheable(result):
+    code, _, response_text = result
+    return code is not None or not str(response_text).startswith(_ERROR_PREFIXES)
 
 
 # -------------------------------------------------
@@ -31,6 +84,17 @@ def normalize_to_dataframe(data):
     raise TypeError(f"Unsupported data type: {type(data)}")
 
 
+def select_tables(user_query, data_lake):
+    """
+    Normalize only the tables the query refers to (loading nothing else).
+    Returns ({name: DataFrame}, [names of the other tables]).
+    """
+    names = referenced_tables(user_query, data_lake)
+    selected = {name: normalize_to_dataframe(data_lake[name]) for name in names}
+    others = [name for name in data_lake if name not in selected]
+    return selected, others
+
+
 # -------------------------------------------------
 # Utility: Extract code, suggestions, and text
 # -------------------------------------------------
@@ -58,31 +122,115 @@ def extract_code_and_suggestions(text):
     return code, suggestions, convo_text
 
 
-# -------------------------------------------------
-# Main LLM Handler
-# -------------------------------------------------
-def ask_ai(user_query, data_lake):
+class StreamingResponseParser:
     """
-    Predictive Multi-LLM Handler
-    Returns: (code, suggestions, response_text)
+    Incremental counterpart of extract_code_and_suggestions.
+
+    feed() consumes chunks as they arrive and returns events:
+    ("answer", text_so_far) while the conversational text grows, and
+    ("code", code) as soon as the first ```python block closes.
+    Text that could be the start of a marker is held back until the next chunk.
     """
 
-    gemini_key = st.secrets.get("GENAI_API_KEY") or os.getenv("GENAI_API_KEY")
-    groq_key = st.secrets.get("groq_API_KEY") or os.getenv("groq_API_KEY")
+    CODE_OPEN = "```python"
+    CODE_CLOSE = "```"
+    SUGGESTIONS = "[SUGGESTIONS]:"
 
-    # -------------------------------------------------
-    # Normalize all datasets in the data lake
-    # -------------------------------------------------
-    normalized_lake = {}
-    for name, raw_data in data_lake.items():
-        normalized_lake[name] = normalize_to_dataframe(raw_data)
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.state = "answer"
+        self.answer_parts = []
+        self.code = None
+
+    def _held_back(self):
+        # Longest buffer suffix that is a proper prefix of a marker
+        for marker in (self.CODE_OPEN, self.SUGGESTIONS):
+            for size in range(min(len(marker) - 1, len(self.buffer) - self.pos), 0, -1):
+                if marker.startswith(self.buffer[-size:]):
+                    return size
+        return 0
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        events = []
+        answer_grew = False
+
+        while True:
+            if self.state == "answer":
+                code_at = self.buffer.find(self.CODE_OPEN, self.pos)
+                sugg_at = self.buffer.find(self.SUGGESTIONS, self.pos)
+                if code_at >= 0 and (sugg_at < 0 or code_at < sugg_at):
+                    self.answer_parts.append(self.buffer[self.pos:code_at])
+                    self.pos = code_at + len(self.CODE_OPEN)
+                    self.state = "code"
+                    answer_grew = True
+                elif sugg_at >= 0:
+                    self.answer_parts.append(self.buffer[self.pos:sugg_at])
+                    self.pos = sugg_at + len(self.SUGGESTIONS)
+                    self.state = "suggestions"
+                    answer_grew = True
+                else:
+                    end = len(self.buffer) - self._held_back()
+                    if end > self.pos:
+                        self.answer_parts.append(self.buffer[self.pos:end])
+                        self.pos = end
+                        answer_grew = True
+                    break
+            elif self.state == "code":
+                close_at = self.buffer.find(self.CODE_CLOSE, self.pos)
+                if close_at < 0:
+                    break
+                if self.code is None:
+                    self.code = self.buffer[self.pos:close_at].strip()
+                    events.append(("code", self.code))
+                self.pos = close_at + len(self.CODE_CLOSE)
+                self.state = "answer"
+            else:
+                # Suggestions are only complete once the stream ends
+                break
+
+        if answer_grew:
+            events.insert(0, ("answer", self.answer_text))
+        return events
+
+    @property
+    def answer_text(self):
+        return "".join(self.answer_parts).strip()
 
+    def close(self):
+        """Finish the stream; returns the same tuple as extract_code_and_suggestions."""
+        return extract_code_and_suggestions(self.buffer)
+
+
+# -------------------------------------------------
+# Prompt Builder
+# -------------------------------------------------
+def build_prompt(user_query, data_lake, token_budget=DEFAULT_TOKEN_BUDGET, other_tables=(), mode="pandas"):
     # -------------------------------------------------
     # Build dataset metadata for prompt
     # -------------------------------------------------
+    # Cached profiles (types, nulls, ranges, top values) instead of bare column
+    # lists; wide tables keep only the columns most relevant to the query
     dataset_info = ""
+    table_budget = max(1, token_budget // max(1, len(data_lake)))
     for name, df in data_lake.items():
-        dataset_info += f"\n- Table: '{name}' | Columns: {list(df.columns)}"
+        dataset_info += render_profile(name, get_profile(df), token_budget=table_budget, query=user_query)
+    if other_tables:
+        # Not described (and not loaded); named so the user can ask about them
+        dataset_info += f"\n    Other tables: {', '.join(other_tables)}"
+
+    default_table = next(iter(data_lake), DEFAULT_TABLE)
+    data_access = f"Use `df = data_lake['{default_table}']`."
+    if len(data_lake) > 1:
+        data_access += " Other tables are `data_lake['<name>']`; join them with `pd.merge` on shared columns."
+    if mode == "sql":
+        # The heavy lifting runs in DuckDB; pandas/px only see the small result
+        data_access = (
+            f"Compute results with SQL, not pandas: `result = sql(\"\"\"SELECT ... FROM {default_table} ...\"\"\")`. "
+            "Tables are named as in Context; JOIN them on shared columns. Aggregate in SQL so `result` "
+            "stays small, then pass `result` (a DataFrame) to st.metric or px. Never loop over rows."
+        )
 
     prompt = f"""
     Role: Senior Data Architect (DataTalk).
@@ -97,7 +245,7 @@ def ask_ai(user_query, data_lake):
        - For "Average/Total": Use `st.metric(label="Result", value=...)`.
        - For "Trends/Patterns/Relationships": Use `st.plotly_chart(px.bar(...) or px.line(...) or px.scatter(...))`.
     3. NO ANNOTATIONS: Do NOT use `var: type = val`. Use `var = val`.
-    4. DATA ACCESS: Use `df = data_lake['Uploaded_Data']`.
+    4. DATA ACCESS: {data_access}
 
     FORMAT:
     [ANSWER]: Your direct textual answer here.
@@ -109,36 +257,187 @@ def ask_ai(user_query, data_lake):
     User Query: "{user_query}"
     """
     # Ensure your extraction logic captures [ANSWER] as 'response_text'
+    return prompt
+
+
 # -------------------------------------------------
-# PRIMARY ENGINE: GEMINI
+# Main LLM Handler
 # -------------------------------------------------
+def _generate(prompt, notify=None):
+    """
+    Run the prompt through the provider engine: Gemini first, with Groq
+    hedged in if Gemini is slow and taking over if it fails. A fallback
+    notice is passed to `notify` when given.
+    """
+    engine = get_provider_engine()
+    with span("llm.generate") as attrs:
+        try:
+            text, provider_name = engine.complete_sync(prompt)
+        except AllProvidersFailed as e:
+            attrs["error"] = "AllProvidersFailed"
+            return None, [], f"Connection error: {e}"
+        attrs["provider"] = provider_name
+    _count_llm_io(prompt, text)
+
+    notice = _fallback_notice(engine, provider_name)
+    if notice and notify is not None:
+        notify(notice)
+    with span("llm.parse"):
+        return extract_code_and_suggestions(text)
+
+
+def _fallback_notice(engine, provider_name):
+    """Warning text when the answer came from a fallback because the primary failed, else None."""
+    primary = engine.providers[0]
+    if provider_name != primary.name and primary.breaker.failures:
+        return f"{primary.name.title()} unavailable. Switched to {provider_name.title()}."
+    return None
+
+
+def _count_llm_io(prompt, text):
+    incr("llm_prompt_tokens_total", estimate_tokens(prompt))
+    incr("llm_response_tokens_total", estimate_tokens(text))
+    incr("llm_prompt_bytes_total", len(prompt.encode()))
+    incr("llm_response_bytes_total", len(text.encode()))
+
+
+def _cache_model(mode):
+    model = f"{GEMINI_MODEL}|{GROQ_MODEL}"
+    return model if mode == "pandas" else f"{model}|{mode}"
+
+
+def ask_ai(user_query, data_lake, use_cache=True, mode="pandas", notify=st.warning):
+    """
+    Predictive Multi-LLM Handler
+    Returns: (code, suggestions, response_text)
+
+    Answers are cached per (normalized query, tables, model; see make_key), and
+    identical questions asked concurrently share one upstream call.
+    With mode="sql" the generated code queries the tables through `sql(...)`
+    (DuckDB, see src/sql_engine.py) instead of pandas.
+    A fallback-provider notice goes to `notify` (st.warning; pass None off
+    the script thread, where there is no page to draw on).
+    """
+
+    # -------------------------------------------------
+    # Normalize the datasets the query refers to
+    # -------------------------------------------------
+    with span("llm.build_prompt"):
+        normalized_lake, other_tables = select_tables(user_query, data_lake)
+        prompt = build_prompt(user_query, normalized_lake, other_tables=other_tables, mode=mode)
+    if not use_cache:
+        return _generate(prompt, notify)
+
+    key = make_key(user_query, normalized_lake, _cache_model(mode), other_tables)
+    code, suggestions, response_text = get_response_cache().get_or_compute(
+        key, lambda: _generate(prompt, notify), cacheable=_is_cacheable
+    )
+    return code, list(suggestions), response_text
+
+
+def _replay(result):
+    """Stream events for an answer that is already complete."""
+    code, suggestions, response_text = result
+    yield "answer", response_text
+    if code:
+        yield "code", code
+    yield "done", (code, list(suggestions), response_text)
+
+
+def _stream_generate(prompt):
+    """
+    Stream the prompt through the provider engine (hedged and with fallback,
+    like _generate). Yields the parser's events plus ("notice", text) when a
+    fallback provider took over; returns the parsed result.
+    """
+    engine = get_provider_engine()
+    parser = StreamingResponseParser()
+    start = time.perf_counter()
+    first_token = True
+    # Time spent in the caller between our yields (e.g. running the code
+    # block) and in the parser is kept out of the provider's span
+    away = parsing = 0.0
+    ttft = provider_name = None
+    text = []
     try:
-        client_gemini = genai.Client(api_key=gemini_key)
-        response = client_gemini.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt
-        )
-        return extract_code_and_suggestions(response.text)
+        for provider_name, chunk in engine.stream_sync(prompt):
+            events = []
+            if first_token:
+                ttft = time.perf_counter() - start
+                _ttft.record(ttft)
+                first_token = False
+                notice = _fallback_notice(engine, provider_name)
+                if notice:
+                    events.append(("notice", notice))
+            text.append(chunk)
+            tick = time.perf_counter()
+            events += parser.feed(chunk)
+            parsing += time.perf_counter() - tick
+            for event in events:
+                tick = time.perf_counter()
+                yield event
+                away += time.perf_counter() - tick
+    except AllProvidersFailed as e:
+        get_tracer().record("llm.stream", time.perf_counter() - start - away, error="AllProvidersFailed")
+        return None, [], f"Connection error: {e}"
 
-# -------------------------------------------------
-# FALLBACK ENGINE: GROQ
-# -------------------------------------------------
-    except Exception as e:
-        if "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
-            st.warning("Gemini quota exhausted. Switching to Groq.")
+    tick = time.perf_counter()
+    result = parser.close()
+    parsing += time.perf_counter() - tick
+    tracer = get_tracer()
+    tracer.record("llm.stream", time.perf_counter() - start - away - parsing, provider=provider_name,
+                  ttft=round(ttft, 4) if ttft is not None else None)
+    tracer.record("llm.parse", parsing)
+    _count_llm_io(prompt, "".join(text))
+    return result
 
+
+def ask_ai_stream(user_query, data_lake, use_cache=True, mode="pandas"):
+    """
+    Streaming variant of ask_ai. Yields events:
+    ("answer", text_so_far), ("code", code) once the code block closes,
+    ("notice", text) if a fallback provider answered,
+    and finally ("done", (code, suggestions, response_text)).
+
+    Shares ask_ai's cache: a question already being streamed for another
+    session waits for that answer and replays it instead of calling out again.
+    """
+    with span("llm.select_tables"):
+        normalized_lake, other_tables = select_tables(user_query, data_lake)
+        key = make_key(user_query, normalized_lake, _cache_model(mode), other_tables)
+
+    cache = get_response_cache()
+    owner = False
+    if use_cache:
+        cached, inflight, owner = cache.claim(key)
+        if cached is None and not owner:
             try:
-                client_groq = Groq(api_key=groq_key)
-                completion = client_groq.chat.completions.create(
-                    model="llama-3.3-70b-versatile",
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.1
-                )
-                return extract_code_and_suggestions(
-                    completion.choices[0].message.content
-                )
-
-            except Exception as groq_err:
-                return None, [], f"Groq failure: {groq_err}"
+                cached = inflight.result()
+            except Exception:
+                # The other stream was abandoned; answer this one directly
+                cached = None
+        if cached is not None:
+            incr("llm_cache_hits_total")
+            yield from _replay(cached)
+            return
 
-        return None, [], f"Connection error: {e}"
+    with span("llm.build_prompt"):
+        prompt = build_prompt(user_query, normalized_lake, other_tables=other_tables, mode=mode)
+    try:
+        result = yield from _stream_generate(prompt)
+    except BaseException as e:
+        if owner:
+            cache.settle(key, inflight, error=RuntimeError(f"stream did not finish: {e!r}"))
+        raise
+    if owner:
+        cache.settle(key, inflight, result, cacheable=_is_cacheable)
+    yield "done", result
+
+
+def streaming_stats():
+    """Time-to-first-token percentiles (seconds) of streamed answers."""
+    return {
+        "samples": len(_ttft.samples),
+        "ttft_p50": _ttft.percentile(0.5),
+        "ttft_p95": _ttft.percentile(0.95),
+    }
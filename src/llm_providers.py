@@ -0,0 +1,508 @@
+import re
+import json
+import time
+import queue
+import random
+import asyncio
+import threading
+from collections import deque
+from src.tracing import incr
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_HEDGE_DELAY = 2.0
+# A p95 from fewer samples is mostly noise; hedge on the default delay until then
+MIN_HEDGE_SAMPLES = 20
+
+
+class AllProvidersFailed(Exception):
+    """Raised when no provider produced a usable answer."""
+
+
+# -------------------------------------------------
+# Utility: Latency tracking and circuit breaking
+# -------------------------------------------------
+class LatencyTracker:
+    """Rolling window of successful call latencies (seconds)."""
+
+    def __init__(self, window=200):
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+
+    def percentile(self, q, default=None):
+        if not self.samples:
+            return default
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and rejects calls for
+    `cooldown` seconds; then lets trial calls through (half-open), and a
+    failed trial re-opens it.
+    """
+
+    def __init__(self, threshold=3, cooldown=30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        return self.state != "open"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold or self.state == "half-open":
+            self.opened_at = time.monotonic()
+
+
+# -------------------------------------------------
+# Providers
+# -------------------------------------------------
+class Provider:
+    """Base class: one LLM backend with a reused client, timeout, breaker and latency stats."""
+
+    name = "provider"
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, breaker=None):
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+        # Streamed calls: time to the first chunk, far shorter than a whole answer
+        self.first_chunk = LatencyTracker()
+        self.calls = 0
+        self.errors = 0
+        self.wins = 0
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    def client(self):
+        """The SDK client, created (and its SDK imported) on first use and reused after."""
+        with self._client_lock:
+            if self._client is None:
+                self._client = self._make_client()
+        return self._client
+
+    def _make_client(self):
+        return None
+
+    def warm(self):
+        """Build the client ahead of the first call."""
+        self.client()
+
+    async def complete(self, prompt):
+        raise NotImplementedError
+
+    async def stream(self, prompt):
+        """Yield text chunks; providers without native streaming yield one chunk."""
+        yield await self.complete(prompt)
+
+
+class GeminiProvider(Provider):
+    name = "gemini"
+
+    def __init__(self, api_key, model, **kwargs):
+        super().__init__(**kwargs)
+        self.api_key = api_key
+        self.model = model
+
+    def _make_client(self):
+        from google import genai
+        return genai.Client(api_key=self.api_key)
+
+    async def complete(self, prompt):
+        response = await self.client().aio.models.generate_content(model=self.model, contents=prompt)
+        return response.text
+
+    async def stream(self, prompt):
+        chunks = await self.client().aio.models.generate_content_stream(model=self.model, contents=prompt)
+        async for chunk in chunks:
+            yield chunk.text or ""
+
+
+class GroqProvider(Provider):
+    name = "groq"
+
+    def __init__(self, api_key, model, **kwargs):
+        super().__init__(**kwargs)
+        self.api_key = api_key
+        self.model = model
+
+    def _make_client(self):
+        from groq import AsyncGroq
+        return AsyncGroq(api_key=self.api_key)
+
+    async def complete(self, prompt):
+        completion = await self.client().chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.1
+        )
+        return completion.choices[0].message.content
+
+    async def stream(self, prompt):
+        chunks = await self.client().chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.1,
+            stream=True
+        )
+        async for chunk in chunks:
+            yield chunk.choices[0].delta.content or ""
+
+
+class FakeProvider(Provider):
+    """
+    Local stand-in for testing and benchmarks: answers `response` after
+    `latency` seconds (plus jitter) and fails with probability `failure_rate`.
+    """
+
+    def __init__(self, name, response="[ANSWER]: ok", latency=0.05, jitter=0.0, failure_rate=0.0,
+                 chunk_size=8, chunk_delay=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.response = response
+        self.base_latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+
+    async def complete(self, prompt):
+        await asyncio.sleep(self.base_latency + random.uniform(0, self.jitter))
+        if random.random() < self.failure_rate:
+            raise RuntimeError(f"{self.name}: simulated failure")
+        return self.response
+
+    async def stream(self, prompt):
+        text = await self.complete(prompt)
+        for i in range(0, len(text), self.chunk_size):
+            if i and self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+            yield text[i:i + self.chunk_size]
+
+
+class ReplayProvider(FakeProvider):
+    """
+    Offline provider that answers with recorded responses, looked up by the
+    user query found in the prompt. Lets benchmarks replay chat turns
+    without network access or API keys.
+    """
+
+    _QUERY = re.compile(r'User Query: "(.*)"', re.DOTALL)
+
+    def __init__(self, responses, name="replay", default="[ANSWER]: No recorded answer.", **kwargs):
+        super().__init__(name, response=default, **kwargs)
+        self.responses = {self._normalize(q): r for q, r in responses.items()}
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """Load a JSON list of {"query": ..., "response": ...} turns."""
+        with open(path, "r", encoding="utf-8") as fh:
+            turns = json.load(fh)
+        return cls({turn["query"]: turn["response"] for turn in turns}, **kwargs)
+
+    @staticmethod
+    def _normalize(query):
+        return re.sub(r"\s+", " ", query).strip().lower()
+
+    async def complete(self, prompt):
+        await asyncio.sleep(self.base_latency)
+        match = self._QUERY.search(prompt)
+        query = self._normalize(match.group(1)) if match else ""
+        return self.responses.get(query, self.response)
+
+
+# -------------------------------------------------
+# Engine
+# -------------------------------------------------
+class ProviderEngine:
+    """
+    Runs prompts against an ordered list of providers on a private event loop.
+
+    The first healthy provider is called; if it has not answered within its
+    `hedge_percentile` latency (the default delay until it has
+    `min_hedge_samples` of them), the next one is fired as well (a hedged
+    request) and the first non-empty answer wins. A provider that fails
+    outright hands over to the next one immediately.
+    """
+
+    def __init__(self, providers, hedge_percentile=0.95, default_hedge_delay=DEFAULT_HEDGE_DELAY,
+                 min_hedge_samples=MIN_HEDGE_SAMPLES):
+        self.providers = list(providers)
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_samples = min_hedge_samples
+        self.hedges_fired = 0
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._warming = None
+
+    def _hedge_delay(self, tracker):
+        """Hedge delay from a provider's `latency` (complete) or `first_chunk` (stream) tracker."""
+        if len(tracker.samples) < self.min_hedge_samples:
+            return self.default_hedge_delay
+        return tracker.percentile(self.hedge_percentile)
+
+    async def _call(self, provider, prompt):
+        provider.calls += 1
+        start = time.perf_counter()
+        try:
+            text = await asyncio.wait_for(provider.complete(prompt), provider.timeout)
+            if not text:
+                raise ValueError(f"{provider.name}: empty response")
+        except asyncio.CancelledError:
+            # Lost a hedge race; not the provider's fault
+            raise
+        except Exception:
+            provider.errors += 1
+            incr("llm_provider_errors_total", provider=provider.name)
+            provider.breaker.record_failure()
+            raise
+        provider.latency.record(time.perf_counter() - start)
+        provider.breaker.record_success()
+        return text
+
+    async def complete(self, prompt):
+        """Return (text, provider_name) from the first provider to answer."""
+        candidates = [p for p in self.providers if p.breaker.allow()]
+        if not candidates:
+            raise AllProvidersFailed("All LLM providers are temporarily disabled (circuit open).")
+
+        pending = {}
+        errors = []
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            provider = candidates[next_index]
+            next_index += 1
+            pending[asyncio.ensure_future(self._call(provider, prompt))] = provider
+            return provider
+
+        last = launch()
+        try:
+            while pending:
+                can_hedge = next_index < len(candidates)
+                timeout = self._hedge_delay(last.latency) if can_hedge else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    self.hedges_fired += 1
+                    incr("llm_hedges_total", provider=candidates[next_index].name)
+                    last = launch()
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        provider.wins += 1
+                        if provider is not candidates[0]:
+                            incr("llm_fallbacks_total", provider=provider.name)
+                        return task.result(), provider.name
+                    errors.append(f"{provider.name}: {task.exception()}")
+
+                if not pending and next_index < len(candidates):
+                    last = launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise AllProvidersFailed("; ".join(errors))
+
+    async def _first_chunk(self, provider, chunks):
+        """The first non-empty chunk of a provider's stream."""
+        try:
+            while True:
+                chunk = await asyncio.wait_for(chunks.__anext__(), provider.timeout)
+                if chunk:
+                    return chunk
+        except StopAsyncIteration:
+            error = ValueError(f"{provider.name}: empty response")
+        except asyncio.CancelledError:
+            # Lost a hedge race; not the provider's fault
+            raise
+        except Exception as e:
+            error = e
+        provider.errors += 1
+        incr("llm_provider_errors_total", provider=provider.name)
+        provider.breaker.record_failure()
+        raise error
+
+    async def stream(self, prompt):
+        """
+        Yield (provider_name, chunk) pairs. Until the first chunk arrives this
+        races providers like complete() does (hedging a slow one, handing over
+        from a failed one); the first to emit is streamed to the end and the
+        rest are dropped. A failure after that point is raised.
+        """
+        candidates = [p for p in self.providers if p.breaker.allow()]
+        if not candidates:
+            raise AllProvidersFailed("All LLM providers are temporarily disabled (circuit open).")
+
+        pending = {}  # first-chunk task -> (provider, chunk iterator, start)
+        errors = []
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            provider = candidates[next_index]
+            next_index += 1
+            provider.calls += 1
+            chunks = provider.stream(prompt)
+            task = asyncio.ensure_future(self._first_chunk(provider, chunks))
+            pending[task] = (provider, chunks, time.perf_counter())
+            return provider
+
+        winner = None
+        last = launch()
+        try:
+            while pending and winner is None:
+                can_hedge = next_index < len(candidates)
+                timeout = self._hedge_delay(last.first_chunk) if can_hedge else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    self.hedges_fired += 1
+                    incr("llm_hedges_total", provider=candidates[next_index].name)
+                    last = launch()
+                    continue
+
+                for task in done:
+                    provider, chunks, start = pending.pop(task)
+                    if task.exception() is None and winner is None:
+                        winner = (provider, chunks, start, task.result())
+                        continue
+                    if task.exception() is not None:
+                        errors.append(f"{provider.name}: {task.exception()}")
+                    await chunks.aclose()
+
+                if winner is None and not pending and next_index < len(candidates):
+                    last = launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            # A cancelled task finishes its generator; only then can it be closed
+            await asyncio.gather(*pending, return_exceptions=True)
+            for _, chunks, _ in pending.values():
+                await chunks.aclose()
+
+        if winner is None:
+            raise AllProvidersFailed("; ".join(errors))
+
+        provider, chunks, start, chunk = winner
+        # Kept apart from `latency`: a first chunk is no yardstick for a whole answer in complete()
+        provider.first_chunk.record(time.perf_counter() - start)
+        try:
+            yield provider.name, chunk
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), provider.timeout)
+                except StopAsyncIteration:
+                    break
+                if chunk:
+                    yield provider.name, chunk
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            provider.errors += 1
+            incr("llm_provider_errors_total", provider=provider.name)
+            provider.breaker.record_failure()
+            raise AllProvidersFailed(f"{provider.name} failed mid-answer: {e}")
+        finally:
+            await chunks.aclose()
+        provider.breaker.record_success()
+        provider.wins += 1
+        if provider is not candidates[0]:
+            incr("llm_fallbacks_total", provider=provider.name)
+
+    def _ensure_loop(self):
+        # One long-lived loop keeps the async clients (and their connection pools) reusable
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, daemon=True, name="llm-engine").start()
+        return self._loop
+
+    def warm(self):
+        """
+        Start the event loop and build every provider's client on a background
+        thread (once), so the SDK imports are paid before the first question.
+        Failures are left for the first real call to report.
+        """
+        with self._loop_lock:
+            if self._warming is not None:
+                return self._warming
+            self._warming = threading.Thread(target=self._warm_providers, daemon=True, name="llm-warm")
+            self._warming.start()
+        return self._warming
+
+    def _warm_providers(self):
+        self._ensure_loop()
+        for provider in self.providers:
+            try:
+                provider.warm()
+            except Exception:
+                pass
+
+    def complete_sync(self, prompt):
+        """Blocking wrapper for Streamlit scripts."""
+        future = asyncio.run_coroutine_threadsafe(self.complete(prompt), self._ensure_loop())
+        return future.result()
+
+    def stream_sync(self, prompt):
+        """Blocking generator of (provider_name, chunk) pairs for Streamlit scripts."""
+        chunks = queue.Queue()
+
+        async def pump():
+            try:
+                async for item in self.stream(prompt):
+                    chunks.put(("chunk", item))
+                chunks.put(("end", None))
+            except Exception as e:
+                chunks.put(("error", e))
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._ensure_loop())
+        try:
+            while True:
+                kind, payload = chunks.get()
+                if kind == "chunk":
+                    yield payload
+                elif kind == "error":
+                    raise payload
+                else:
+                    return
+        finally:
+            # The consumer stopped early (e.g. the rerun was interrupted)
+            future.cancel()
+
+    def stats(self):
+        rows = {}
+        for p in self.providers:
+            rows[p.name] = {
+                "calls": p.calls,
+                "errors": p.errors,
+                "wins": p.wins,
+                "p50": p.latency.percentile(0.5),
+                "p95": p.latency.percentile(0.95),
+                "ttft_p50": p.first_chunk.percentile(0.5),
+                "ttft_p95": p.first_chunk.percentile(0.95),
+                "breaker": p.breaker.state,
+            }
+        return {"providers": rows, "hedges_fired": self.hedges_fired}
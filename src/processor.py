@@ -1,35 +1,365 @@
+import os
+import json
+import time
+import weakref
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
 import pandas as pd
 import numpy as np
+from src.fingerprint import dataframe_fingerprint
+from src.tracing import span
+
+# Column-wise stages fan out over a process pool only when the frame is big
+# enough for the speed-up to outweigh shipping the columns to the workers
+PARALLEL_MIN_CELLS = 2_000_000
+DEFAULT_WORKERS = int(os.getenv("DATATALK_CLEAN_WORKERS", str(min(4, os.cpu_count() or 1))))
+MAX_MEMOIZED = 32
+
+# The original 'Standard Cleaning Engine': dedup, median/'Unknown' fill, sequential IQR
+DEFAULT_PIPELINE = [
+    {"stage": "drop_duplicates"},
+    {"stage": "impute", "numeric": "median", "other": "Unknown"},
+    {"stage": "iqr_outliers"},
+]
+
+# name -> (kind, function, column selector, parallel, chunkwise). Kinds:
+#   "frame":   fn(df, **params) -> df, runs on the whole frame
+#   "columns": fn(sub_df, **params) -> sub_df, independent per column
+#   "mask":    fn(sub_df, **params) -> bool array of rows to keep, independent per column
+# `parallel` marks column-wise stages whose per-column work outweighs pickling
+# the partitions to the pool (cheap vectorized stages are faster in-process).
+# `chunkwise` marks stages that need no global statistics: running them on each
+# ingest chunk gives the same rows as running them on the assembled frame.
+_STAGES = {}
+
+
+def stage(name, kind="frame", select=None, parallel=False, chunkwise=False):
+    """Register a cleaning stage; `select(df, params)` picks the columns a column-wise stage needs."""
+    def register(fn):
+        _STAGES[name] = (kind, fn, select, parallel, chunkwise)
+        return fn
+    return register
+
+
+def available_stages():
+    return list(_STAGES)
+
+
+def _is_median_imputed(dtype):
+    """Columns the engine fills with the median (everything else gets 'Unknown')."""
+    # Any width: ingest downcasts integer columns
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def _numeric_columns(df, params):
+    return list(df.select_dtypes(include=[np.number]).columns)
+
+
+def _null_columns(df, params):
+    return list(df.columns[df.isna().any().to_numpy()])
+
+
+def _text_columns(df, params):
+    return list(df.select_dtypes(include=["object", "string"]).columns)
+
+
+# -------------------------------------------------
+# Stages: rows
+# -------------------------------------------------
+@stage("drop_duplicates")
+def drop_duplicates(df, subset=None, keep="first"):
+    """Remove duplicate rows (hash-based mask, no upfront copy)."""
+    return df[~df.duplicated(subset=subset, keep=keep)]
+
+
+@stage("drop_empty_rows", chunkwise=True)
+def drop_empty_rows(df):
+    """Remove rows where every cell is missing."""
+    empty = df.isna().all(axis=1)
+    return df[~empty] if empty.any() else df
+
+
+def _iqr_keep_mask(working_df, numeric_cols, k=1.5):
+    """
+    Build the combined IQR row mask for all numeric columns.
+
+    Bounds are computed column by column on the rows that survived the
+    previous columns, exactly like the sequential filter. Quartiles are
+    computed in batches over a window of columns that doubles while no rows
+    drop; a column that drops rows invalidates the rest of its window, and
+    the next window restarts at one column. Every column's quartiles are
+    therefore computed about once, whether few or many columns drop rows.
+    """
+    numeric_cols = list(numeric_cols)
+    keep = np.ones(len(working_df), dtype=bool)
+    start, window = 0, 1
+    while start < len(numeric_cols):
+        batch = numeric_cols[start:start + window]
+        rows = working_df[batch] if keep.all() else working_df.loc[keep, batch]
+        quartiles = rows.quantile([0.25, 0.75])
+        dropped = False
+        for col in batch:
+            Q1 = quartiles[col].iloc[0]
+            Q3 = quartiles[col].iloc[1]
+            IQR = Q3 - Q1
+            lower_bound = Q1 - k * IQR
+            upper_bound = Q3 + k * IQR
+            series = working_df[col]
+            in_range = ((series >= lower_bound) & (series <= upper_bound)).to_numpy(dtype=bool)
+            new_keep = keep & in_range
+            start += 1
+            if not np.array_equal(new_keep, keep):
+                # Rows were dropped: quartiles of the rest of this window are now stale
+                keep = new_keep
+                dropped = True
+                break
+        window = 1 if dropped else window * 2
+    return keep
+
+
+@stage("iqr_outliers")
+def iqr_outliers(df, k=1.5):
+    """Drop rows outside Q1 - k*IQR .. Q3 + k*IQR, column after column (order-dependent)."""
+    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    if len(numeric_cols):
+        keep = _iqr_keep_mask(df, numeric_cols, k)
+        if not keep.all():
+            df = df[keep]
+    return df
+
+
+@stage("zscore_outliers", kind="mask", select=_numeric_columns)
+def zscore_outliers(sub, threshold=3.0):
+    """Keep rows whose |z-score| is within `threshold` in every column (nulls are kept)."""
+    values = sub.to_numpy(dtype=np.float64, na_value=np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (values - np.nanmean(values, axis=0)) / np.nanstd(values, axis=0)
+    return ~(np.abs(z) > threshold).any(axis=1)
+
+
+@stage("mad_outliers", kind="mask", select=_numeric_columns, parallel=True)
+def mad_outliers(sub, threshold=3.5):
+    """Keep rows whose modified z-score (median/MAD based) is within `threshold`."""
+    values = sub.to_numpy(dtype=np.float64, na_value=np.nan)
+    median = np.nanmedian(values, axis=0)
+    mad = np.nanmedian(np.abs(values - median), axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        modified_z = 0.6745 * (values - median) / mad
+    # Columns with MAD == 0 (mostly constant) do not drop anything
+    modified_z[:, mad == 0] = 0
+    return ~(np.abs(modified_z) > threshold).any(axis=1)
+
+
+# -------------------------------------------------
+# Stages: columns
+# -------------------------------------------------
+def _fill_value(series, how):
+    if how == "median":
+        return series.median()
+    if how == "mean":
+        return series.mean()
+    if how == "mode":
+        modes = series.mode()
+        return modes.iloc[0] if len(modes) else None
+    return how
+
+
+@stage("impute", kind="columns", select=_null_columns)
+def impute(sub, numeric="median", other="Unknown"):
+    """
+    Fill missing values in a single fillna pass: numeric columns of any width
+    (not bool) with `numeric` ('median', 'mean', 'mode' or None to skip), the
+    rest with `other` ('mode', a constant such as 'Unknown', or None to skip).
+    """
+    fill_values = {}
+    for col in sub.columns:
+        how = numeric if _is_median_imputed(sub[col].dtype) else other
+        if how is not None:
+            value = _fill_value(sub[col], how)
+            if value is not None:
+                fill_values[col] = value
+    if not fill_values:
+        return sub
+    # Categoricals only accept known categories: add the fill value (e.g. 'Unknown') first
+    new_categories = [col for col, value in fill_values.items()
+                      if isinstance(sub[col].dtype, pd.CategoricalDtype) and value not in sub[col].cat.categories]
+    if new_categories:
+        sub = sub.copy(deep=False)
+        for col in new_categories:
+            sub[col] = sub[col].cat.add_categories([fill_values[col]])
+    return sub.fillna(fill_values)
+
+
+@stage("strip_whitespace", kind="columns", select=_text_columns, chunkwise=True)
+def strip_whitespace(sub):
+    """Trim surrounding whitespace in text columns; cells left empty become missing."""
+    stripped = sub.copy(deep=False)
+    for col in sub.columns:
+        series = sub[col]
+        # Only the cells that need it are rewritten; most columns have none and are left as is
+        padded = series.str.contains(r"^\s|\s$", regex=True, na=False).to_numpy(dtype=bool)
+        if not padded.any():
+            continue
+        trimmed = series.copy()
+        trimmed[padded] = series[padded].str.strip()
+        stripped[col] = trimmed.mask(padded & (trimmed == "").to_numpy(dtype=bool))
+    return stripped
+
+
+@stage("coerce_types", kind="columns", select=_text_columns, parallel=True)
+def coerce_types(sub, min_valid=1.0):
+    """Convert text columns that hold numbers or dates (at least `min_valid` of non-null values)."""
+    converted = sub.copy(deep=False)
+    for col in sub.columns:
+        series = sub[col]
+        present = series.notna().sum()
+        if not present:
+            continue
+        as_number = pd.to_numeric(series, errors="coerce")
+        if as_number.notna().sum() >= min_valid * present:
+            converted[col] = as_number
+            continue
+        sample = series.dropna().astype(str).head(100)
+        if sample.str.contains(r"\d[-/:]\d|\d{4}-\d", regex=True).all():
+            as_date = pd.to_datetime(series, errors="coerce", format="mixed")
+            if as_date.notna().sum() >= min_valid * present:
+                converted[col] = as_date
+    return converted
+
+
+# -------------------------------------------------
+# Pipeline runner
+# -------------------------------------------------
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=DEFAULT_WORKERS, mp_context=mp.get_context("spawn"))
+    return _pool
+
+
+def _run_columnwise(fn, df, columns, params, workers):
+    """Apply `fn` to column partitions, across `workers` pool processes when > 1."""
+    if workers <= 1:
+        return [fn(df[columns], **params)]
+    partitions = [list(part) for part in np.array_split(np.array(columns, dtype=object), workers) if len(part)]
+    futures = [_get_pool().submit(fn, df[part], **params) for part in partitions]
+    return [future.result() for future in futures]
+
+
+def _run_stage(df, step, workers):
+    params = {k: v for k, v in step.items() if k != "stage"}
+    kind, fn, select, parallelizable, _ = _STAGES[step["stage"]]
+    if kind == "frame":
+        return fn(df, **params), False
+
+    columns = select(df, params) if select else list(df.columns)
+    if not columns:
+        return df, False
+    parallel = (parallelizable and workers > 1 and len(columns) > 1
+                and len(df) * len(columns) >= PARALLEL_MIN_CELLS)
+    results = _run_columnwise(fn, df, columns, params, workers if parallel else 1)
+
+    if kind == "mask":
+        keep = np.logical_and.reduce([np.asarray(r, dtype=bool) for r in results])
+        return (df if keep.all() else df[keep]), parallel
+
+    result = df.copy(deep=False)
+    for part in results:
+        for col in part.columns:
+            result[col] = part[col]
+    return result, parallel
+
+
+def _validate(pipeline):
+    for step in pipeline:
+        if step.get("stage") not in _STAGES:
+            raise ValueError(f"Unknown cleaning stage {step.get('stage')!r}. Available: {', '.join(_STAGES)}")
+
+
+def clean_chunk(chunk, pipeline):
+    """
+    Run chunk-wise stages (see `stage(chunkwise=True)`) on one ingest chunk.
+    Stages that need statistics of the whole frame are rejected.
+    """
+    _validate(pipeline)
+    for step in pipeline:
+        if not _STAGES[step["stage"]][4]:
+            raise ValueError(f"Cleaning stage {step['stage']!r} needs the whole frame and cannot run per chunk")
+        chunk, _ = _run_stage(chunk, step, workers=1)
+    return chunk
+
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def _memo_key(df, pipeline):
+    return dataframe_fingerprint(df), json.dumps(pipeline, sort_keys=True, default=str)
+
+
+def run_pipeline(df, pipeline=None, workers=DEFAULT_WORKERS):
+    """
+    Run a declarative cleaning pipeline: a list of {"stage": name, **params}.
+    Returns (cleaned_df, timings) where timings lists every stage with its
+    duration, the rows left and whether it ran across the process pool.
+    Memoized per (dataset hash, pipeline config) for as long as the cleaned
+    frame is alive; treat the result as read-only.
+    """
+    pipeline = DEFAULT_PIPELINE if pipeline is None else pipeline
+    _validate(pipeline)
+
+    key = _memo_key(df, pipeline)
+    with _memo_lock:
+        cached = _memo.get(key)
+        if cached is not None and cached[0]() is not None:
+            _memo.move_to_end(key)
+            return cached[0](), cached[1]
+
+    working_df = df
+    timings = []
+    with span("clean.pipeline", rows=len(df), stages=len(pipeline)):
+        for step in pipeline:
+            start = time.perf_counter()
+            with span(f"clean.{step['stage']}") as attrs:
+                working_df, parallel = _run_stage(working_df, step, workers)
+                attrs.update(rows=len(working_df), parallel=parallel)
+            timings.append({
+                "stage": step["stage"],
+                "seconds": round(time.perf_counter() - start, 4),
+                "rows": len(working_df),
+                "parallel": parallel,
+            })
+
+    with _memo_lock:
+        _memo[key] = (weakref.ref(working_df), timings)
+        while len(_memo) > MAX_MEMOIZED:
+            _memo.popitem(last=False)
+    return working_df, timings
+
+
+def pipeline_timings(df, pipeline=None):
+    """Stage timings of the last run of `pipeline` on `df`, if it is still memoized."""
+    pipeline = DEFAULT_PIPELINE if pipeline is None else pipeline
+    with _memo_lock:
+        cached = _memo.get(_memo_key(df, pipeline))
+    return cached[1] if cached is not None else None
+
+
+def clean_data(df, pipeline=None):
+    """run_pipeline without the timings (the shape the dataset registry expects)."""
+    return run_pipeline(df, pipeline)[0]
+
 
 def auto_clean_data(df):
     """
     The 'Standard Cleaning Engine' for DataTalk.
     This function is called by both the Upload page and the Chat Pin.
     """
-    # 1. Create a copy to avoid modifying the original until ready
-    working_df = df.copy()
-
-    # 2. Basic Cleaning: Remove duplicates
-    working_df = working_df.drop_duplicates()
-
-    # 3. Handle Missing Values (Automated Imputation)
-    for col in working_df.columns:
-        if working_df[col].dtype in ['int64', 'float64']:
-            # Fill numbers with the median
-            working_df[col] = working_df[col].fillna(working_df[col].median())
-        else:
-            # Fill text/categories with 'Unknown'
-            working_df[col] = working_df[col].fillna('Unknown')
-
-    # 4. Outlier Removal (Using IQR Method)
-    # This keeps your AI's predictions accurate
-    numeric_cols = working_df.select_dtypes(include=[np.number]).columns
-    for col in numeric_cols:
-        Q1 = working_df[col].quantile(0.25)
-        Q3 = working_df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-        working_df = working_df[(working_df[col] >= lower_bound) & (working_df[col] <= upper_bound)]
-
-    return working_df
\ No newline at end of file
+    return clean_data(df, DEFAULT_PIPELINE)
@@ -0,0 +1,162 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from src.fingerprint import dataframe_fingerprint
+
+# Approximate prompt budget for the whole dataset context (1 token ~ 4 chars)
+DEFAULT_TOKEN_BUDGET = int(os.getenv("DATATALK_PROMPT_TOKEN_BUDGET", "800"))
+TOP_K = 5
+MAX_CACHED_PROFILES = 32
+
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+# -------------------------------------------------
+# Profiling
+# -------------------------------------------------
+def _as_text(series):
+    """Text form of a column with unhashable cells (lists, dicts from JSON); nulls stay null."""
+    return series.astype(str).where(series.notna())
+
+
+def _cardinality(df):
+    try:
+        return df.nunique()
+    except TypeError:
+        # Some column holds unhashable cells; count those by their text form
+        counts = []
+        for i in range(df.shape[1]):
+            try:
+                counts.append(df.iloc[:, i].nunique())
+            except TypeError:
+                counts.append(_as_text(df.iloc[:, i]).nunique())
+        return pd.Series(counts, index=df.columns)
+
+
+def _top_values(series, top_k):
+    try:
+        counts = series.value_counts()
+    except TypeError:
+        counts = _as_text(series).value_counts()
+    return [str(v) for v in counts.index[:top_k]]
+
+
+def profile_dataframe(df, top_k=TOP_K):
+    """
+    Compact per-column profile: dtype, null rate, cardinality, numeric range
+    and the top-k values of low-cardinality text columns.
+    """
+    n_rows = len(df)
+    null_rates = df.isna().mean() if n_rows else pd.Series(0.0, index=df.columns)
+    cardinality = _cardinality(df)
+
+    numeric = df.select_dtypes(include=[np.number])
+    ranges = numeric.agg(["min", "max"]) if not numeric.empty and n_rows else None
+
+    columns = OrderedDict()
+    for col in df.columns:
+        entry = {
+            "dtype": str(df[col].dtype),
+            "null_rate": float(null_rates[col]),
+            "unique": int(cardinality[col]),
+        }
+        if ranges is not None and col in ranges.columns:
+            entry["min"] = ranges.at["min", col]
+            entry["max"] = ranges.at["max", col]
+        elif 0 < entry["unique"] <= max(top_k * 4, 20):
+            entry["top"] = _top_values(df[col], top_k)
+        columns[str(col)] = entry
+
+    return {"rows": n_rows, "columns": columns}
+
+
+def get_profile(df):
+    """Profile of `df`, computed once per dataset content and cached process-wide."""
+    key = dataframe_fingerprint(df)
+    with _profiles_lock:
+        profile = _profiles.get(key)
+        if profile is not None:
+            _profiles.move_to_end(key)
+            return profile
+    # Profiled outside the lock; two sessions racing on a new dataset both compute it once
+    profile = profile_dataframe(df)
+    with _profiles_lock:
+        _profiles[key] = profile
+        while len(_profiles) > MAX_CACHED_PROFILES:
+            _profiles.popitem(last=False)
+    return profile
+
+
+# -------------------------------------------------
+# Rendering
+# -------------------------------------------------
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+def _format_value(value):
+    if isinstance(value, (float, np.floating)):
+        return f"{value:.4g}"
+    return str(value)
+
+
+def _describe_column(name, entry):
+    parts = [entry["dtype"]]
+    if entry["null_rate"]:
+        parts.append(f"{entry['null_rate']:.0%} null")
+    if "min" in entry:
+        parts.append(f"{_format_value(entry['min'])}..{_format_value(entry['max'])}")
+    elif "top" in entry:
+        parts.append("e.g. " + ", ".join(entry["top"]))
+    else:
+        parts.append(f"{entry['unique']} unique")
+    return f"    - {name} ({'; '.join(parts)})"
+
+
+def _relevance(name, query_terms, query_text):
+    words = set(re.findall(r"[a-z0-9]+", name.lower()))
+    score = len(words & query_terms)
+    if name.lower() in query_text:
+        score += 2
+    return score
+
+
+def render_profile(name, profile, token_budget=DEFAULT_TOKEN_BUDGET, query=None):
+    """
+    Render a profile for the prompt within `token_budget`. When the table is
+    too wide, columns most related to `query` are described first and the
+    rest are listed by name (or just counted) as room allows.
+    """
+    header = f"\n- Table: '{name}' | {profile['rows']} rows | {len(profile['columns'])} columns:"
+    lines = [(col, _describe_column(col, entry)) for col, entry in profile["columns"].items()]
+
+    full = header + "\n" + "\n".join(line for _, line in lines)
+    if estimate_tokens(full) <= token_budget:
+        return full
+
+    query_text = (query or "").lower()
+    query_terms = set(re.findall(r"[a-z0-9]+", query_text))
+    ranked = sorted(lines, key=lambda item: -_relevance(item[0], query_terms, query_text))
+
+    used = estimate_tokens(header)
+    described, skipped = [], []
+    for col, line in ranked:
+        cost = estimate_tokens(line)
+        if used + cost <= token_budget:
+            described.append(line)
+            used += cost
+        else:
+            skipped.append(col)
+
+    out = header + "\n" + "\n".join(described)
+    if skipped:
+        names = f"\n    - Other columns: {skipped}"
+        if used + estimate_tokens(names) <= token_budget:
+            out += names
+        else:
+            out += f"\n    - ...and {len(skipped)} more columns"
+    return out
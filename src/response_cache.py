@@ -0,0 +1,235 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from concurrent.futures import Future
+from src.fingerprint import dataframe_fingerprint
+
+CACHE_PATH = os.path.join("data", "llm_cache.sqlite")
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_ENTRIES = 5000
+
+
+# -------------------------------------------------
+# Utility: Cache keys
+# -------------------------------------------------
+def normalize_query(query):
+    """Case/whitespace-insensitive form of a question, trailing punctuation dropped."""
+    text = re.sub(r"\s+", " ", str(query)).strip().lower()
+    return text.rstrip(" ?.!")
+
+
+def schema_fingerprint(data_lake):
+    """Hash of table names, column names and dtypes; the values themselves are ignored."""
+    sha = hashlib.sha256()
+    for name in sorted(data_lake):
+        df = data_lake[name]
+        sha.update(str(name).encode())
+        for col, dtype in zip(df.columns, df.dtypes):
+            sha.update(f"|{col}:{dtype}".encode())
+        sha.update(b";")
+    return sha.hexdigest()
+
+
+def content_fingerprint(data_lake):
+    """Hash of every table's content; the prompt embeds profile values (ranges, top values), not just the schema."""
+    sha = hashlib.sha256()
+    for name in sorted(data_lake):
+        sha.update(f"{name}:{dataframe_fingerprint(data_lake[name])};".encode())
+    return sha.hexdigest()
+
+
+def make_key(query, data_lake, model, other_tables=()):
+    """Key of an answer: model, the prompted tables' schema and content, the other table names and the query."""
+    raw = (f"{model}\x00{schema_fingerprint(data_lake)}\x00{content_fingerprint(data_lake)}"
+           f"\x00{chr(31).join(map(str, other_tables))}\x00{normalize_query(query)}")
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+# -------------------------------------------------
+# Two-tier cache
+# -------------------------------------------------
+class ResponseCache:
+    """
+    In-process LRU in front of a SQLite store, both with a TTL.
+    Concurrent lookups of the same missing key share a single computation.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=DEFAULT_TTL,
+                 memory_entries=DEFAULT_MEMORY_ENTRIES, disk_entries=DEFAULT_DISK_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.metrics = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0}
+
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, value TEXT, created REAL, accessed REAL)"
+                )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # --- memory tier ---
+    def _memory_get(self, key, now):
+        item = self._memory.get(key)
+        if item is None:
+            return None
+        created, value = item
+        if now - created > self.ttl:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return value
+
+    def _memory_put(self, key, value, created):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    # --- disk tier ---
+    def _disk_get(self, key, now):
+        if not self.path:
+            return None
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(row[0]), row[1]
+
+    def _disk_put(self, key, value, now):
+        if not self.path:
+            return
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            # Least recently accessed rows go first once the store is full
+            conn.execute(
+                "DELETE FROM responses WHERE key NOT IN "
+                "(SELECT key FROM responses ORDER BY accessed DESC LIMIT ?)",
+                (self.disk_entries,),
+            )
+
+    # --- public API ---
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            value = self._memory_get(key, now)
+            if value is not None:
+                self.metrics["memory_hits"] += 1
+                return value
+        found = self._disk_get(key, now)
+        if found is None:
+            return None
+        value, created = found
+        with self._lock:
+            self.metrics["disk_hits"] += 1
+            self._memory_put(key, value, created)
+        return value
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._memory_put(key, value, now)
+        self._disk_put(key, value, now)
+
+    def claim(self, key):
+        """
+        Look up `key` for a caller that will compute it itself. Returns
+        (value, future, owner): the cached value if there is one; otherwise
+        the in-flight future, with owner=True when this caller registered it
+        and must finish it with settle().
+        """
+        value = self.get(key)
+        if value is not None:
+            return value, None, False
+
+        with self._lock:
+            # Another caller may have finished computing since our lookup
+            value = self._memory_get(key, time.time())
+            if value is not None:
+                self.metrics["memory_hits"] += 1
+                return value, None, False
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self.metrics["misses"] += 1
+            else:
+                self.metrics["coalesced"] += 1
+        return None, future, owner
+
+    def settle(self, key, future, value=None, error=None, cacheable=lambda value: True):
+        """Finish a claim(): store `value` and hand it to the waiters, or fail them with `error`."""
+        try:
+            if error is not None:
+                future.set_exception(error)
+                return
+            if cacheable(value):
+                self.put(key, value)
+            future.set_result(value)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def get_or_compute(self, key, compute, cacheable=lambda value: True):
+        """
+        Return the cached value for `key`, or run `compute()` once for all
+        concurrent callers asking for the same key.
+        """
+        value, future, owner = self.claim(key)
+        if value is not None:
+            return value
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            self.settle(key, future, error=e)
+            raise
+        self.settle(key, future, value, cacheable=cacheable)
+        return value
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.metrics)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = (lookups - stats["misses"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM responses")
@@ -0,0 +1,200 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+from src.artifacts import make_artifact
+
+# Tables at least this long are answered progressively: sample first, full data after
+PROGRESSIVE_MIN_ROWS = int(os.getenv("DATATALK_PROGRESSIVE_MIN_ROWS", "1000000"))
+SAMPLE_ROWS = int(os.getenv("DATATALK_SAMPLE_ROWS", "50000"))
+# Half-samples the preview is re-run on to estimate confidence intervals
+REPLICATES = 8
+# Replicate number of the run on every table stacked twice (see scaling())
+DOUBLED = -1
+MAX_STRATA = 50
+Z_95 = 1.96
+
+
+# -------------------------------------------------
+# Stratified sample (kept once per dataset in the registry)
+# -------------------------------------------------
+def strata_column(df, max_strata=MAX_STRATA):
+    """The categorical (or bool) column with the most groups, up to `max_strata`."""
+    best, best_groups = None, 1
+    for col in df.columns:
+        dtype = df[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            groups = len(dtype.categories)
+        elif pd.api.types.is_bool_dtype(dtype):
+            groups = 2
+        else:
+            continue
+        if best_groups < groups <= max_strata:
+            best, best_groups = col, groups
+    return best
+
+
+def stratified_sample(df, rows=SAMPLE_ROWS, seed=0):
+    """
+    `rows` rows drawn proportionally from every group of the strata column,
+    in original order. Fractional quotas are rounded up or down at random
+    (systematically, so the total is exactly `rows`): every row has the same
+    chance rows/len(df) of being drawn, which keeps totals scaled up from
+    the sample unbiased. A group smaller than len(df)/rows may be left out.
+    Falls back to a simple random sample when there is nothing to stratify on.
+    """
+    if len(df) <= rows:
+        return df
+    rng = np.random.default_rng(seed)
+    col = strata_column(df)
+    if col is None:
+        return df.iloc[np.sort(rng.choice(len(df), rows, replace=False))]
+
+    codes = df[col].astype("category").cat.codes.to_numpy()
+    codes = codes.astype(np.int64) + 1  # missing values (-1) become their own group 0
+    counts = np.bincount(codes)
+    bounds = np.floor(np.cumsum(counts * rows / len(df)) + rng.random()).astype(np.int64)
+    quota = np.diff(bounds, prepend=0)
+
+    # Shuffle, then group stably: each group's first `quota` rows are a random draw from it
+    order = rng.permutation(len(df))
+    grouped = order[np.argsort(codes[order], kind="stable")]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rank = np.arange(len(df)) - np.repeat(starts, counts)
+    picked = grouped[rank < np.repeat(quota, counts)]
+    return df.iloc[np.sort(picked)]
+
+
+def sample_dataset(handle, rows=SAMPLE_ROWS):
+    """Handle to the stratified sample of a registered dataset, drawn once and shared."""
+    from src.dataset_registry import get_registry
+
+    return get_registry().cleaned(handle, stratified_sample, {"rows": rows}, name=f"{handle.name} (sample)")
+
+
+def needs_sampling(handle):
+    return handle.rows() >= PROGRESSIVE_MIN_ROWS
+
+
+def doubled(df):
+    """`df` stacked on itself: totals double, means and ratios stay put."""
+    return pd.concat([df, df], ignore_index=True)
+
+
+def half_sample(df, replicate):
+    """A fixed random half of `df`; replicate k always picks the same rows."""
+    rng = np.random.default_rng(10_007 + replicate)
+    return df.iloc[np.sort(rng.choice(len(df), len(df) // 2, replace=False))]
+
+
+# -------------------------------------------------
+# Preview annotation
+# -------------------------------------------------
+_NUMBER = re.compile(r"^\s*([^\d\-+.]*)([-+]?[\d,]*\.?\d+(?:[eE][-+]?\d+)?)\s*(.*?)\s*$")
+
+
+def _parse_number(value):
+    """(number, prefix, suffix) of a metric value such as 1234, '$1,234.5' or '12%'."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value), "", ""
+    if isinstance(value, str):
+        match = _NUMBER.match(value)
+        if match:
+            try:
+                return float(match.group(2).replace(",", "")), match.group(1), match.group(3)
+            except ValueError:
+                return None
+    return None
+
+
+def _metric_value(artifact):
+    if artifact["call"] != "metric":
+        return None
+    if len(artifact["args"]) > 1:
+        return artifact["args"][1]
+    return artifact["kwargs"].get("value")
+
+
+def _format(number):
+    """Four significant digits, thousands separators, no scientific notation."""
+    if number == 0 or not np.isfinite(number):
+        return f"{number:g}"
+    digits = 3 - int(np.floor(np.log10(abs(number))))
+    return f"{round(number, digits):,.{max(digits, 0)}f}"
+
+
+def scaling(value, stacked):
+    """
+    How a metric depends on the number of rows, from its value on the sample
+    and on the sample stacked twice: "total" if it doubled (sums, counts),
+    "level" if it did not move (means, ratios, extremes), None otherwise
+    (e.g. a standard deviation), in which case it cannot be scaled.
+    """
+    if np.isclose(stacked, value, rtol=1e-6, atol=0):
+        return "level"
+    if np.isclose(stacked, 2 * value, rtol=1e-6, atol=0):
+        return "total"
+    return None
+
+
+def _estimate(value, halves, scale, kind):
+    """
+    Full-data estimate and 95% CI half-width from the value on the sample and
+    on its half-samples. A total is scaled up to the full data; anything else
+    is taken as is. The spread over half-samples of the same sample
+    approximates the sampling error of the whole sample.
+    """
+    halves = np.asarray(halves, dtype=float)
+    if kind == "total":
+        return value * scale, Z_95 * 2 * scale * halves.std(ddof=1)
+    return value, Z_95 * halves.std(ddof=1)
+
+
+def _metric_number(artifacts, index):
+    if artifacts is None:
+        return None
+    parsed = _parse_number(_metric_value(artifacts[index]))
+    return parsed[0] if parsed is not None else None
+
+
+def annotate_preview(artifacts, replicate_artifacts, sample_rows, full_rows):
+    """
+    Preview artifacts from a run on the sample: a banner, and every numeric
+    st.metric turned into a full-data estimate with its 95% confidence
+    interval. `replicate_artifacts` are the run_replicated replicas (the
+    stacked run first). A metric that is neither a total nor a level is
+    shown unscaled and labelled as the sample's value.
+    """
+    scale = full_rows / sample_rows if sample_rows else 1.0
+    banner = make_artifact("info", [
+        f"⚡ Preview from a stratified sample of {sample_rows:,} of {full_rows:,} rows. "
+        "Refining on the full data…"
+    ], {})
+    replicate_artifacts = [
+        replica if replica is not None and len(replica) == len(artifacts) else None
+        for replica in replicate_artifacts
+    ]
+    stacked, halves_artifacts = (replicate_artifacts[0], replicate_artifacts[1:]) if replicate_artifacts else (None, [])
+    preview = [banner]
+    for index, artifact in enumerate(artifacts):
+        preview.append(artifact)
+        parsed = _parse_number(_metric_value(artifact))
+        if parsed is None:
+            continue
+        halves = [number for number in (_metric_number(replica, index) for replica in halves_artifacts)
+                  if number is not None]
+        if len(halves) < 2:
+            continue
+        value, prefix, suffix = parsed
+        stacked_value = _metric_number(stacked, index)
+        kind = scaling(value, stacked_value) if stacked_value is not None else None
+        estimate, half_width = _estimate(value, halves, scale, kind)
+        label = artifact["args"][0] if artifact["args"] else artifact["kwargs"].get("label", "")
+        marker = "(≈)" if kind is not None else "(sample)"
+        preview[-1] = make_artifact("metric", [f"{label} {marker}", f"{prefix}{_format(estimate)}{suffix}"], {})
+        preview.append(make_artifact("caption", [
+            f"95% CI: {prefix}{_format(estimate - half_width)}{suffix} – {prefix}{_format(estimate + half_width)}{suffix}"
+        ], {}))
+    return preview
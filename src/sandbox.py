@@ -0,0 +1,360 @@
+import os
+import glob
+import threading
+import multiprocessing as mp
+import pandas as pd
+from src.artifacts import RECORDED_CALLS, NotReplayable, make_artifact
+from src.fingerprint import dataframe_fingerprint
+from src.data_lake import LazyDataLake
+from src.sql_engine import make_sql_runner
+from src.sampling import DOUBLED, half_sample, doubled
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, the executor runs code in-process
+    resource = None
+
+SANDBOX_DIR = os.path.join("data", ".sandbox")
+DEFAULT_WORKERS = int(os.getenv("DATATALK_SANDBOX_WORKERS", "2"))
+DEFAULT_CPU_SECONDS = 20
+DEFAULT_WALL_SECONDS = 30
+DEFAULT_MEMORY_BYTES = 2 * 1024 ** 3
+MAX_EXPORTS = 8
+MAX_WORKER_TABLES = 4
+
+
+def sandbox_enabled():
+    return resource is not None and os.getenv("DATATALK_SANDBOX", "1") != "0"
+
+
+# -------------------------------------------------
+# Dataset hand-off: written once per content, memory-mapped by workers
+# -------------------------------------------------
+def _arrow_safe(df):
+    """`df` with object columns Arrow cannot type (ints mixed with text, say) turned into text."""
+    import pyarrow as pa
+
+    mixed = []
+    for col in df.columns:
+        if df[col].dtype == object:
+            try:
+                pa.array(df[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                mixed.append(col)
+    if not mixed:
+        return df
+    df = df.copy(deep=False)
+    for col in mixed:
+        df[col] = df[col].astype("str")
+    return df
+
+
+def export_dataset(df, export_dir=SANDBOX_DIR):
+    """
+    Write `df` as an Arrow file named by its fingerprint (once) and return the path.
+    Object columns mixing types are exported as text, as read_csv would read them.
+    """
+    import pyarrow as pa
+    from pyarrow import feather
+
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, f"{dataframe_fingerprint(df)}.arrow")
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            feather.write_feather(df, tmp_path, compression="uncompressed")
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            feather.write_feather(_arrow_safe(df), tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+        # Keep only the most recent exports on disk
+        exports = sorted(glob.glob(os.path.join(export_dir, "*.arrow")), key=os.path.getmtime)
+        for old in exports[:-MAX_EXPORTS]:
+            os.remove(old)
+    return path
+
+
+# -------------------------------------------------
+# Worker side
+# -------------------------------------------------
+class RecordOnlyStreamlit:
+    """
+    `st` inside a worker (or a background run): there is no UI, so render calls are only recorded.
+    Layout helpers return the recorder itself so `with col:` and
+    `col.metric(...)` still work; anything else is a no-op.
+    """
+
+    def __init__(self):
+        self.artifacts = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def sidebar(self):
+        return self
+
+    def _record(self, name, args, kwargs):
+        try:
+            self.artifacts.append(make_artifact(name, args, kwargs))
+        except NotReplayable as e:
+            self.artifacts.append(make_artifact(
+                "warning", [f"Output of type {e} cannot be displayed from the sandbox."], {}
+            ))
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name in RECORDED_CALLS:
+            return lambda *args, **kwargs: self._record(name, args, kwargs)
+        if name in ("columns", "tabs"):
+            return lambda spec, *args, **kwargs: [self] * (spec if isinstance(spec, int) else len(spec))
+        if name in ("container", "expander", "empty", "form", "popover"):
+            return lambda *args, **kwargs: self
+        return lambda *args, **kwargs: None
+
+
+def _address_space():
+    """Current virtual memory size of this process in bytes (Linux), or None."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _set_limits(cpu_seconds, memory_bytes):
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime)
+    resource.setrlimit(resource.RLIMIT_CPU, (used + cpu_seconds, resource.RLIM_INFINITY))
+    current = _address_space()
+    if current is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (current + memory_bytes, resource.RLIM_INFINITY))
+
+
+def _clear_limits():
+    resource.setrlimit(resource.RLIMIT_CPU, (resource.RLIM_INFINITY, resource.RLIM_INFINITY))
+    resource.setrlimit(resource.RLIMIT_AS, (resource.RLIM_INFINITY, resource.RLIM_INFINITY))
+
+
+def run_recorded(code, data_lake, cpu_seconds=None, memory_bytes=None):
+    """
+    Run `code` against a LazyDataLake with a record-only `st`; returns
+    (success, error, artifacts). Limits apply when given (worker processes).
+    """
+    import plotly.express as px
+
+    recorder = RecordOnlyStreamlit()
+    try:
+        context = {
+            "pd": pd, "px": px, "st": recorder,
+            "data_lake": data_lake,
+            "df": data_lake[next(iter(data_lake))] if data_lake else None,
+            "sql": make_sql_runner(data_lake, recorder)
+        }
+        if cpu_seconds is not None:
+            _set_limits(cpu_seconds, memory_bytes)
+        try:
+            exec(code, context)
+        finally:
+            if cpu_seconds is not None:
+                _clear_limits()
+        return True, None, recorder.artifacts
+    except MemoryError:
+        return False, "Memory limit exceeded", recorder.artifacts
+    except Exception as e:
+        return False, str(e), recorder.artifacts
+
+
+def replicate_lake(data_lake, replicate):
+    """
+    The same tables, each reduced to its fixed half-sample number `replicate`,
+    or stacked twice for replicate sampling.DOUBLED.
+    """
+    reduce = doubled if replicate == DOUBLED else (lambda df: half_sample(df, replicate))
+    return LazyDataLake({name: (lambda n=name: reduce(data_lake[n])) for name in data_lake})
+
+
+def run_replicated(code, data_lake, replicates, cpu_seconds=None, memory_bytes=None):
+    """
+    run_recorded, then the same code once on every table stacked twice and
+    on `replicates` half-samples; only when the first run succeeded and drew
+    a metric, the only output the replicates are used for. Returns
+    (success, error, artifacts, [artifacts or None per replicate]), the
+    stacked run first.
+    """
+    success, error, artifacts = run_recorded(code, data_lake, cpu_seconds, memory_bytes)
+    replicas = []
+    if success and any(artifact["call"] == "metric" for artifact in artifacts):
+        for replicate in [DOUBLED, *range(replicates)]:
+            ok, _, replica = run_recorded(code, replicate_lake(data_lake, replicate), cpu_seconds, memory_bytes)
+            replicas.append(replica if ok else None)
+    return success, error, artifacts, replicas
+
+
+def _worker_main(conn, cpu_seconds, memory_bytes):
+    import signal
+    from pyarrow import feather
+
+    def on_cpu_limit(signum, frame):
+        raise TimeoutError(f"CPU time limit of {cpu_seconds}s exceeded")
+
+    signal.signal(signal.SIGXCPU, on_cpu_limit)
+    tables = {}
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+
+        code, lake_paths, replicates = message
+
+        def load(path):
+            if path not in tables:
+                if len(tables) >= MAX_WORKER_TABLES:
+                    tables.pop(next(iter(tables)))
+                tables[path] = feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+            # Each call gets its own shallow view: the cached frame is read-only
+            # (memory-mapped) and shared by later calls, so writes must copy first
+            return tables[path].copy(deep=False)
+
+        # Tables are read from their Arrow files on first access only
+        data_lake = LazyDataLake({name: (lambda p=path: load(p)) for name, path in lake_paths.items()})
+        conn.send(run_replicated(code, data_lake, replicates, cpu_seconds, memory_bytes))
+
+
+# -------------------------------------------------
+# Parent side
+# -------------------------------------------------
+class SandboxPool:
+    """
+    Pre-started worker processes that run generated code with CPU-time and
+    memory limits. A worker that times out or dies is killed and replaced;
+    other sessions keep using the remaining workers.
+
+    Background runs (precomputed follow-ups) only take a worker nobody is
+    waiting for, and leave one idle for questions when the pool has more
+    than one worker, so a question does not queue behind them.
+    """
+
+    def __init__(self, size=DEFAULT_WORKERS, cpu_seconds=DEFAULT_CPU_SECONDS,
+                 wall_seconds=DEFAULT_WALL_SECONDS, memory_bytes=DEFAULT_MEMORY_BYTES):
+        self.cpu_seconds = cpu_seconds
+        self.wall_seconds = wall_seconds
+        self.memory_bytes = memory_bytes
+        self.recycled = 0
+        self._ctx = mp.get_context("spawn")
+        self._idle = []
+        self._available = threading.Condition()
+        self._waiting = 0  # foreground callers blocked on a worker
+        self.reserved = 1 if size > 1 else 0
+        for _ in range(size):
+            self._idle.append(self._spawn())
+
+    def _spawn(self):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.cpu_seconds, self.memory_bytes),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    def _recycle(self, worker):
+        process, conn = worker
+        process.kill()
+        process.join(timeout=5)
+        conn.close()
+        self.recycled += 1
+        return self._spawn()
+
+    def _checkout(self, background):
+        with self._available:
+            if background:
+                while self._waiting or len(self._idle) <= self.reserved:
+                    self._available.wait()
+                return self._idle.pop()
+            self._waiting += 1
+            while not self._idle:
+                self._available.wait()
+            self._waiting -= 1
+            worker = self._idle.pop()
+            # Background runs held back for this caller may go if workers are left
+            self._available.notify_all()
+            return worker
+
+    def _checkin(self, worker):
+        with self._available:
+            self._idle.append(worker)
+            self._available.notify_all()
+
+    def run(self, code, lake_paths, background=False):
+        """Run `code` against {name: arrow_path}; returns (success, error, artifacts)."""
+        return self.run_replicated(code, lake_paths, 0, background)[:3]
+
+    def run_replicated(self, code, lake_paths, replicates, background=False):
+        """run() plus `replicates` half-sample re-runs; returns (success, error, artifacts, replicas)."""
+        worker = self._checkout(background)
+        process, conn = worker
+        try:
+            conn.send((code, lake_paths, replicates))
+            if conn.poll(self.wall_seconds):
+                result = conn.recv()
+            else:
+                result = (False, f"Execution timed out after {self.wall_seconds}s", None, [])
+                worker = self._recycle(worker)
+        except (EOFError, OSError):
+            result = (False, "Execution worker crashed (possibly out of memory)", None, [])
+            worker = self._recycle(worker)
+        finally:
+            self._checkin(worker if worker[0].is_alive() else self._recycle(worker))
+        return result
+
+    def shutdown(self):
+        with self._available:
+            workers, self._idle = self._idle, []
+        for process, conn in workers:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            process.join(timeout=1)
+            if process.is_alive():
+                process.kill()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool():
+    """Process-wide pool, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SandboxPool()
+    return _pool
+
+
+def run_sandboxed(code, data_lake, replicates=None, background=False):
+    """
+    Export the lake's frames (once per content) and run `code` in the pool.
+    With `replicates`, also re-run it on that many half-samples (see run_replicated).
+    `background` runs yield to foreground ones (see SandboxPool).
+    """
+    try:
+        lake_paths = {name: export_dataset(df) for name, df in data_lake.items()}
+    except Exception as e:
+        # Reported like a crashed run: no artifacts, the executor draws the error
+        error = f"Could not hand the data to the sandbox: {e}"
+        return (False, error, None) if replicates is None else (False, error, None, [])
+    if replicates is None:
+        return get_sandbox_pool().run(code, lake_paths, background)
+    return get_sandbox_pool().run_replicated(code, lake_paths, replicates, background)
@@ -0,0 +1,115 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.response_cache import normalize_query
+from src.llm_handler import ask_ai
+from src.executor import execute_silently
+from src.tracing import span, incr
+
+# Follow-up suggestions answered ahead of a click, and how long those answers stay usable
+MAX_SPECULATIONS = int(os.getenv("DATATALK_SPECULATIONS", "3"))
+SPECULATION_TTL = float(os.getenv("DATATALK_SPECULATION_TTL", "300"))
+# Shared by every session, so background work never takes more than this many threads
+SPECULATION_WORKERS = 2
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=SPECULATION_WORKERS, thread_name_prefix="datatalk-speculate")
+    return _pool
+
+
+def speculation_enabled():
+    return MAX_SPECULATIONS > 0
+
+
+def _resolve(query, data_lake, mode, cancelled):
+    """
+    Generate and run the answer to `query` without drawing anything.
+    Returns (code, suggestions, response_text, artifacts), or None when the
+    round was cancelled or there is nothing worth replaying.
+    """
+    if cancelled.is_set():
+        return None
+    with span("speculate", mode=mode) as attrs:
+        # Goes through the response cache, so even a cancelled run leaves the answer warm.
+        # No st.warning from this thread; a fallback shows up in the provider stats
+        code, suggestions, response_text = ask_ai(query, data_lake, mode=mode, notify=None)
+        if not code or cancelled.is_set():
+            attrs["cancelled"] = cancelled.is_set()
+            return None
+        success, _, artifacts = execute_silently(code, data_lake, background=True)
+        attrs["success"] = success
+    if not success or cancelled.is_set():
+        return None
+    return code, list(suggestions), response_text, artifacts
+
+
+class Speculation:
+    """
+    One session's precomputed answers to the follow-up suggestions on screen.
+    A round is one set of suggestions for one dataset and mode; starting a
+    different round (or cancel()) drops whatever the previous one had going.
+    Answers older than `ttl` seconds are discarded instead of served.
+    """
+
+    def __init__(self, limit=MAX_SPECULATIONS, ttl=SPECULATION_TTL):
+        self.limit = limit
+        self.ttl = ttl
+        self.round = None
+        self._entries = {}  # normalized query -> (started, future)
+        self._cancelled = threading.Event()
+
+    def start(self, suggestions, data_lake, fingerprint, mode="pandas"):
+        """Resolve the top suggestions in the background; a no-op while the round is unchanged."""
+        queries = list(suggestions)[:self.limit]
+        round_key = (fingerprint, mode, tuple(queries))
+        if round_key == self.round:
+            self._expire()
+            return
+        self.cancel()
+        if not queries:
+            return
+        self.round = round_key
+        self._cancelled = threading.Event()
+        started = time.time()
+        for query in queries:
+            future = _get_pool().submit(_resolve, query, data_lake, mode, self._cancelled)
+            self._entries[normalize_query(query)] = (started, future)
+
+    def take(self, query):
+        """The finished (code, suggestions, response_text, artifacts) for `query`, or None."""
+        entry = self._entries.pop(normalize_query(query), None)
+        result = None
+        if entry is not None:
+            started, future = entry
+            fresh = time.time() - started <= self.ttl
+            if fresh and future.done() and not future.cancelled() and future.exception() is None:
+                result = future.result()
+        incr("speculation_hits_total" if result is not None else "speculation_misses_total")
+        return result
+
+    def cancel(self):
+        """Drop the current round; queued work is cancelled, running work stops at its next step."""
+        self._cancelled.set()
+        for _, future in self._entries.values():
+            if future.cancel():
+                incr("speculation_cancelled_total")
+        self._entries.clear()
+        self.round = None
+
+    def _expire(self):
+        now = time.time()
+        for query, (started, future) in list(self._entries.items()):
+            if now - started > self.ttl:
+                future.cancel()
+                del self._entries[query]
+
+    def pending(self):
+        return sum(not future.done() for _, future in self._entries.values())
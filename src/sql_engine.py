@@ -0,0 +1,73 @@
+import re
+import warnings
+from src.data_lake import referenced_tables
+
+try:
+    import duckdb
+except ImportError:  # SQL mode is only offered when DuckDB is installed
+    duckdb = None
+
+# Results are meant to be small (aggregates for st.metric / px); cap what comes back
+MAX_RESULT_ROWS = 10_000
+
+_READ_ONLY = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+
+
+def sql_available():
+    return duckdb is not None
+
+
+def _as_arrow(frame):
+    """
+    Arrow view of a frame for DuckDB: numeric and Arrow-backed string columns
+    convert without copying, and DuckDB then scans them far faster than it
+    scans pandas string columns directly.
+    """
+    import pyarrow as pa
+
+    try:
+        return pa.Table.from_pandas(frame, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed-type object columns: let DuckDB read the frame itself
+        return frame
+
+
+def run_sql(query, data_lake, max_rows=MAX_RESULT_ROWS, on_truncate=None):
+    """
+    Run a read-only SQL query over the data lake's tables with DuckDB.
+    Only the tables the query names are registered; the result comes back
+    as a DataFrame of at most `max_rows` rows. A longer result is cut with
+    `.attrs["truncated"]` set and the notice passed to `on_truncate` (a
+    warning if not given).
+    """
+    if duckdb is None:
+        raise RuntimeError("SQL mode needs DuckDB. Install it with `pip install duckdb`.")
+    query = str(query).strip().rstrip(";")
+    if not _READ_ONLY.match(query):
+        raise ValueError("Only SELECT queries can be run on the data lake.")
+
+    con = duckdb.connect(database=":memory:")
+    try:
+        for name in referenced_tables(query, data_lake, by_columns=False):
+            con.register(name, _as_arrow(data_lake[name]))
+        # One row past the cap tells a full result from a cut one
+        result = con.execute(f"SELECT * FROM ({query}) AS result LIMIT {int(max_rows) + 1}").df()
+    finally:
+        con.close()
+    truncated = len(result) > max_rows
+    if truncated:
+        result = result.iloc[:max_rows]
+        notice = (f"SQL result cut to its first {max_rows:,} rows; "
+                  "aggregate in the query to see all of it.")
+        if on_truncate is None:
+            warnings.warn(notice, stacklevel=2)
+        else:
+            on_truncate(notice)
+    result.attrs["truncated"] = truncated
+    return result
+
+
+def make_sql_runner(data_lake, st=None):
+    """The `sql(query)` helper handed to generated code; truncation notices go to `st.warning` if given."""
+    on_truncate = st.warning if st is not None else None
+    return lambda query: run_sql(query, data_lake, on_truncate=on_truncate)
@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+from collections import deque, defaultdict
+
+# Finished traces kept for the developer panel and the JSON export
+MAX_TRACES = int(os.getenv("DATATALK_MAX_TRACES", "50"))
+METRIC_PREFIX = "datatalk"
+
+# The span currently open in this thread / task: (trace, span) or None
+_current = contextvars.ContextVar("datatalk_span", default=None)
+
+
+class Tracer:
+    """
+    Minimal in-process tracer. A trace is a tree of timed spans (one chat
+    turn, one upload, ...); counters are labelled totals such as tokens,
+    bytes and provider errors. Spans opened outside any trace start their
+    own. Every span also feeds per-name totals for the Prometheus export.
+    """
+
+    def __init__(self, max_traces=MAX_TRACES):
+        self._lock = threading.Lock()
+        self.traces = deque(maxlen=max_traces)
+        self.counters = defaultdict(float)
+        self.span_totals = defaultdict(lambda: [0, 0.0])  # name -> [count, seconds]
+
+    # -------------------------------------------------
+    # Spans
+    # -------------------------------------------------
+    @contextmanager
+    def span(self, name, **attrs):
+        """Time the block as a span; yields its attribute dict so callers can add to it."""
+        parent = _current.get()
+        start = time.perf_counter()
+        if parent is None:
+            trace, parent_index = _new_trace(name, start), None
+        else:
+            trace, parent_index = parent
+        span = _new_span(name, parent_index, start - trace["_t0"], attrs)
+        with self._lock:
+            trace["spans"].append(span)
+            index = len(trace["spans"]) - 1
+        token = _current.set((trace, index))
+        try:
+            yield span["attrs"]
+        except BaseException as e:
+            span["attrs"]["error"] = type(e).__name__
+            raise
+        finally:
+            _current.reset(token)
+            self._finish(span, time.perf_counter() - start)
+            if parent is None:
+                self._close_trace(trace)
+
+    def record(self, name, seconds, **attrs):
+        """Add a span timed elsewhere (e.g. across generator yields) to the current trace."""
+        parent = _current.get()
+        start = time.perf_counter() - seconds
+        if parent is None:
+            trace, parent_index = _new_trace(name, start), None
+        else:
+            trace, parent_index = parent
+        span = _new_span(name, parent_index, max(start - trace["_t0"], 0.0), attrs)
+        with self._lock:
+            trace["spans"].append(span)
+        self._finish(span, seconds)
+        if parent is None:
+            self._close_trace(trace)
+
+    def _finish(self, span, seconds):
+        span["seconds"] = round(seconds, 6)
+        with self._lock:
+            totals = self.span_totals[span["name"]]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def _close_trace(self, trace):
+        trace.pop("_t0", None)
+        trace["seconds"] = trace["spans"][0]["seconds"]
+        with self._lock:
+            self.traces.append(trace)
+
+    # -------------------------------------------------
+    # Counters
+    # -------------------------------------------------
+    def incr(self, name, value=1, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self.counters[key] += value
+        parent = _current.get()
+        if parent is not None:
+            # Also tally on the trace so one turn's tokens/bytes can be read back
+            trace, _ = parent
+            with self._lock:
+                totals = trace.setdefault("counters", {})
+                totals[name] = totals.get(name, 0) + value
+
+    # -------------------------------------------------
+    # Export
+    # -------------------------------------------------
+    def recent(self, limit=None, name=None):
+        with self._lock:
+            traces = [t for t in self.traces if name is None or t["name"] == name]
+        return traces[-limit:] if limit else traces
+
+    def export_json(self, limit=None):
+        with self._lock:
+            counters = [{"name": n, "labels": dict(labels), "value": v} for (n, labels), v in self.counters.items()]
+            spans = {n: {"count": c, "seconds": round(s, 6)} for n, (c, s) in self.span_totals.items()}
+        return json.dumps({"traces": self.recent(limit), "counters": counters, "spans": spans},
+                          indent=2, default=str)
+
+    def export_prometheus(self):
+        """Counters and per-span time totals in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self.counters)
+            spans = {n: tuple(v) for n, v in self.span_totals.items()}
+        lines = []
+        declared = set()
+        for (name, labels), value in sorted(counters.items()):
+            metric = f"{METRIC_PREFIX}_{name}"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            lines.append(f"{metric}{_labels(labels)} {value:g}")
+        if spans:
+            lines.append(f"# TYPE {METRIC_PREFIX}_span_seconds summary")
+            for name, (count, seconds) in sorted(spans.items()):
+                lines.append(f'{METRIC_PREFIX}_span_seconds_sum{{span="{name}"}} {seconds:.6f}')
+                lines.append(f'{METRIC_PREFIX}_span_seconds_count{{span="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def breakdown(self, limit=10, name=None):
+        """One row per recent trace with the total seconds spent in each span name."""
+        rows = []
+        for trace in self.recent(limit, name):
+            row = {"trace": trace["id"], "name": trace["name"], "total": trace["seconds"]}
+            for span in trace["spans"][1:]:
+                row[span["name"]] = round(row.get(span["name"], 0.0) + span["seconds"], 6)
+            row.update(trace.get("counters", {}))
+            rows.append(row)
+        return rows
+
+    def clear(self):
+        with self._lock:
+            self.traces.clear()
+            self.counters.clear()
+            self.span_totals.clear()
+
+
+def _new_trace(name, t0):
+    started = time.time() - (time.perf_counter() - t0)
+    return {"id": uuid.uuid4().hex[:12], "name": name, "started": started, "spans": [], "_t0": t0}
+
+
+def _new_span(name, parent_index, offset, attrs):
+    return {"name": name, "parent": parent_index, "offset": round(offset, 6), "seconds": None, "attrs": dict(attrs)}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """Process-wide tracer, created on first use."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+    return _tracer
+
+
+def span(name, **attrs):
+    return get_tracer().span(name, **attrs)
+
+
+def incr(name, value=1, **labels):
+    get_tracer().incr(name, value, **labels)
@@ -0,0 +1,234 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from src.binning import other_label
+
+# Frames up to this size are drawn from raw rows, exactly as before
+RAW_ROW_LIMIT = 5_000
+MAX_CATEGORIES = 25
+MAX_LINE_POINTS = 2_000
+SCATTER_BINS = 120
+# Points beyond the whiskers drawn per box when the quartiles are precomputed
+MAX_OUTLIERS = 200
+
+
+# -------------------------------------------------
+# Utility: Category capping and downsampling
+# -------------------------------------------------
+def cap_categories(grouped, max_categories=MAX_CATEGORIES):
+    """Keep the largest `max_categories - 1` groups of a Series and fold the rest into one 'Other' group."""
+    if len(grouped) <= max_categories:
+        return grouped
+    top = grouped.sort_values(ascending=False)
+    kept = top.iloc[:max_categories - 1]
+    kept.index = kept.index.astype(str)
+    rest = top.iloc[max_categories - 1:]
+    other = pd.Series([rest.sum()], index=[other_label(kept.index, len(rest))])
+    return pd.concat([kept, other])
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of `n_out` points that preserve the line's shape."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        nxt_start, nxt_stop = edges[i + 1], (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x = x[nxt_start:nxt_stop].mean()
+        avg_y = y[nxt_start:nxt_stop].mean()
+        bx, by = x[start:stop], y[start:stop]
+        area = np.abs((x[prev] - avg_x) * (by - y[prev]) - (x[prev] - bx) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(area))
+        keep[i + 1] = prev
+    return keep
+
+
+def minmax_indices(y, n_out):
+    """Keep the min and max of each of `n_out // 2` consecutive buckets (row order preserved)."""
+    n = len(y)
+    buckets = max(1, n_out // 2)
+    if n <= n_out:
+        return np.arange(n)
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    picked = []
+    for start, stop in zip(edges[:-1], edges[1:]):
+        if stop > start:
+            chunk = y[start:stop]
+            picked.extend((start + int(np.nanargmin(chunk)), start + int(np.nanargmax(chunk))))
+    return np.unique(picked)
+
+
+def _is_ordered_axis(series):
+    return pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series)
+
+
+def _as_float(series):
+    """Numbers as float64; datetimes as ns since epoch, whatever their resolution."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.to_numpy(dtype="datetime64[ns]").view("int64").astype(np.float64)
+    return series.to_numpy(dtype=np.float64)
+
+
+def _to_axis(values, series):
+    """Inverse of _as_float for plotting against `series`' axis."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return pd.to_datetime(np.asarray(values).astype("int64"))
+    return values
+
+
+# -------------------------------------------------
+# Per-chart preparation
+# -------------------------------------------------
+def _bar(df, x, y):
+    import plotly.express as px
+
+    if x == y:
+        return px.bar(df, x=x, y=y, color=x, template="plotly_white"), None
+    totals = cap_categories(df.groupby(x, observed=True)[y].sum())
+    data = totals.rename_axis(x).reset_index(name=y)
+    note = f"Aggregated to {len(data)} bars" if len(data) < len(df) else None
+    return px.bar(data, x=x, y=y, color=x, template="plotly_white"), note
+
+
+def _pie(df, x, y):
+    import plotly.express as px
+
+    if x == y:
+        return px.pie(df, names=x, values=y, hole=0.3, template="plotly_white"), None
+    totals = cap_categories(df.groupby(x, observed=True)[y].sum())
+    data = totals.rename_axis(x).reset_index(name=y)
+    return px.pie(data, names=x, values=y, hole=0.3, template="plotly_white"), None
+
+
+def _line(df, x, y):
+    import plotly.express as px
+
+    if len(df) <= MAX_LINE_POINTS or x == y:
+        return px.line(df, x=x, y=y, markers=True, template="plotly_white"), None
+    data = df[[x, y]].dropna()
+    if _is_ordered_axis(data[x]):
+        data = data.sort_values(x)
+        idx = lttb_indices(_as_float(data[x]), _as_float(data[y]), MAX_LINE_POINTS)
+        method = "LTTB"
+    else:
+        idx = minmax_indices(_as_float(data[y]), MAX_LINE_POINTS)
+        method = "min-max"
+    sampled = data.iloc[idx]
+    note = f"Showing {len(sampled):,} of {len(df):,} points ({method} downsampling)"
+    return px.line(sampled, x=x, y=y, markers=len(sampled) <= 500, template="plotly_white"), note
+
+
+def _scatter(df, x, y):
+    import plotly.express as px
+
+    if len(df) <= RAW_ROW_LIMIT or x == y:
+        return px.scatter(df, x=x, y=y, color=x, trendline="ols", template="plotly_white"), None
+
+    data = df[[x, y]].dropna()
+    if not _is_ordered_axis(data[x]):
+        # Categorical x: an even sample per category keeps every group visible
+        per_group = max(1, RAW_ROW_LIMIT // max(1, data[x].nunique()))
+        sampled = data.groupby(x, observed=True, group_keys=False).head(per_group)
+        note = f"Showing {len(sampled):,} of {len(df):,} points (up to {per_group} per category)"
+        return px.strip(sampled, x=x, y=y, template="plotly_white"), note
+
+    # Datetimes are binned on a continuous time axis like numbers
+    xs = _as_float(data[x])
+    ys = data[y].to_numpy(dtype=np.float64)
+    counts, x_edges, y_edges = np.histogram2d(xs, ys, bins=SCATTER_BINS)
+    fig = go.Figure(go.Heatmap(
+        z=np.where(counts.T > 0, counts.T, np.nan),
+        x=_to_axis((x_edges[:-1] + x_edges[1:]) / 2, data[x]),
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        colorscale="Viridis",
+        colorbar={"title": "rows"},
+    ))
+    # OLS trendline fitted on all rows (x centered, which epoch nanoseconds need), drawn as two points
+    center = xs.mean()
+    slope, intercept = np.polyfit(xs - center, ys, 1)
+    line_x = np.array([x_edges[0], x_edges[-1]])
+    fig.add_trace(go.Scatter(x=_to_axis(line_x, data[x]), y=slope * (line_x - center) + intercept, mode="lines",
+                             name="OLS trend", line={"color": "red"}))
+    fig.update_layout(template="plotly_white", xaxis_title=x, yaxis_title=y)
+    return fig, f"Density of {len(data):,} points in {SCATTER_BINS}x{SCATTER_BINS} bins"
+
+
+def _outlier_sample(values, limit=MAX_OUTLIERS, seed=0):
+    """Up to `limit` of a group's outliers: always its two most extreme, the rest at random."""
+    if len(values) <= limit:
+        return values
+    extremes = [values.idxmin(), values.idxmax()]
+    rest = values.drop(extremes)
+    return pd.concat([values.loc[extremes], rest.sample(limit - 2, random_state=seed)])
+
+
+def _box(df, x, y):
+    import plotly.express as px
+
+    if len(df) <= RAW_ROW_LIMIT or x == y:
+        return px.box(df, x=x, y=y, color=x, template="plotly_white"), None
+
+    data = df[[x, y]].dropna()
+    labels = data[x]
+    counts = labels.value_counts()
+    if len(counts) > MAX_CATEGORIES:
+        labels = labels.astype(str)
+        keep = counts.index[:MAX_CATEGORIES - 1].astype(str)
+        labels = labels.where(labels.isin(set(keep)), other_label(keep, len(counts) - len(keep)))
+
+    values = data[y]
+    grouped = values.groupby(labels, observed=True)
+    quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    iqr = quartiles[0.75] - quartiles[0.25]
+    # Whiskers at the most extreme values within 1.5 IQR of the box; beyond them are outliers
+    low_limit = (quartiles[0.25] - 1.5 * iqr).reindex(labels).to_numpy()
+    high_limit = (quartiles[0.75] + 1.5 * iqr).reindex(labels).to_numpy()
+    inside = (values.to_numpy() >= low_limit) & (values.to_numpy() <= high_limit)
+    lower = values[inside].groupby(labels[inside], observed=True).min()
+    upper = values[inside].groupby(labels[inside], observed=True).max()
+    outliers = values[~inside].groupby(labels[~inside], observed=True)
+
+    fig = go.Figure()
+    shown = 0
+    for name in quartiles.index:
+        fig.add_trace(go.Box(
+            name=str(name), x=[str(name)], legendgroup=str(name),
+            q1=[quartiles.at[name, 0.25]], median=[quartiles.at[name, 0.5]], q3=[quartiles.at[name, 0.75]],
+            lowerfence=[lower[name]], upperfence=[upper[name]],
+        ))
+        if name in outliers.groups:
+            points = _outlier_sample(outliers.get_group(name))
+            shown += len(points)
+            fig.add_trace(go.Scatter(
+                x=[str(name)] * len(points), y=points.to_numpy(), mode="markers", name=str(name),
+                legendgroup=str(name), showlegend=False, marker={"size": 4, "opacity": 0.6},
+            ))
+    fig.update_layout(template="plotly_white", xaxis_title=x, yaxis_title=y)
+    note = f"Precomputed quartiles for {len(quartiles)} groups ({len(data):,} rows)"
+    total = int((~inside).sum())
+    if total:
+        note += f"; {shown:,} of {total:,} outliers shown"
+    return fig, note
+
+
+_BUILDERS = {
+    "Bar Chart": _bar,
+    "Line Chart": _line,
+    "Scatter Plot": _scatter,
+    "Box Plot": _box,
+    "Pie Chart": _pie,
+}
+
+
+def build_chart(df, chart_type, x, y):
+    """
+    Aggregate/decimate `df` for `chart_type` before building the Plotly figure,
+    so the browser receives summaries instead of every row.
+    Returns (figure, note); note describes any reduction applied, else None.
+    """
+    return _BUILDERS[chart_type](df, x, y)
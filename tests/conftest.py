@@ -0,0 +1,11 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def _in_tmp_dir(tmp_path, monkeypatch):
+    """Stores, caches and exports write under data/; keep each test's files apart."""
+    monkeypatch.chdir(tmp_path)
@@ -0,0 +1,72 @@
+import tracemalloc
+import numpy as np
+import pandas as pd
+import pytest
+from src import binning
+from src.binning import build_binning_index
+
+
+def _frame(rows=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({f"x{i}": rng.lognormal(size=rows) * 10 ** i for i in range(5)})
+    df.loc[rng.choice(rows, 300, replace=False), "x1"] = np.nan
+    df["when"] = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 10 ** 6, rows), unit="s")
+    df["empty"] = np.nan
+    df["city"] = rng.choice(["oslo", "lima"], rows)
+    return df
+
+
+def _reference_box(series):
+    values = series.dropna().to_numpy(dtype=float)
+    if not len(values):
+        return None
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    return {"q1": q1, "median": median, "q3": q3,
+            "lowerfence": values[values >= q1 - 1.5 * iqr].min(),
+            "upperfence": values[values <= q3 + 1.5 * iqr].max()}
+
+
+@pytest.mark.parametrize("batch_bytes", [binning.BATCH_BYTES, 1])
+def test_index_matches_per_column_statistics(monkeypatch, batch_bytes):
+    monkeypatch.setattr(binning, "BATCH_BYTES", batch_bytes)
+    df = _frame()
+    index = build_binning_index(df, nbins=20)
+
+    for col in ["x0", "x1", "x2", "x3", "x4"]:
+        entry = index["columns"][col]
+        expected = _reference_box(df[col])
+        for key, value in expected.items():
+            assert entry["box"][key] == pytest.approx(value, rel=1e-12), (col, key)
+        assert entry["counts"].sum() == df[col].notna().sum()
+        assert entry["nulls"] == df[col].isna().sum()
+        np.testing.assert_array_equal(entry["counts"], np.histogram(df[col].dropna(), bins=entry["edges"])[0])
+
+    when = index["columns"]["when"]
+    assert when["kind"] == "datetime" and when["counts"].sum() == len(df)
+    assert np.isnan(index["columns"]["empty"]["box"]["q1"]) and index["columns"]["empty"]["nulls"] == len(df)
+    assert index["columns"]["city"]["kind"] == "categorical"
+
+
+def test_wide_frames_are_swept_in_bounded_batches(monkeypatch):
+    monkeypatch.setattr(binning, "BATCH_BYTES", 2 * 1024 ** 2)
+    rows, cols = 50_000, 80
+    df = pd.DataFrame(np.random.default_rng(1).normal(size=(rows, cols)), columns=[f"c{i}" for i in range(cols)])
+
+    tracemalloc.start()
+    build_binning_index(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # One float block of the whole frame would already be rows * cols * 8 bytes
+    assert peak < rows * cols * 8 / 2
+
+
+def test_other_bucket_never_merges_into_a_real_category():
+    values = ["Other"] * 500 + [f"v{i}" for i in range(200)]
+    index = build_binning_index(pd.DataFrame({"label": values}))
+    counts = index["columns"]["label"]["value_counts"]
+
+    assert counts["Other"] == 500
+    assert counts.sum() == len(values)
+    assert "Other (152 more)" in counts.index
@@ -0,0 +1,42 @@
+import sqlite3
+import threading
+from src.chat_store import ChatStore
+
+
+def test_conversations_are_scoped_to_their_owner():
+    store = ChatStore()
+    mine = store.start_conversation("session:a", dataset="sales")
+    store.start_conversation("session:b", dataset="sales")
+    store.append(mine, {"role": "user", "content": "total revenue?"})
+
+    listed = store.conversations("session:a", dataset="sales")
+
+    assert [c["id"] for c in listed] == [mine]
+    assert listed[0]["title"] == "total revenue?" and listed[0]["messages"] == 1
+    assert store.exists(mine, "session:a")
+    assert not store.exists(mine, "session:b")
+
+
+def test_concurrent_writes_do_not_hit_busy_timeouts():
+    store = ChatStore()
+    errors = []
+
+    def chat(owner):
+        try:
+            conversation = store.start_conversation(owner)
+            for i in range(25):
+                message = store.append(conversation, {"role": "assistant", "content": str(i)})
+                store.update_artifacts(message["id"], [{"kind": "write", "args": [i]}], "fp")
+        except sqlite3.OperationalError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=chat, args=(f"session:{n}",)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    for n in range(4):
+        (conversation,) = store.conversations(f"session:{n}")
+        assert conversation["messages"] == 25
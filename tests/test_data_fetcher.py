@@ -0,0 +1,29 @@
+import pandas as pd
+from src.data_fetcher import download_from_url, dataset_name_for
+from src.dataset_store import list_datasets, dataset_info, load_dataset
+
+
+def _csv(tmp_path, name="sales.csv"):
+    path = tmp_path / name
+    pd.DataFrame({"region": ["n", "s"], "amount": [1, 2]}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_fetched_csv_is_added_to_the_store(tmp_path):
+    df = download_from_url(_csv(tmp_path))
+
+    assert list_datasets() == ["sales"]
+    assert dataset_info("sales")["rows"] == 2
+    pd.testing.assert_frame_equal(load_dataset("sales"), df, check_dtype=False, check_categorical=False)
+
+
+def test_save_as_overrides_the_store_name(tmp_path):
+    download_from_url(_csv(tmp_path), save_as="q3 sales")
+
+    assert list_datasets() == ["q3_sales"]
+
+
+def test_dataset_name_for_drops_extensions():
+    assert dataset_name_for("https://example.com/data/titanic.csv") == "titanic"
+    assert dataset_name_for("https://example.com/data/events.csv.gz?raw=1") == "events"
+    assert dataset_name_for("https://example.com/") == "dataset"
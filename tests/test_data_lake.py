@@ -0,0 +1,29 @@
+import pandas as pd
+from src.data_lake import LazyDataLake
+from src.executor import code_fingerprint
+
+CODE = "orders = data_lake['orders']\nst.metric(label='Result', value=orders['amount'].sum())"
+
+
+def _lake(customers):
+    return LazyDataLake({
+        "orders": pd.DataFrame({"amount": [5, 7]}),
+        "customers": pd.DataFrame({"name": customers}),
+    })
+
+
+def test_code_fingerprint_ignores_tables_the_code_does_not_read():
+    before, after = _lake(["ann", "bo"]), _lake(["ann", "bo", "cy"])
+
+    assert before.fingerprint() != after.fingerprint()
+    assert code_fingerprint(CODE, before) == code_fingerprint(CODE, after)
+    assert code_fingerprint("st.write(data_lake['customers'])", before) != \
+        code_fingerprint("st.write(data_lake['customers'])", after)
+
+
+def test_code_without_table_names_depends_on_the_default_table():
+    lake = _lake(["ann"])
+    changed = LazyDataLake({"orders": pd.DataFrame({"amount": [5, 8]}), "customers": pd.DataFrame({"name": ["ann"]})})
+
+    assert code_fingerprint("st.write(df.shape)", lake) == lake.fingerprint(["orders"])
+    assert code_fingerprint("st.write(df.shape)", lake) != code_fingerprint("st.write(df.shape)", changed)
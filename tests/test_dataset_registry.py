@@ -0,0 +1,111 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src import dataset_registry
+from src.dataset_registry import DatasetRegistry
+
+
+def _frame(seed, rows=1_000):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "x": rng.normal(size=rows),
+        "n": rng.integers(0, 100, rows).astype(np.int32),
+        "city": pd.Categorical(rng.choice(["Paris", "Rome"], rows)),
+        "when": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+    })
+
+
+def _nbytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+@pytest.fixture
+def registry(monkeypatch, tmp_path):
+    def make(max_bytes):
+        registry = DatasetRegistry(max_bytes=max_bytes, spill_dir=str(tmp_path / "spill"))
+        monkeypatch.setattr(dataset_registry, "_registry", registry)
+        return registry
+    return make
+
+
+def _states(registry):
+    return {row["name"]: row["state"] for row in registry.stats()}
+
+
+def test_same_content_is_stored_once(registry):
+    registry = registry(max_bytes=10 ** 9)
+    first = registry.register(_frame(0), "a")
+    second = registry.register(_frame(0), "b")
+
+    assert first.key == second.key and len(registry.stats()) == 1
+    assert first.frame() is second.frame()
+    assert first.columns() == ["x", "n", "city", "when"] and first.rows() == 1_000
+
+
+def test_least_recently_used_frame_is_spilled_first(registry):
+    frames = [_frame(seed) for seed in range(3)]
+    registry = registry(max_bytes=2 * _nbytes(frames[0]) + 1)
+    a, b = registry.register(frames[0], "a"), registry.register(frames[1], "b")
+    a.frame()  # b is now the least recently used
+
+    c = registry.register(frames[2], "c")
+
+    assert _states(registry) == {"a": "in memory", "b": "on disk", "c": "in memory"}
+    assert registry.spills == 1
+    assert c.frame() is frames[2]
+
+
+def test_unreferenced_frames_are_dropped_before_referenced_ones_spill(registry):
+    frames = [_frame(seed) for seed in range(3)]
+    registry = registry(max_bytes=2 * _nbytes(frames[0]) + 1)
+    kept = registry.register(frames[0], "kept")
+    registry.register(frames[1], "orphan")  # handle discarded at once
+
+    registry.register(frames[2], "new")
+
+    assert _states(registry) == {"kept": "in memory", "new": "in memory"}
+    assert registry.spills == 0 and kept.frame() is frames[0]
+
+
+def test_spilled_handle_comes_back_identical(registry):
+    frames = [_frame(seed) for seed in range(2)]
+    registry = registry(max_bytes=_nbytes(frames[0]) + 1)
+    spilled = registry.register(frames[0], "first")
+    second = registry.register(frames[1], "second")
+    path = os.path.join(registry.spill_dir, f"{spilled.key}.arrow")
+    assert _states(registry)["first"] == "on disk" and os.path.exists(path)
+
+    reloaded = spilled.frame()
+
+    pd.testing.assert_frame_equal(reloaded, frames[0])
+    assert registry.reloads == 1
+    # Known without a reload, and reloading made room by spilling the other one
+    assert spilled.columns() == list(frames[0].columns)
+    assert _states(registry) == {"first": "in memory", "second": "on disk"}
+    pd.testing.assert_frame_equal(second.frame(), frames[1])
+
+
+def test_cleaned_variants_are_computed_once(registry):
+    registry = registry(max_bytes=10 ** 9)
+    handle = registry.register(_frame(0), "raw")
+    calls = []
+
+    def keep_positive(df, column):
+        calls.append(column)
+        return df[df[column] > 0]
+
+    first = registry.cleaned(handle, keep_positive, {"column": "x"})
+    second = registry.cleaned(handle, keep_positive, {"column": "x"})
+
+    assert first.key == second.key and calls == ["x"]
+    assert first.name == "raw (cleaned)" and (first.frame()["x"] > 0).all()
+
+
+def test_dropped_datasets_raise_key_error(registry):
+    registry = registry(max_bytes=10 ** 9)
+    handle = registry.register(_frame(0), "gone")
+    registry._drop(handle.key)
+
+    with pytest.raises(KeyError, match="no longer registered"):
+        handle.frame()
@@ -0,0 +1,40 @@
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from src.dataset_store import save_dataset, load_dataset, list_datasets, dataset_info
+
+SAVES = 8
+
+
+def _save_many(store_dir, prefix):
+    for i in range(SAVES):
+        save_dataset(pd.DataFrame({"x": range(i + 1)}), f"{prefix}{i}", store_dir=store_dir)
+
+
+def test_round_trip_with_column_selection(tmp_path):
+    df = pd.DataFrame({"a": [1, 2, None], "b": ["x", "y", "z"]})
+    save_dataset(df, "my data", store_dir=tmp_path)
+
+    assert list(load_dataset("my data", columns=["b"], store_dir=tmp_path).columns) == ["b"]
+    info = dataset_info("my data", store_dir=tmp_path)
+    assert info["rows"] == 3 and info["stats"]["a"]["null_count"] == 1
+
+
+def test_concurrent_threads_keep_every_entry(tmp_path):
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda p: _save_many(tmp_path, p), "abcd"))
+
+    assert len(list_datasets(store_dir=tmp_path)) == 4 * SAVES
+
+
+def test_concurrent_processes_keep_every_entry(tmp_path):
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_save_many, args=(str(tmp_path), p)) for p in "abcd"]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+
+    assert all(worker.exitcode == 0 for worker in workers)
+    assert len(list_datasets(store_dir=tmp_path)) == 4 * SAVES
+    assert not list(tmp_path.glob("*.tmp")) and not list(tmp_path.glob("*.part"))
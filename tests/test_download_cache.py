@@ -0,0 +1,110 @@
+import io
+import os
+import gzip
+import zipfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pandas as pd
+import pytest
+from src import data_fetcher
+from src.download_cache import DownloadCache
+
+CSV = b"city,temp\nOslo,4\nLima,19\n"
+
+
+def _zipped(name, data):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+FILES = {
+    "/weather.csv": CSV,
+    "/weather.csv.gz": gzip.compress(CSV),
+    "/weather.zip": _zipped("weather.csv", CSV),
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        self.server.requests.append((path, self.headers.get("If-None-Match")))
+        if path not in FILES:
+            self.send_error(404)
+            return
+        etag = f'"{hash(FILES[path])}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(FILES[path])))
+        self.end_headers()
+        self.wfile.write(FILES[path])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = DownloadCache(timeout=2)
+    monkeypatch.setattr(data_fetcher, "_download_cache", cache)
+    return cache
+
+
+@pytest.mark.parametrize("name", ["weather.csv", "weather.csv.gz", "weather.zip"])
+def test_compressed_downloads_parse(server, cache, name):
+    df = data_fetcher.download_from_url(f"{server.url}/{name}?raw=true")
+
+    assert df is not None
+    assert list(df["city"].astype(str)) == ["Oslo", "Lima"]
+    assert list(df["temp"]) == [4, 19]
+
+
+def test_revalidates_with_etag(server, cache):
+    url = f"{server.url}/weather.csv.gz"
+    first = cache.fetch(url)
+    second = cache.fetch(url)
+
+    assert first == second and first.endswith(".csv.gz")
+    assert server.requests[0][1] is None
+    assert server.requests[1][1] is not None
+    assert cache.stats() == {"entries": 1, "bytes": len(FILES["/weather.csv.gz"])}
+
+
+def test_serves_cached_copy_when_offline(server, cache):
+    url = f"{server.url}/weather.csv"
+    path = cache.fetch(url)
+    server.shutdown()
+    server.server_close()
+
+    assert cache.fetch(url) == path
+    assert pd.read_csv(path).shape == (2, 2)
+
+
+def test_old_entries_without_extension_still_resolve(server, cache):
+    url = f"{server.url}/weather.csv"
+    cache.fetch(url)
+    # Index written before blobs kept their extension
+    index = cache._read_index()
+    entry = index[url]
+    blob = entry.pop("blob")
+    os.replace(cache._blob_path(blob), cache._blob_path(entry["sha256"]))
+    cache._write_index(index)
+
+    assert cache.fetch(url) == cache._blob_path(entry["sha256"])
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+from src import eda_stats
+
+
+def _offset_frame(rows=20_000, seed=0):
+    """Large offsets with unit noise: raw power sums cancel to garbage on this."""
+    rng = np.random.default_rng(seed)
+    a = 1.7e9 + rng.normal(size=rows)
+    return pd.DataFrame({
+        "a": a,
+        "b": a + rng.normal(size=rows),
+        "c": np.where(rng.random(rows) < 0.2, np.nan, rng.normal(5, 2, rows)),
+        "empty": np.nan,
+    })
+
+
+def test_corr_matches_pandas_on_large_offsets():
+    eda_stats._cache.clear()
+    df = _offset_frame()
+    tm.assert_frame_equal(eda_stats.get_eda_stats(df)["corr"], df.corr(), rtol=1e-6, atol=1e-6)
+
+
+def test_appended_rows_match_pandas_on_large_offsets():
+    eda_stats._cache.clear()
+    df = _offset_frame()
+    eda_stats.get_eda_stats(df.iloc[:15_000].copy())
+    stats = eda_stats.get_eda_stats(df)
+
+    assert stats["incremental"]
+    tm.assert_frame_equal(stats["corr"], df.corr(), rtol=1e-6, atol=1e-6)
+    tm.assert_frame_equal(stats["describe"], df.describe(), rtol=1e-6, atol=1e-6)
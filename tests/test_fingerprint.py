@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+from src import fingerprint
+from src.fingerprint import dataframe_fingerprint
+
+
+def _frame():
+    return pd.DataFrame({"a": [1, 2, 3], "b": [1.5, 2.5, 3.5], "s": ["x", "y", "z"]})
+
+
+@pytest.fixture
+def hashes(monkeypatch):
+    calls = []
+    real = fingerprint._hash
+    monkeypatch.setattr(fingerprint, "_hash", lambda df: calls.append(1) or real(df))
+    return calls
+
+
+def test_unchanged_frame_is_hashed_once(hashes):
+    df = _frame()
+
+    assert dataframe_fingerprint(df) == dataframe_fingerprint(df)
+    assert len(hashes) == 1
+
+
+@pytest.mark.parametrize("edit", [
+    lambda df: df.loc.__setitem__((0, "a"), 9),
+    lambda df: df.iloc.__setitem__((1, 2), "w"),
+    lambda df: df.__setitem__("b", [0.0, 0.0, 0.0]),
+    lambda df: df.__setitem__("c", 1),
+    lambda df: df.sort_values("a", ascending=False, inplace=True),
+    lambda df: df.replace({2.5: 4.0}, inplace=True),
+    lambda df: df.rename(columns={"a": "z"}, inplace=True),
+    lambda df: setattr(df, "index", [7, 8, 9]),
+])
+def test_in_place_edits_invalidate_the_memo(edit):
+    df = _frame()
+    before = dataframe_fingerprint(df)
+
+    edit(df)
+
+    assert dataframe_fingerprint(df) != before
+    assert dataframe_fingerprint(df) == dataframe_fingerprint(df.copy())
@@ -0,0 +1,18 @@
+import pytest
+from benchmarks.import_budget import PAGES, DEFAULT_BUDGET, check_page
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_page_imports_stay_within_budget(page):
+    result = check_page(page, DEFAULT_BUDGET, repeats=2)
+
+    assert not result["leaks"], f"{page} imports {', '.join(result['leaks'])} at load time"
+    assert result["seconds"] <= DEFAULT_BUDGET, f"{page} took {result['seconds']:.2f}s: {result['heaviest']}"
+
+
+def test_auto_viz_builds_figures_without_loading_plotly_express_up_front():
+    from benchmarks.import_budget import measure, page_imports
+
+    _, _, loaded = measure(page_imports("pages/Auto_Viz.py"))
+
+    assert "plotly.express" not in loaded
@@ -0,0 +1,101 @@
+import time
+import pytest
+from src.llm_providers import ProviderEngine, FakeProvider, CircuitBreaker, AllProvidersFailed
+
+
+def _engine(*providers, **kwargs):
+    kwargs.setdefault("default_hedge_delay", 0.05)
+    return ProviderEngine(providers, **kwargs)
+
+
+def test_complete_hedges_a_slow_primary():
+    primary = FakeProvider("primary", response="[ANSWER]: slow", latency=1.0)
+    fallback = FakeProvider("fallback", response="[ANSWER]: fast", latency=0.01)
+    engine = _engine(primary, fallback)
+
+    assert engine.complete_sync("q") == ("[ANSWER]: fast", "fallback")
+    assert engine.hedges_fired == 1
+    # Losing a hedge race is not a failure
+    assert primary.breaker.failures == 0 and fallback.wins == 1
+
+
+def test_no_hedge_when_the_primary_answers_in_time():
+    primary = FakeProvider("primary", latency=0.0)
+    fallback = FakeProvider("fallback", latency=0.0)
+    engine = _engine(primary, fallback, default_hedge_delay=1.0)
+
+    assert engine.complete_sync("q")[1] == "primary"
+    assert engine.hedges_fired == 0 and fallback.calls == 0
+
+
+def test_hedge_delay_waits_for_enough_samples():
+    provider = FakeProvider("primary")
+    engine = _engine(provider, default_hedge_delay=2.0, min_hedge_samples=5)
+
+    for _ in range(4):
+        provider.latency.record(0.001)
+    # A few lucky fast calls must not make it hedge after a millisecond
+    assert engine._hedge_delay(provider.latency) == 2.0
+
+    provider.latency.record(0.001)
+    assert engine._hedge_delay(provider.latency) == 0.001
+
+
+def test_streamed_first_chunks_do_not_shorten_the_complete_hedge_delay():
+    # First chunks in 10ms, whole answers in 150ms: the complete() hedge must wait for whole answers
+    primary = FakeProvider("primary", response="[ANSWER]: " + "x" * 64, latency=0.01, chunk_delay=0.02)
+    fallback = FakeProvider("fallback", latency=0.0)
+    engine = _engine(primary, fallback, default_hedge_delay=1.0, min_hedge_samples=5)
+
+    for _ in range(5):
+        assert {name for name, _ in engine.stream_sync("q")} == {"primary"}
+    assert len(primary.first_chunk.samples) == 5 and not primary.latency.samples
+
+    primary.base_latency = 0.15
+    for _ in range(5):
+        assert engine.complete_sync("q")[1] == "primary"
+    assert engine.hedges_fired == 0
+    assert engine._hedge_delay(primary.latency) > engine._hedge_delay(primary.first_chunk)
+    assert engine.stats()["providers"]["primary"]["ttft_p50"] < 0.1
+
+
+def test_breaker_opens_after_threshold_and_recovers_through_half_open():
+    breaker = CircuitBreaker(threshold=2, cooldown=0.05)
+
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == "half-open" and breaker.allow()
+    # A failed trial re-opens it straight away
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_engine_skips_a_provider_with_an_open_breaker():
+    broken = FakeProvider("broken", failure_rate=1.0, latency=0.0, breaker=CircuitBreaker(threshold=2, cooldown=60))
+    healthy = FakeProvider("healthy", latency=0.0)
+    engine = _engine(broken, healthy)
+
+    for _ in range(2):
+        assert engine.complete_sync("q")[1] == "healthy"
+    assert broken.breaker.state == "open" and broken.calls == 2
+
+    assert engine.complete_sync("q")[1] == "healthy"
+    assert broken.calls == 2
+
+
+def test_all_breakers_open_raises():
+    provider = FakeProvider("only", failure_rate=1.0, latency=0.0, breaker=CircuitBreaker(threshold=1, cooldown=60))
+    engine = _engine(provider)
+
+    with pytest.raises(AllProvidersFailed, match="simulated failure"):
+        engine.complete_sync("q")
+    with pytest.raises(AllProvidersFailed, match="circuit open"):
+        engine.complete_sync("q")
@@ -0,0 +1,90 @@
+import threading
+import pandas as pd
+import pytest
+from src import llm_handler
+from src.llm_providers import ProviderEngine, FakeProvider
+from src.response_cache import ResponseCache, make_key
+
+ANSWER = "[ANSWER]: Total is 6.\n```python\nst.metric(label='Result', value=6)\n```\n[SUGGESTIONS]: A? | B?"
+
+
+def _collect(engine, prompt="q"):
+    return list(engine.stream_sync(prompt))
+
+
+@pytest.fixture
+def lake():
+    return {"sales": pd.DataFrame({"amount": [1, 2, 3]})}
+
+
+@pytest.fixture
+def use_engine(monkeypatch):
+    def install(*providers):
+        engine = ProviderEngine(providers, default_hedge_delay=0.05)
+        monkeypatch.setattr(llm_handler, "_provider_engine", engine)
+        monkeypatch.setattr(llm_handler, "_response_cache", ResponseCache(path=None))
+        return engine
+    return install
+
+
+def test_stream_hedges_a_slow_primary():
+    primary = FakeProvider("primary", response=ANSWER, latency=1.0)
+    fallback = FakeProvider("fallback", response=ANSWER, latency=0.01)
+    engine = ProviderEngine([primary, fallback], default_hedge_delay=0.05)
+
+    chunks = _collect(engine)
+
+    assert {name for name, _ in chunks} == {"fallback"}
+    assert "".join(chunk for _, chunk in chunks) == ANSWER
+    assert engine.hedges_fired == 1
+    # Losing a hedge race is not a failure
+    assert primary.breaker.failures == 0
+
+
+def test_stream_hands_over_when_primary_fails():
+    primary = FakeProvider("primary", failure_rate=1.0, latency=0.0)
+    fallback = FakeProvider("fallback", response=ANSWER, latency=0.0)
+    engine = ProviderEngine([primary, fallback], default_hedge_delay=5.0)
+
+    chunks = _collect(engine)
+
+    assert {name for name, _ in chunks} == {"fallback"}
+    assert primary.breaker.failures == 1
+    assert engine.hedges_fired == 0
+
+
+def test_ask_ai_stream_reports_fallback(use_engine, lake):
+    use_engine(FakeProvider("gemini", failure_rate=1.0, latency=0.0), FakeProvider("groq", response=ANSWER, latency=0.0))
+
+    events = list(llm_handler.ask_ai_stream("total amount", lake))
+
+    assert ("notice", "Gemini unavailable. Switched to Groq.") in events
+    kind, (code, suggestions, _) = events[-1]
+    assert kind == "done" and code == "st.metric(label='Result', value=6)" and suggestions == ["A?", "B?"]
+
+
+def test_concurrent_streams_share_one_call(use_engine, lake):
+    provider = FakeProvider("gemini", response=ANSWER, latency=0.2)
+    use_engine(provider)
+    results = []
+
+    def ask():
+        results.append(list(llm_handler.ask_ai_stream("total amount", lake))[-1])
+
+    threads = [threading.Thread(target=ask) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert provider.calls == 1
+    assert len(results) == 3 and len(set(map(repr, results))) == 1
+    assert llm_handler.get_response_cache().stats()["coalesced"] == 2
+
+
+def test_cache_key_follows_data_values(lake):
+    changed = {"sales": pd.DataFrame({"amount": [1, 2, 300]})}
+    model = "m"
+
+    assert make_key("total amount", lake, model) == make_key("Total amount?", lake, model)
+    assert make_key("total amount", lake, model) != make_key("total amount", changed, model)
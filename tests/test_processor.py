@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import processor
+
+
+def baseline_auto_clean_data(df):
+    """The original column-by-column engine, kept verbatim as the parity reference."""
+    working_df = df.copy()
+    working_df = working_df.drop_duplicates()
+    for col in working_df.columns:
+        if working_df[col].dtype in ['int64', 'float64']:
+            working_df[col] = working_df[col].fillna(working_df[col].median())
+        else:
+            working_df[col] = working_df[col].fillna('Unknown')
+    numeric_cols = working_df.select_dtypes(include=[np.number]).columns
+    for col in numeric_cols:
+        Q1 = working_df[col].quantile(0.25)
+        Q3 = working_df[col].quantile(0.75)
+        IQR = Q3 - Q1
+        lower_bound = Q1 - 1.5 * IQR
+        upper_bound = Q3 + 1.5 * IQR
+        working_df = working_df[(working_df[col] >= lower_bound) & (working_df[col] <= upper_bound)]
+    return working_df
+
+
+def _mixed_frame(rows=2_000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "heavy": rng.standard_t(2, rows),
+        "normal": rng.normal(50, 5, rows),
+        "count": rng.poisson(4, rows).astype(np.int64),
+        "region": rng.choice(["N", "S", "E", "W"], rows),
+        "note": rng.choice(["a", "b", None], rows),
+    })
+    df.loc[rng.random(rows) < 0.1, "normal"] = np.nan
+    df.loc[rng.random(rows) < 0.05, "heavy"] = np.nan
+    return pd.concat([df, df.iloc[:200]], ignore_index=True)  # exact duplicates
+
+
+FRAMES = {
+    "mixed": _mixed_frame(),
+    # Every column drops rows, so each one's bounds depend on the columns before it
+    "all_drop": pd.DataFrame({f"c{i}": np.random.default_rng(i).standard_t(3, 3_000) for i in range(12)}),
+    # Nothing is an outlier: quartiles stay batched for the whole pass
+    "none_drop": pd.DataFrame({f"c{i}": np.random.default_rng(i).uniform(0, 1, 3_000) for i in range(12)}),
+    "text_only": pd.DataFrame({"a": ["x", None, "x", "y"], "b": ["p", "q", "p", None]}),
+    "constant": pd.DataFrame({"a": [1.0] * 10 + [np.nan], "b": np.arange(11, dtype=np.int64)}),
+    "empty": pd.DataFrame({"a": pd.Series([], dtype=float), "b": pd.Series([], dtype=str)}),
+}
+
+
+@pytest.mark.parametrize("name", list(FRAMES))
+def test_auto_clean_data_matches_the_original_engine(name):
+    processor._memo.clear()
+    df = FRAMES[name]
+    expected = baseline_auto_clean_data(df)
+    pd.testing.assert_frame_equal(processor.auto_clean_data(df), expected)
+
+
+def test_auto_clean_data_leaves_its_input_alone():
+    df = _mixed_frame()
+    before = df.copy()
+    processor._memo.clear()
+    processor.auto_clean_data(df)
+    pd.testing.assert_frame_equal(df, before)
+
+
+def test_zscore_outliers_drops_only_far_rows():
+    df = pd.DataFrame({"x": np.r_[np.zeros(50), 100.0], "y": np.r_[np.arange(50.0), np.nan]})
+    cleaned, _ = processor.run_pipeline(df, [{"stage": "zscore_outliers", "threshold": 3}], workers=1)
+
+    assert len(cleaned) == 50 and cleaned["x"].max() == 0
+
+
+def test_mad_outliers_ignores_constant_columns():
+    df = pd.DataFrame({"x": [10.0, 11, 9, 10, 12, 95], "flat": [1.0] * 6})
+    cleaned, _ = processor.run_pipeline(df, [{"stage": "mad_outliers"}], workers=1)
+
+    assert cleaned["x"].tolist() == [10.0, 11, 9, 10, 12]
+
+
+def test_impute_with_mode_fills_numbers_and_categories():
+    df = pd.DataFrame({
+        "n": pd.Series([1, 2, 2, None], dtype="Int32"),
+        "c": pd.Categorical(["a", "b", "b", None]),
+        "flag": [True, False, False, None],
+    })
+    cleaned, _ = processor.run_pipeline(df, [{"stage": "impute", "numeric": "mode", "other": "mode"}], workers=1)
+
+    assert cleaned["n"].tolist() == [1, 2, 2, 2] and cleaned["c"].tolist() == ["a", "b", "b", "b"]
+    assert cleaned["flag"].tolist() == [True, False, False, False]
+
+
+def test_coerce_types_converts_numbers_and_dates_only():
+    df = pd.DataFrame({
+        "amount": ["1.5", "2", None],
+        "when": ["2024-01-02", "2024-02-03", None],
+        "code": ["A1", "2", "3"],
+    })
+    cleaned, _ = processor.run_pipeline(df, [{"stage": "coerce_types"}], workers=1)
+
+    assert cleaned["amount"].dtype == np.float64 and cleaned["amount"].sum() == 3.5
+    assert pd.api.types.is_datetime64_any_dtype(cleaned["when"])
+    assert cleaned["code"].tolist() == ["A1", "2", "3"]
+
+
+def test_strip_whitespace_trims_and_blanks_become_missing():
+    df = pd.DataFrame({"name": [" Ann", "Bob ", "   ", "Cy"], "n": [1, 2, 3, 4]})
+    cleaned, _ = processor.run_pipeline(df, [{"stage": "strip_whitespace"}], workers=1)
+
+    assert cleaned["name"].tolist()[:2] == ["Ann", "Bob"] and pd.isna(cleaned["name"][2])
+    assert cleaned["n"].tolist() == [1, 2, 3, 4]
+
+
+def test_process_pool_partitions_match_the_serial_run(monkeypatch):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({f"c{i}": rng.standard_t(3, 500) for i in range(6)})
+    df["text"] = [str(v) for v in rng.integers(0, 9, 500)]
+    df["code"] = [f"{v}" if v else "n/a" for v in rng.integers(0, 9, 500)]
+    pipeline = [{"stage": "coerce_types"}, {"stage": "mad_outliers"}]
+    processor._memo.clear()
+    serial, serial_timings = processor.run_pipeline(df, pipeline, workers=1)
+
+    monkeypatch.setattr(processor, "PARALLEL_MIN_CELLS", 0)
+    processor._memo.clear()
+    parallel, parallel_timings = processor.run_pipeline(df, pipeline, workers=2)
+
+    pd.testing.assert_frame_equal(parallel, serial)
+    assert [t["parallel"] for t in parallel_timings] == [True, True]
+    assert not any(t["parallel"] for t in serial_timings)
+
+
+def test_timings_cover_every_stage():
+    df = _mixed_frame()
+    processor._memo.clear()
+    cleaned, timings = processor.run_pipeline(df, processor.DEFAULT_PIPELINE, workers=1)
+
+    assert [t["stage"] for t in timings] == ["drop_duplicates", "impute", "iqr_outliers"]
+    assert timings[0]["rows"] == len(df) - 200 and timings[-1]["rows"] == len(cleaned)
+    assert all(t["seconds"] >= 0 for t in timings)
+
+
+def test_results_are_memoized_per_dataset_and_pipeline(monkeypatch):
+    df = _mixed_frame()
+    processor._memo.clear()
+    first, timings = processor.run_pipeline(df, workers=1)
+
+    calls = []
+    monkeypatch.setattr(processor, "_run_stage", lambda *args: calls.append(args) or (args[0], False))
+    again, again_timings = processor.run_pipeline(df.copy(), workers=1)
+    assert again is first and again_timings == timings and not calls
+    assert processor.pipeline_timings(df) == timings
+
+    # Another config, or edited data, is a new run
+    processor.run_pipeline(df, [{"stage": "drop_duplicates"}], workers=1)
+    edited = df.copy()
+    edited.loc[0, "count"] = 99
+    processor.run_pipeline(edited, workers=1)
+    assert len(calls) == 1 + len(processor.DEFAULT_PIPELINE)
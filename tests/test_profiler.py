@@ -0,0 +1,21 @@
+import pandas as pd
+from src.profiler import profile_dataframe, render_profile
+from src.llm_handler import build_prompt
+
+
+def test_unhashable_cells_are_profiled_by_their_text():
+    # The list only shows up well past the first rows
+    df = pd.DataFrame({
+        "tags": ["x"] * 3000 + [["a", "b"], ["a", "b"], None],
+        "meta": [{"k": i % 2} for i in range(3003)],
+        "n": range(3003),
+    })
+
+    profile = profile_dataframe(df)
+
+    assert profile["columns"]["tags"]["unique"] == 2
+    assert profile["columns"]["tags"]["top"] == ["x", "['a', 'b']"]
+    assert profile["columns"]["meta"]["unique"] == 2
+    assert profile["columns"]["n"]["min"] == 0 and profile["columns"]["n"]["unique"] == 3003
+    assert "tags (object" in render_profile("events", profile)
+    assert "Table: 'events'" in build_prompt("top tags", {"events": df})
@@ -0,0 +1,153 @@
+import time
+import threading
+import types
+import pandas as pd
+import pytest
+from src import llm_handler, response_cache
+from src.llm_providers import ProviderEngine, FakeProvider
+from src.response_cache import ResponseCache, make_key
+
+
+class StubClient:
+    """Stands in for the LLM: counts upstream calls and answers after `delay` seconds."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def complete(self, prompt):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return f"answer to {prompt}"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache, "time", types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def disk_path(tmp_path):
+    return str(tmp_path / "cache.sqlite")
+
+
+def test_hits_and_misses_are_counted():
+    cache, client = ResponseCache(path=None), StubClient()
+
+    for _ in range(3):
+        assert cache.get_or_compute("k", lambda: client.complete("q")) == "answer to q"
+
+    assert client.calls == 1
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["memory_hits"] == 2
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+
+def test_entries_expire_after_the_ttl(clock, disk_path):
+    cache, client = ResponseCache(path=disk_path, ttl=60), StubClient()
+    cache.get_or_compute("k", lambda: client.complete("q"))
+
+    clock[0] += 59
+    cache.get_or_compute("k", lambda: client.complete("q"))
+    assert client.calls == 1
+
+    clock[0] += 2
+    cache.get_or_compute("k", lambda: client.complete("q"))
+    assert client.calls == 2
+
+
+def test_memory_tier_evicts_the_least_recently_used():
+    cache = ResponseCache(path=None, memory_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_disk_tier_survives_a_restart_and_is_bounded(clock, disk_path):
+    cache = ResponseCache(path=disk_path, disk_entries=2)
+    for key in "abc":
+        cache.put(key, {"value": key})
+        clock[0] += 1
+
+    restarted = ResponseCache(path=disk_path)
+    assert restarted.get("a") is None
+    assert restarted.get("c") == {"value": "c"}
+    assert restarted.stats()["disk_hits"] == 1
+    # Promoted to memory: the next lookup does not touch SQLite
+    restarted.get("c")
+    assert restarted.stats()["memory_hits"] == 1
+
+
+def test_concurrent_identical_requests_share_one_upstream_call():
+    cache, client = ResponseCache(path=None), StubClient(delay=0.2)
+    start = threading.Barrier(8)
+    results = []
+
+    def ask():
+        start.wait()
+        results.append(cache.get_or_compute("k", lambda: client.complete("q")))
+
+    threads = [threading.Thread(target=ask) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.calls == 1
+    assert results == ["answer to q"] * 8
+    assert cache.stats()["coalesced"] == 7
+
+
+def test_failures_reach_every_waiter_and_are_not_cached():
+    cache, client = ResponseCache(path=None), StubClient()
+    errors = []
+
+    def fail():
+        time.sleep(0.1)
+        raise RuntimeError("upstream down")
+
+    def ask():
+        try:
+            cache.get_or_compute("k", fail)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=ask) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == ["upstream down"] * 3
+    assert cache.get_or_compute("k", lambda: client.complete("q")) == "answer to q"
+
+
+def test_uncacheable_values_are_not_stored():
+    cache, client = ResponseCache(path=None), StubClient()
+
+    for _ in range(2):
+        cache.get_or_compute("k", lambda: client.complete("q"), cacheable=lambda value: False)
+
+    assert client.calls == 2
+
+
+def test_other_tables_are_part_of_the_key(monkeypatch):
+    provider = FakeProvider("gemini", response="[ANSWER]: ok", latency=0.0)
+    monkeypatch.setattr(llm_handler, "_provider_engine", ProviderEngine([provider]))
+    monkeypatch.setattr(llm_handler, "_response_cache", ResponseCache(path=None))
+    sales = pd.DataFrame({"amount": [1, 2, 3]})
+
+    llm_handler.ask_ai("total amount", {"sales": sales, "customers": pd.DataFrame({"id": [1]})})
+    llm_handler.ask_ai("total amount", {"sales": sales, "regions": pd.DataFrame({"id": [1]})})
+
+    assert provider.calls == 2
+    assert make_key("q", {"sales": sales}, "m", ["customers"]) != make_key("q", {"sales": sales}, "m", ["regions"])
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.data_lake import LazyDataLake
+from src.sampling import stratified_sample, annotate_preview, scaling, _estimate
+from src.sandbox import run_replicated
+
+
+def _metric(label, value):
+    return {"call": "metric", "args": [label, value], "kwargs": {}}
+
+
+def _frame(rows=10_000, rare=5):
+    group = np.array(["common"] * (rows - rare) + ["rare"] * rare)
+    return pd.DataFrame({"group": pd.Categorical(group), "x": np.arange(rows, dtype=float)})
+
+
+def test_stratified_sample_has_exact_size_and_proportional_quotas():
+    df = _frame()
+    sample = stratified_sample(df, rows=1000, seed=3)
+
+    assert len(sample) == 1000
+    assert sample.index.is_monotonic_increasing
+    assert sample["group"].value_counts()["common"] in (999, 1000)
+
+
+def test_rare_groups_are_drawn_at_their_share_on_average():
+    # 5 rare rows at a 10% rate is half a row per sample: a forced minimum of one doubles it
+    df = _frame()
+    drawn = [(stratified_sample(df, rows=1000, seed=seed)["group"] == "rare").sum() for seed in range(400)]
+
+    assert np.mean(drawn) == pytest.approx(0.5, abs=0.08)
+    assert set(drawn) <= {0, 1}
+
+
+@pytest.mark.parametrize("value, stacked, kind", [
+    (120.0, 240.0, "total"),
+    (3.5, 3.5, "level"),
+    (0.0, 0.0, "level"),
+    (2.0, 1.9995, None),
+])
+def test_scaling_follows_how_the_value_responds_to_more_rows(value, stacked, kind):
+    assert scaling(value, stacked) == kind
+
+
+def test_estimate_scales_totals_only():
+    halves = [49.0, 51.0, 50.0]
+
+    total, total_width = _estimate(100.0, halves, 10.0, "total")
+    level, level_width = _estimate(100.0, halves, 10.0, "level")
+
+    assert total == 1000.0 and total_width == pytest.approx(20 * 1.96 * np.std(halves, ddof=1))
+    # A level whose half-sample values happen to be half of it is still not scaled
+    assert level == 100.0 and level_width == pytest.approx(1.96 * np.std(halves, ddof=1))
+
+
+def test_annotate_preview_labels_each_kind():
+    artifacts = [_metric("Rows", 1000), _metric("Mean", "$2.5"), _metric("Spread", 4.0)]
+    stacked = [_metric("Rows", 2000), _metric("Mean", "$2.5"), _metric("Spread", 3.999)]
+    halves = [[_metric("Rows", 500), _metric("Mean", m), _metric("Spread", s)] for m, s in [(2.4, 4.1), (2.6, 3.9)]]
+
+    preview = annotate_preview(artifacts, [stacked, *halves], 1000, 10_000)
+    metrics = [a["args"] for a in preview if a["call"] == "metric"]
+
+    assert metrics == [["Rows (≈)", "10,000"], ["Mean (≈)", "$2.500"], ["Spread (sample)", "4.000"]]
+    assert preview[0]["call"] == "info"
+
+
+def test_preview_estimates_from_a_real_run():
+    full = _frame(rows=20_000)
+    sample = stratified_sample(full, rows=2000)
+    code = "st.metric(label='Rows', value=len(df))\nst.metric(label='Mean', value=float(df['x'].mean()))"
+
+    ok, error, artifacts, replicas = run_replicated(code, LazyDataLake({"t": sample}), replicates=4)
+    preview = annotate_preview(artifacts, replicas, len(sample), len(full))
+    metrics = dict(a["args"] for a in preview if a["call"] == "metric")
+
+    assert ok, error
+    assert metrics["Rows (≈)"] == "20,000"
+    assert float(metrics["Mean (≈)"].replace(",", "")) == pytest.approx(full["x"].mean(), rel=0.05)
@@ -0,0 +1,104 @@
+import time
+import threading
+import pandas as pd
+import pytest
+from src.sandbox import SandboxPool, export_dataset
+
+
+@pytest.fixture
+def pool():
+    pool = SandboxPool(size=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_mutations_do_not_leak_between_calls(pool):
+    path = export_dataset(pd.DataFrame({"a": [1, 2, 3]}))
+
+    ok, error, _ = pool.run("df['z'] = 1\ndf.loc[0, 'a'] = 99", {"df": path})
+    assert ok, error
+
+    ok, error, artifacts = pool.run("st.write(list(df.columns), int(df.loc[0, 'a']))", {"df": path})
+    assert ok, error
+    assert artifacts[0]["args"] == [["a"], 1]
+
+
+def _pool_of(workers, reserved):
+    pool = SandboxPool(size=0)
+    pool._idle = list(workers)
+    pool.reserved = reserved
+    return pool
+
+
+def _checkout_later(pool, background, taken):
+    thread = threading.Thread(target=lambda: taken.append((background, pool._checkout(background))))
+    thread.start()
+    return thread
+
+
+def test_background_runs_leave_a_worker_for_questions():
+    pool = _pool_of(["w1", "w2"], reserved=1)
+    assert pool._checkout(background=True) == "w2"
+
+    taken = []
+    waiting = _checkout_later(pool, True, taken)
+    waiting.join(timeout=0.2)
+    assert waiting.is_alive() and not taken
+
+    # A question still gets the reserved worker at once
+    assert pool._checkout(background=False) == "w1"
+    pool._checkin("w2")
+    pool._checkin("w1")
+    waiting.join(timeout=1)
+    assert taken == [(True, "w1")]
+
+
+def test_questions_go_before_waiting_background_runs():
+    pool = _pool_of([], reserved=0)
+    taken = []
+    background = _checkout_later(pool, True, taken)
+    time.sleep(0.1)
+    question = _checkout_later(pool, False, taken)
+    time.sleep(0.1)
+
+    pool._checkin("w1")
+    question.join(timeout=1)
+    assert taken == [(False, "w1")]
+
+    pool._checkin("w1")
+    background.join(timeout=1)
+    assert taken[1] == (True, "w1")
+
+
+MIXED = pd.DataFrame({"a": [1, "x", 3], "b": [1.0, 2.0, 3.0]})
+
+
+def test_mixed_object_columns_are_exported_as_text():
+    from pyarrow import feather
+
+    table = feather.read_table(export_dataset(MIXED))
+
+    assert table.column("a").to_pylist() == ["1", "x", "3"]
+    assert table.column("b").to_pylist() == [1.0, 2.0, 3.0]
+
+
+def test_sandboxed_execution_runs_on_mixed_columns():
+    from src.executor import execute_and_capture
+
+    ok, error, artifacts = execute_and_capture('st.metric("r", df.b.sum())', {"Uploaded_Data": MIXED}, sandbox=True)
+
+    assert ok, error
+    assert artifacts[0]["args"] == ["r", 6.0]
+
+
+def test_export_failure_is_reported_not_raised(monkeypatch):
+    from src import executor, sandbox
+
+    def fail(df):
+        raise OSError("disk full")
+    monkeypatch.setattr(sandbox, "export_dataset", fail)
+
+    ok, error, artifacts = executor.execute_and_capture("st.write(len(df))", {"t": MIXED}, sandbox=True)
+
+    assert not ok and "disk full" in error
+    assert artifacts == [{"call": "error", "args": [error], "kwargs": {}}]
@@ -0,0 +1,42 @@
+import sys
+import threading
+import pandas as pd
+import pytest
+from src import binning, eda_stats, profiler
+
+CACHES = {
+    "profiles": (profiler, "_profiles", "MAX_CACHED_PROFILES", profiler.get_profile),
+    "binning": (binning, "_cache", "MAX_CACHED", binning.get_binning_index),
+    "eda_stats": (eda_stats, "_cache", "MAX_CACHED", eda_stats.get_eda_stats),
+}
+
+
+@pytest.mark.parametrize("name", list(CACHES))
+def test_process_wide_caches_survive_concurrent_sessions(name, monkeypatch):
+    module, cache, limit, get = CACHES[name]
+    monkeypatch.setattr(module, limit, 2)
+    getattr(module, cache).clear()
+    # Switch threads as often as possible so lookups and evictions interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    frames = [pd.DataFrame({"x": [float(i), 2.0, 3.0], "c": ["a", "b", "a"]}) for i in range(4)]
+    errors = []
+
+    def session(offset):
+        try:
+            for i in range(100):
+                get(frames[(i + offset) % len(frames)])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=session, args=(offset,)) for offset in range(6)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+    assert len(getattr(module, cache)) <= 2
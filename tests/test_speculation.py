@@ -0,0 +1,33 @@
+import pytest
+import pandas as pd
+from src import llm_handler, speculation
+from src.llm_providers import ProviderEngine, FakeProvider
+from src.response_cache import ResponseCache
+
+ANSWER = "[ANSWER]: Three rows.\n```python\nst.metric(label='Rows', value=len(df))\n```\n[SUGGESTIONS]: More?"
+
+
+@pytest.fixture
+def fallback_engine(monkeypatch):
+    engine = ProviderEngine([FakeProvider("gemini", failure_rate=1.0, latency=0.0),
+                             FakeProvider("groq", response=ANSWER, latency=0.0)])
+    monkeypatch.setattr(llm_handler, "_provider_engine", engine)
+    monkeypatch.setattr(llm_handler, "_response_cache", ResponseCache(path=None))
+    monkeypatch.setenv("DATATALK_SANDBOX", "0")
+    return engine
+
+
+def test_speculation_does_not_draw_the_fallback_warning(fallback_engine, monkeypatch):
+    drawn = []
+    monkeypatch.setattr(llm_handler.st, "warning", drawn.append)
+    lake = {"sales": pd.DataFrame({"amount": [1, 2, 3]})}
+
+    round_ = speculation.Speculation(limit=1)
+    round_.start(["How many rows?"], lake, fingerprint="fp")
+    round_._entries["how many rows"][1].result(timeout=10)
+    result = round_.take("How many rows?")
+
+    assert result is not None
+    code, suggestions, _, artifacts = result
+    assert artifacts[0]["call"] == "metric" and artifacts[0]["kwargs"]["value"] == 3
+    assert drawn == []
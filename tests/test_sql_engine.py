@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+from src.sql_engine import run_sql, sql_available, MAX_RESULT_ROWS
+from src.sandbox import run_recorded
+from src.data_lake import LazyDataLake
+
+pytestmark = pytest.mark.skipif(not sql_available(), reason="DuckDB is not installed")
+
+
+@pytest.fixture
+def lake():
+    return {"sales": pd.DataFrame({"region": ["n", "s", "e", "w", "n"], "amount": [1, 2, 3, 4, 5]})}
+
+
+def test_result_at_the_cap_is_not_truncated(lake):
+    notices = []
+    result = run_sql("SELECT * FROM sales", lake, max_rows=5, on_truncate=notices.append)
+
+    assert len(result) == 5 and not result.attrs["truncated"]
+    assert notices == []
+
+
+def test_truncation_is_reported(lake):
+    notices = []
+    result = run_sql("SELECT * FROM sales", lake, max_rows=3, on_truncate=notices.append)
+
+    assert len(result) == 3 and result.attrs["truncated"]
+    assert len(notices) == 1 and "first 3 rows" in notices[0]
+
+    with pytest.warns(UserWarning, match="first 3 rows"):
+        run_sql("SELECT * FROM sales", lake, max_rows=3)
+
+
+def test_generated_code_shows_the_truncation():
+    lake = LazyDataLake({"events": pd.DataFrame({"id": range(MAX_RESULT_ROWS + 1)})})
+    code = "result = sql('SELECT * FROM events')\nst.metric(label='Rows', value=len(result))"
+
+    ok, error, artifacts = run_recorded(code, lake)
+
+    assert ok, error
+    assert [artifact["call"] for artifact in artifacts] == ["warning", "metric"]
+    assert artifacts[1]["kwargs"]["value"] == MAX_RESULT_ROWS
@@ -0,0 +1,114 @@
+import json
+import threading
+import pytest
+from src.tracing import Tracer
+
+
+@pytest.fixture
+def tracer():
+    return Tracer(max_traces=3)
+
+
+def test_spans_nest_under_their_trace(tracer):
+    with tracer.span("turn", query="q") as attrs:
+        with tracer.span("llm"):
+            with tracer.span("llm.call"):
+                pass
+        with tracer.span("execute"):
+            pass
+        attrs["rows"] = 10
+
+    (trace,) = tracer.recent()
+    names = [(s["name"], s["parent"]) for s in trace["spans"]]
+    assert names == [("turn", None), ("llm", 0), ("llm.call", 1), ("execute", 0)]
+    assert trace["spans"][0]["attrs"] == {"query": "q", "rows": 10}
+    assert trace["seconds"] == trace["spans"][0]["seconds"] >= trace["spans"][1]["seconds"]
+    assert "_t0" not in trace
+
+
+def test_failed_spans_are_marked_and_closed(tracer):
+    with pytest.raises(ValueError):
+        with tracer.span("turn"):
+            with tracer.span("execute"):
+                raise ValueError("boom")
+
+    (trace,) = tracer.recent()
+    assert [s["attrs"].get("error") for s in trace["spans"]] == ["ValueError", "ValueError"]
+    assert all(s["seconds"] is not None for s in trace["spans"])
+
+
+def test_threads_get_separate_traces(tracer):
+    def turn():
+        with tracer.span("turn"):
+            with tracer.span("llm"):
+                pass
+
+    threads = [threading.Thread(target=turn) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [len(t["spans"]) for t in tracer.recent()] == [2, 2, 2]
+
+
+def test_only_the_latest_traces_are_kept(tracer):
+    for i in range(5):
+        with tracer.span(f"turn{i}"):
+            pass
+
+    assert [t["name"] for t in tracer.recent()] == ["turn2", "turn3", "turn4"]
+    # Span totals still count every span
+    assert tracer.span_totals["turn0"][0] == 1
+
+
+def test_counters_add_up_per_label_set_and_per_trace(tracer):
+    with tracer.span("turn"):
+        tracer.incr("llm_tokens_total", 100, provider="gemini")
+        tracer.incr("llm_tokens_total", 50, provider="gemini")
+    tracer.incr("llm_tokens_total", 7, provider="groq")
+
+    assert tracer.counters[("llm_tokens_total", (("provider", "gemini"),))] == 150
+    assert tracer.counters[("llm_tokens_total", (("provider", "groq"),))] == 7
+    assert tracer.recent()[0]["counters"] == {"llm_tokens_total": 150}
+
+
+def test_json_export(tracer):
+    with tracer.span("turn"):
+        tracer.incr("bytes_total", 3, kind="prompt")
+    tracer.record("render", 0.25)
+
+    exported = json.loads(tracer.export_json())
+
+    assert [t["name"] for t in exported["traces"]] == ["turn", "render"]
+    assert exported["counters"] == [{"name": "bytes_total", "labels": {"kind": "prompt"}, "value": 3}]
+    assert exported["spans"]["render"] == {"count": 1, "seconds": 0.25}
+    assert exported["spans"]["turn"]["count"] == 1
+
+
+def test_prometheus_export(tracer):
+    tracer.incr("errors_total", provider="gemini")
+    tracer.incr("errors_total", 2, provider='gro"q')
+    tracer.record("render", 0.5)
+    tracer.record("render", 0.25)
+
+    lines = tracer.export_prometheus().splitlines()
+
+    assert lines == [
+        "# TYPE datatalk_errors_total counter",
+        'datatalk_errors_total{provider="gemini"} 1',
+        'datatalk_errors_total{provider="gro\\"q"} 2',
+        "# TYPE datatalk_span_seconds summary",
+        'datatalk_span_seconds_sum{span="render"} 0.750000',
+        'datatalk_span_seconds_count{span="render"} 2',
+    ]
+
+
+def test_breakdown_sums_child_spans_per_name(tracer):
+    with tracer.span("turn"):
+        tracer.record("llm.call", 0.5)
+        tracer.record("llm.call", 0.25)
+        tracer.incr("tokens", 9)
+
+    (row,) = tracer.breakdown()
+    assert row["name"] == "turn" and row["llm.call"] == 0.75 and row["tokens"] == 9
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from src.viz_prep import build_chart, cap_categories, MAX_OUTLIERS, RAW_ROW_LIMIT
+
+ROWS = RAW_ROW_LIMIT * 4
+
+
+def _frame(seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "team": rng.choice(["a", "b"], ROWS),
+        "score": rng.normal(100, 10, ROWS),
+        "when": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, ROWS), unit="D"),
+    })
+    # A heavy tail in team a, one extreme point in team b
+    df.loc[df.index[df["team"] == "a"][:1000], "score"] = 1000 + np.arange(1000)
+    df.loc[df.index[df["team"] == "b"][0], "score"] = -500
+    return df
+
+
+def test_precomputed_box_keeps_a_capped_outlier_sample():
+    df = _frame()
+    fig, note = build_chart(df, "Box Plot", "team", "score")
+
+    boxes = [trace for trace in fig.data if isinstance(trace, go.Box)]
+    points = {trace.x[0]: np.asarray(trace.y) for trace in fig.data if isinstance(trace, go.Scatter)}
+    assert [box.name for box in boxes] == ["a", "b"]
+    a = df.loc[df["team"] == "a", "score"]
+    # Capped, with both extremes always among the points drawn
+    assert len(points["a"]) == MAX_OUTLIERS and points["a"].max() == 1999 and points["a"].min() == a.min()
+    assert -500 in points["b"]
+    assert "outliers shown" in note
+
+    # Whiskers sit on observed values inside the fences
+    b = df.loc[df["team"] == "b", "score"]
+    assert boxes[1].lowerfence[0] in set(b) and boxes[1].lowerfence[0] > -500
+
+
+def test_datetime_scatter_is_binned_on_a_time_axis():
+    df = _frame()
+    fig, note = build_chart(df, "Scatter Plot", "when", "score")
+
+    heatmap = fig.data[0]
+    assert isinstance(heatmap, go.Heatmap) and note.startswith("Density")
+    assert np.issubdtype(np.asarray(heatmap.x).dtype, np.datetime64)
+    assert pd.Timestamp(heatmap.x[0]) >= pd.Timestamp("2024-01-01")
+    assert pd.Timestamp(fig.data[1].x[-1]) <= pd.Timestamp("2025-01-01")
+
+
+def test_capped_categories_keep_a_real_other_group():
+    grouped = pd.Series({"Other": 1000, **{f"c{i}": 10 + i for i in range(40)}})
+    capped = cap_categories(grouped, max_categories=5)
+
+    assert capped["Other"] == 1000
+    assert capped.index.is_unique and capped.sum() == grouped.sum()